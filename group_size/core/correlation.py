@@ -0,0 +1,123 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from core.result_table import data_version, result_table
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+
+
+def correlation_matrix(df, columns, method='pearson'):
+    """
+    Correlation matrix of columns, with each column ranked (for Spearman) and standardized once.
+
+    All pairs come from a single matrix product of the standardized columns. Matches
+    DataFrame.corr: ties get average ranks and constant columns give NaN. Columns with
+    missing or infinite values fall back to DataFrame.corr, which drops them pairwise.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Input data
+    columns : list of str
+        Columns to correlate
+    method : str, optional
+        'pearson' or 'spearman'
+
+    Returns:
+    --------
+    pd.DataFrame
+        Square correlation matrix indexed by columns
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"method must be one of {CORRELATION_METHODS}, got {method!r}")
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=float)
+    if not np.isfinite(values).all():
+        return df[columns].astype(float).corr(method=method)
+
+    if method == 'spearman':
+        values = rankdata(values, axis=0)
+    centered = values - values.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standardized = centered / np.sqrt((centered ** 2).sum(axis=0))
+    corr = np.clip(standardized.T @ standardized, -1, 1)
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+class CorrelationEngine:
+    """
+    Correlation matrices of one results table, computed once per (slice, method, columns).
+
+    The cache is cleared when the length of data changes or after
+    core.result_table.invalidate(data); call that after changing values in place.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame
+        Simulation results
+    slice_col : str, optional
+        Column whose value selects the rows being correlated (default 'min_rate')
+    maxsize : int, optional
+        Number of matrices kept
+    """
+    def __init__(self, data, slice_col='min_rate', maxsize=128):
+        # Weak, so a shared engine does not keep its table alive
+        self._data = weakref.ref(data)
+        self.slice_col = slice_col
+        self.maxsize = maxsize
+        self._matrices = OrderedDict()
+        self._version = data_version(data)
+        self._lock = threading.Lock()
+
+    @property
+    def data(self):
+        return self._data()
+
+    def correlations(self, slice_value, columns, method='pearson'):
+        """
+        Correlation matrix of columns over the rows where slice_col equals slice_value.
+        The returned DataFrame is shared and must not be mutated.
+        """
+        key = (slice_value, method, tuple(columns))
+        version = data_version(self.data)
+        with self._lock:
+            if version != self._version:
+                self._matrices.clear()
+                self._version = version
+            if key in self._matrices:
+                self._matrices.move_to_end(key)
+                return self._matrices[key]
+
+        rows = result_table(self.data, [self.slice_col]).select(**{self.slice_col: slice_value})
+        matrix = correlation_matrix(rows, columns, method=method)
+
+        with self._lock:
+            self._matrices[key] = matrix
+            while len(self._matrices) > self.maxsize:
+                self._matrices.popitem(last=False)
+        return matrix
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def correlation_engine(data, slice_col='min_rate'):
+    """
+    The CorrelationEngine for a results DataFrame, shared by every caller passing the same object.
+    """
+    key = (id(data), slice_col)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine.data is not data:
+            engine = CorrelationEngine(data, slice_col=slice_col)
+            if key not in _engines:
+                weakref.finalize(data, _engines.pop, key, None)
+            _engines[key] = engine
+    return engine
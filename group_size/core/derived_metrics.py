@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Bins of prop_disadv used to group results by group size
+PROP_DISADV_BINS = [0, 0.25, 0.5, 0.75, 1.0]
+PROP_DISADV_LABELS = ['Small Minority (0-25%)', 'Minority (26-50%)',
+                      'Majority (51-75%)', 'Large Majority (76-100%)']
+
+# Buckets of disparity_ratio used by the disparity probability plots
+DISPARITY_BUCKET_BINS = [0, 2, 4, 10, 30, float('inf')]
+DISPARITY_BUCKET_LABELS = ['Low (1-2)', 'Moderate (2-4)', 'High (5-10)', 'Very High (10-30)', 'Extreme (30+)']
+
+# Columns added by add_derived_metrics
+DERIVED_COLUMNS = [
+    'disadv_delta_from_avg',
+    'adv_delta_from_avg',
+    'disadv_delta_from_avg_percent',
+    'adv_delta_from_avg_percent',
+    'disadv_deviation_percent',
+    'disparity_ratio_rounded',
+    'disparity_ratio_label',
+    'prop_disadv_binned',
+    'disparity_bucket',
+]
+
+
+def create_disparity_ratio_label(disparity_ratio):
+    """
+    Create a standardized label for disparity ratio ranges.
+
+    Parameters:
+    -----------
+    disparity_ratio : float
+        The disparity ratio value
+
+    Returns:
+    --------
+    str
+        Formatted label for the disparity ratio range
+    """
+    if disparity_ratio == 1:
+        return '1-1.49'
+    elif disparity_ratio == 10:
+        return '9.5-10'
+    else:
+        return f'{disparity_ratio-0.5}-{disparity_ratio+0.49}'
+
+
+def disparity_ratio_labels(rounded_ratios):
+    """
+    Labels of rounded disparity ratios as a categorical ordered by ratio.
+
+    create_disparity_ratio_label is called once per distinct ratio rather than per row.
+
+    Parameters:
+    -----------
+    rounded_ratios : array-like
+        Rounded disparity ratios
+
+    Returns:
+    --------
+    pd.Categorical
+    """
+    distinct, codes = np.unique(np.asarray(rounded_ratios, dtype=float), return_inverse=True)
+    labels = [create_disparity_ratio_label(ratio) for ratio in distinct]
+    if len(set(labels)) < len(labels):  # e.g. several NaNs, which np.unique keeps apart
+        labels, relabel = np.unique(labels, return_inverse=True)
+        codes = relabel[codes]
+    return pd.Categorical.from_codes(codes.reshape(-1), categories=pd.Index(labels))
+
+
+def add_derived_metrics(data):
+    """
+    Adds every derived column the plots read (DERIVED_COLUMNS), computed column-wise.
+
+    The input is not modified; the result shares its existing columns with it.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame
+        Simulation results with rate_disadv, rate_adv, pop_avg, disparity_ratio and
+        prop_disadv columns
+
+    Returns:
+    --------
+    pd.DataFrame
+        Results with absolute and percent deviations of each group from the population
+        average (plus the signed disadv_deviation_percent), the rounded disparity ratio
+        and its label, and categorical prop_disadv bins and disparity buckets
+    """
+    df = data.copy(deep=False)
+
+    rate_disadv = df['rate_disadv'].to_numpy(dtype=float)
+    rate_adv = df['rate_adv'].to_numpy(dtype=float)
+    pop_avg = df['pop_avg'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['disadv_delta_from_avg'] = np.abs(rate_disadv - pop_avg)
+        df['adv_delta_from_avg'] = np.abs(rate_adv - pop_avg)
+        df['disadv_delta_from_avg_percent'] = df['disadv_delta_from_avg'] / pop_avg * 100
+        df['adv_delta_from_avg_percent'] = df['adv_delta_from_avg'] / pop_avg * 100
+        df['disadv_deviation_percent'] = (rate_disadv - pop_avg) / pop_avg * 100
+
+    df['disparity_ratio_rounded'] = np.round(df['disparity_ratio'])
+    df['disparity_ratio_label'] = disparity_ratio_labels(df['disparity_ratio_rounded'])
+    df['prop_disadv_binned'] = pd.cut(df['prop_disadv'], bins=PROP_DISADV_BINS, labels=PROP_DISADV_LABELS,
+                                      include_lowest=True)
+    df['disparity_bucket'] = pd.cut(df['disparity_ratio'], bins=DISPARITY_BUCKET_BINS,
+                                    labels=DISPARITY_BUCKET_LABELS)
+    return df
+
+
+def ensure_derived_metrics(data):
+    """
+    Returns data unchanged when it already holds DERIVED_COLUMNS (e.g. prepared at sweep
+    or load time), otherwise add_derived_metrics(data).
+    """
+    if all(column in data.columns for column in DERIVED_COLUMNS):
+        return data
+    return add_derived_metrics(data)
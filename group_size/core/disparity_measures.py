@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_disparity_measures(rate_disadv: float, rate_adv: float, p: float) -> dict:
     """
     Calculate various disparity measures between groups.
@@ -38,4 +41,42 @@ def calculate_disparity_measures(rate_disadv: float, rate_adv: float, p: float)
         'odds_ratio': odds_ratio,
         # 'odds_disadvantaged': odds_disadv,
         # 'odds_advantaged': odds_adv
-    }
\ No newline at end of file
+    }
+
+def calculate_disparity_measures_array(rate_disadv, rate_adv, p: float) -> dict:
+    """
+    Vectorized version of calculate_disparity_measures for arrays of rates,
+    e.g. one entry per Monte Carlo replicate.
+    
+    Parameters:
+    -----------
+    rate_disadv : numpy.ndarray
+        Incarceration rates for disadvantaged group
+    rate_adv : numpy.ndarray
+        Incarceration rates for advantaged group
+    p : float
+        Proportion of population in disadvantaged group
+        
+    Returns:
+    --------
+    dict
+        Dictionary with the same keys as calculate_disparity_measures, each an array
+    """
+    rate_disadv = np.asarray(rate_disadv, dtype=float)
+    rate_adv = np.asarray(rate_adv, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate_diff = rate_disadv - rate_adv
+        disparity_ratio = np.where(rate_adv > 0, rate_disadv / rate_adv, np.inf)
+        normalized_disparity_index = np.where(rate_adv > 0, (disparity_ratio - 1)/(disparity_ratio + (1-p)/p), 1.0)
+
+        odds_disadv = np.where(rate_disadv < 100000, rate_disadv / (100000 - rate_disadv), np.inf)
+        odds_adv = np.where(rate_adv < 100000, rate_adv / (100000 - rate_adv), np.inf)
+        odds_ratio = np.where(odds_adv > 0, odds_disadv / odds_adv, np.inf)
+
+    return {
+        'rate_difference': rate_diff,
+        'normalized_disparity_index': normalized_disparity_index,
+        'disparity_ratio': disparity_ratio,
+        'odds_ratio': odds_ratio,
+    }
@@ -0,0 +1,161 @@
+import itertools
+from collections import namedtuple
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from core.result_table import match_level
+
+INTERPOLATION_METHODS = ('linear', 'pchip')
+
+Interpolation = namedtuple('Interpolation', ['value', 'error', 'steep'])
+
+
+class GridInterpolator:
+    """
+    Answers off-grid queries for one metric of a ResultCube.
+
+    Values come from multilinear (or monotone cubic) interpolation over the cube's
+    axes. The error estimate is that of multilinear interpolation: along each axis
+    it is t(1 - t)/2 times the squared cell width times the second derivative of the
+    metric, estimated by divided differences at the surrounding grid points, which is
+    exact for surfaces that are quadratic along the axis (on any spacing).
+    Queries whose estimate exceeds steep_tol relative to the value, or whose cell
+    touches a non-finite value, are flagged as steep.
+
+    Parameters:
+    -----------
+    cube : core.result_cube.ResultCube
+        Sweep results
+    metric : str
+        Metric to interpolate
+    method : str, optional
+        'linear' (multilinear, the default) or 'pchip' (monotone cubic along each axis;
+        needs at least 4 values per axis)
+    log : bool, optional
+        Interpolate log(metric), for positive metrics spanning orders of magnitude
+        such as disparity_ratio
+    steep_tol : float, optional
+        Relative error estimate above which a query is flagged as steep
+    """
+    def __init__(self, cube, metric, method='linear', log=False, steep_tol=0.05):
+        if method not in INTERPOLATION_METHODS:
+            raise ValueError(f"method must be one of {INTERPOLATION_METHODS}, got {method!r}")
+        self.metric = metric
+        self.method = method
+        self.log = log
+        self.steep_tol = steep_tol
+        self.axes = {name: np.asarray(values, dtype=float) for name, values in cube.axes.items()}
+        self.constants = dict(cube.constants)
+        self.aliases = dict(cube.aliases)
+
+        values = np.asarray(cube[metric], dtype=float)
+        if log:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = np.log(values)
+
+        # Stack the metric with its absolute second derivatives along each axis (padded at
+        # the edges), so one gather fetches everything a query needs
+        layers = [values]
+        for axis, (n, axis_values) in enumerate(zip(values.shape, self.axes.values())):
+            if n < 3:
+                layers.append(np.zeros_like(values))
+                continue
+            spacing = np.diff(axis_values).reshape((-1,) + (1,) * (values.ndim - axis - 1))
+            slopes = np.diff(values, axis=axis) / spacing
+            curvature = np.abs(2 * np.diff(slopes, axis=axis) / (spacing[1:] + spacing[:-1]))
+            layers.append(np.concatenate([curvature.take([0], axis=axis), curvature,
+                                          curvature.take([-1], axis=axis)], axis=axis))
+        self._layers = np.stack(layers, axis=-1)
+
+        # Axis values padded into one table, so cells of every axis are looked up together
+        self._grid = np.full((len(self.axes), max(values.shape)), np.nan)
+        for k, axis_values in enumerate(self.axes.values()):
+            self._grid[k, :len(axis_values)] = axis_values
+        self._low = self._grid[:, 0]
+        self._high = np.array([axis_values[-1] for axis_values in self.axes.values()])
+        self._last_cell = np.array(values.shape) - 2
+        self._corners = np.array(list(itertools.product((0, 1), repeat=values.ndim)), dtype=np.intp)
+
+        self._cubic = None
+        if method == 'pchip':
+            self._cubic = RegularGridInterpolator(tuple(self.axes.values()), values, method='pchip')
+
+    @property
+    def dims(self):
+        return list(self.axes)
+
+    def __call__(self, **point):
+        """
+        Interpolates the metric at one point, given as keyword arguments.
+
+        Every axis of the cube (or an alias of it) must be given. Constant parameters
+        of the sweep may be given too, and must then equal the swept value.
+
+        Returns:
+        --------
+        Interpolation
+            (value, error, steep) as floats and a bool
+        """
+        result = self.query(**{name: [value] for name, value in point.items()})
+        return Interpolation(float(result.value[0]), float(result.error[0]), bool(result.steep[0]))
+
+    def query(self, **points):
+        """
+        Vectorized form of __call__: each keyword gives an array of coordinates and the
+        result holds arrays of values, error estimates and steep flags.
+
+        Raises:
+        -------
+        KeyError
+            If an axis is missing or a parameter is not part of the sweep
+        ValueError
+            If a point lies outside the grid or off a constant parameter
+        """
+        coords = self._coordinates(points)
+        outside = ((coords < self._low) | (coords > self._high)).any(axis=0)
+        if outside.any():
+            name = self.dims[int(np.argmax(outside))]
+            raise ValueError(f"{name} must lie within [{self.axes[name][0]}, {self.axes[name][-1]}]")
+        positions = np.stack([np.searchsorted(values, coords[:, k], side='right')
+                              for k, values in enumerate(self.axes.values())], axis=-1)
+        positions = np.minimum(np.maximum(positions - 1, 0), self._last_cell)
+        axis_index = np.arange(len(self.axes))
+        lower, upper = self._grid[axis_index, positions], self._grid[axis_index, positions + 1]
+        fractions = (coords - lower) / (upper - lower)
+
+        # Corner weights and stacked layers at the 2^d corners of each point's cell
+        corner_index = positions[None, :, :] + self._corners[:, None, :]
+        weights = np.prod(np.where(self._corners[:, None, :] == 1, fractions[None], 1 - fractions[None]), axis=-1)
+        layers = self._layers[tuple(corner_index[..., k] for k in range(corner_index.shape[-1]))]
+        finite = np.isfinite(layers[..., 0]).all(axis=0)
+        with np.errstate(invalid='ignore'):
+            interpolated = np.einsum('cm,cml->ml', weights, layers)
+        value = interpolated[:, 0]
+        error = np.sum(fractions * (1 - fractions) / 2 * (upper - lower) ** 2 * interpolated[:, 1:], axis=1)
+        if self._cubic is not None:
+            value = self._cubic(coords)
+
+        if self.log:
+            value, error = np.exp(value), np.exp(value) * np.expm1(error)
+        with np.errstate(invalid='ignore'):
+            steep = ~finite | ~np.isfinite(error) | (error > self.steep_tol * np.abs(value))
+        return Interpolation(value, error, steep)
+
+    def _coordinates(self, points):
+        """(n_points, n_axes) array of the query coordinates, after checking constants."""
+        by_axis = {}
+        for name, values in points.items():
+            axis = self.aliases.get(name, name)
+            if axis in self.axes:
+                by_axis[axis] = np.asarray(values, dtype=float)
+            elif name in self.constants:
+                constant = np.asarray([self.constants[name]])
+                if any(match_level(constant, value) is None for value in np.atleast_1d(values)):
+                    raise ValueError(f"{name} is fixed at {self.constants[name]} in the sweep")
+            else:
+                raise KeyError(f"{name} is not a parameter of the sweep")
+        missing = [name for name in self.axes if name not in by_axis]
+        if missing:
+            raise KeyError(f"missing coordinates for axes {missing}")
+        return np.stack(np.broadcast_arrays(*(by_axis[name] for name in self.axes)), axis=-1).reshape(-1, len(self.axes))
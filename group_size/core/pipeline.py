@@ -0,0 +1,236 @@
+import hashlib
+import inspect
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+Task = namedtuple('Task', ['name', 'func', 'deps', 'params', 'outputs', 'parallel'])
+
+
+class Pipeline:
+    """
+    The outputs of a driver as a graph of tasks, rerunning only the stale ones.
+
+    A task calls func with the results of the tasks it depends on and its own params.
+    Its key hashes the source of func, the params and the keys of its dependencies, so
+    a changed parameter or task function marks the task and everything downstream of
+    it stale. Changes to functions a task calls are not tracked; run with force=True
+    after editing those. Results are pickled in state_dir and loaded when a stale task
+    downstream needs them. Each task also records a digest of every dependency's result
+    it was computed from, so a dependency that reran with a different result (e.g. a
+    stochastic sweep whose result was deleted) makes it stale too. Staleness is decided
+    when a task's dependencies are done, and stale tasks marked parallel run in worker
+    processes as soon as that happens.
+
+    Parameters:
+    -----------
+    state_dir : str
+        Directory holding the key and result of every task
+    processes : int, optional
+        Number of worker processes for parallel tasks (defaults to at most 4); 1 runs
+        every task in this process
+    """
+    def __init__(self, state_dir, processes=None):
+        self.state_dir = state_dir
+        self.processes = processes
+        self.tasks = {}
+        self._keys = {}
+        self._records = {}
+        self._results = {}
+
+    def add(self, name, func, deps=None, params=None, outputs=(), parallel=False):
+        """
+        Adds a task computing func(**{arg: result of task}, **params).
+
+        Parameters:
+        -----------
+        name : str
+            Task name, also used for its files in state_dir
+        func : callable
+            Module-level function computing the task's result
+        deps : dict, optional
+            Argument name -> name of an earlier task whose result it receives
+        params : dict, optional
+            Further arguments (numbers, strings, arrays, functions or containers of them)
+        outputs : list of str, optional
+            Files the task writes; it is stale while any of them is missing
+        parallel : bool, optional
+            Run in a worker process, so func, its arguments and result must pickle
+
+        Returns:
+        --------
+        str
+            name, for use in the deps of later tasks
+        """
+        if name in self.tasks:
+            raise ValueError(f"duplicate task {name!r}")
+        deps = dict(deps or {})
+        unknown = [dep for dep in deps.values() if dep not in self.tasks]
+        if unknown:
+            raise KeyError(f"task {name!r} depends on unknown tasks {unknown}")
+        self.tasks[name] = Task(name, func, deps, dict(params or {}), list(outputs), parallel)
+        return name
+
+    def key(self, name):
+        """Hash of a task's function, params and dependency keys."""
+        if name not in self._keys:
+            task = self.tasks[name]
+            digest = hashlib.sha256()
+            _fingerprint((task.func, task.params, {arg: self.key(dep) for arg, dep in task.deps.items()}), digest)
+            self._keys[name] = digest.hexdigest()
+        return self._keys[name]
+
+    def is_stale(self, name):
+        """
+        Whether a task's recorded key, result or outputs are missing or out of date, or
+        a dependency's result differs from the one the task was computed from.
+        """
+        record = self._record(name)
+        if record is None or record.get('key') != self.key(name) or not os.path.exists(self._paths(name)[1]):
+            return True
+        for dep in set(self.tasks[name].deps.values()):
+            dep_record = self._record(dep)
+            if dep_record is None or record['deps'].get(dep) != dep_record['digest']:
+                return True
+        return not all(os.path.exists(path) for path in self.tasks[name].outputs)
+
+    def result(self, name):
+        """Result of a task, loaded from state_dir if it did not run in this process."""
+        if name not in self._results:
+            self._results[name] = pd.read_pickle(self._paths(name)[1])
+        return self._results[name]
+
+    def run(self, targets=None, force=False):
+        """
+        Runs the stale tasks needed for targets (default: every task).
+
+        Parameters:
+        -----------
+        targets : list of str, optional
+            Tasks whose results are wanted
+        force : bool, optional
+            Rerun every needed task
+
+        Returns:
+        --------
+        list of str
+            Names of the tasks that ran
+        """
+        needed = self._closure(targets if targets is not None else list(self.tasks))
+        # Tasks are added after their dependencies, so this order is topological
+        waiting = [name for name in self.tasks if name in needed]
+        running = {}
+        ran = []
+        processes = self.processes or min(4, os.cpu_count() or 1)
+        executor = None
+        try:
+            while waiting or running:
+                ran_here = False
+                for name in list(waiting):
+                    task = self.tasks[name]
+                    if any(dep in waiting or dep in running for dep in task.deps.values()):
+                        continue
+                    waiting.remove(name)
+                    # Decided only now, so that dependencies which just ran are taken into account
+                    if not (force or self.is_stale(name)):
+                        continue
+                    os.makedirs(self.state_dir, exist_ok=True)
+                    ran.append(name)
+                    kwargs = {arg: self.result(dep) for arg, dep in task.deps.items()}
+                    kwargs.update(task.params)
+                    print(f"Running task {name}...")
+                    if task.parallel and processes > 1:
+                        if executor is None:
+                            executor = ProcessPoolExecutor(max_workers=processes)
+                        running[name] = executor.submit(task.func, **kwargs)
+                    else:
+                        self._store(name, task.func(**kwargs))
+                        ran_here = True
+                if ran_here or not running:
+                    continue
+
+                # Nothing more can start until a parallel task finishes
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [name for name, future in running.items() if future in done]:
+                    self._store(name, running.pop(name).result())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        if not ran:
+            print("All outputs up to date")
+        return ran
+
+    def _store(self, name, result):
+        """Records a task's result, then its key and the digests of its result and inputs."""
+        key_path, result_path = self._paths(name)
+        self._results[name] = result
+        pd.to_pickle(result, result_path)
+        digest = hashlib.sha256()
+        with open(result_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        record = {
+            'key': self.key(name),
+            'digest': digest.hexdigest(),
+            'deps': {dep: self._record(dep)['digest'] for dep in set(self.tasks[name].deps.values())},
+        }
+        with open(key_path, 'w') as f:
+            json.dump(record, f, sort_keys=True)
+        self._records[name] = record
+
+    def _record(self, name):
+        """A task's recorded key and digests, or None if it has none (or an unreadable one)."""
+        if name not in self._records:
+            try:
+                with open(self._paths(name)[0]) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if not isinstance(record, dict) or not {'key', 'digest', 'deps'} <= set(record):
+                return None
+            self._records[name] = record
+        return self._records[name]
+
+    def _closure(self, targets):
+        """targets and every task they depend on, directly or not."""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.tasks[name].deps.values())
+        return needed
+
+    def _paths(self, name):
+        return (os.path.join(self.state_dir, f"{name}.key"),
+                os.path.join(self.state_dir, f"{name}.pkl"))
+
+
+def _fingerprint(value, digest):
+    """Feeds a deterministic description of value into digest."""
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(f"array:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}:".encode())
+        # Sorted, so dicts built in a different order hash alike
+        for item_key, item in sorted(value.items(), key=lambda item: repr(item[0])):
+            _fingerprint(item_key, digest)
+            _fingerprint(item, digest)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        digest.update(f"{type(value).__name__}:{len(value)}:".encode())
+        for item in value:
+            _fingerprint(item, digest)
+    elif callable(value):
+        digest.update(f"function:{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', '')}:".encode())
+        try:
+            digest.update(inspect.getsource(value).encode())
+        except (OSError, TypeError):
+            pass
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
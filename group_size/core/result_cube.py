@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from core.result_table import match_level
+
+
+class ResultCube:
+    """
+    Factorial simulation results as dense arrays over named parameter axes.
+
+    Every metric is an array of shape (len(axis_1), len(axis_2), ...), so a parameter
+    combination is an index rather than a row, and slicing or reducing over a parameter
+    is an array operation. Columns that never vary are kept once as constants, columns
+    that repeat an axis (such as p and prop_disadv) as aliases, and string or
+    categorical metrics as integer codes into their categories.
+
+    Parameters:
+    -----------
+    axes : dict
+        Axis name -> 1-D array of its sorted parameter values, in axis order
+    metrics : dict
+        Metric name -> array with one dimension per axis
+    constants : dict, optional
+        Column name -> value shared by every row
+    aliases : dict, optional
+        Column name -> name of the axis it duplicates
+    categories : dict, optional
+        Metric name -> category labels, for metrics stored as codes
+    columns : list of str, optional
+        Column order used by to_frame (defaults to axes, aliases, constants, metrics)
+    """
+    def __init__(self, axes, metrics, constants=None, aliases=None, categories=None, columns=None):
+        self.axes = {name: np.asarray(values) for name, values in axes.items()}
+        self.metrics = dict(metrics)
+        self.constants = dict(constants or {})
+        self.aliases = dict(aliases or {})
+        self.categories = dict(categories or {})
+        self.columns = list(columns) if columns is not None else (
+            list(self.axes) + list(self.aliases) + list(self.constants) + list(self.metrics))
+
+        for name, values in self.metrics.items():
+            if values.shape != self.shape:
+                raise ValueError(f"metric {name!r} has shape {values.shape}, expected {self.shape}")
+        for name, axis in self.aliases.items():
+            if axis not in self.axes:
+                raise ValueError(f"alias {name!r} refers to unknown axis {axis!r}")
+
+    @property
+    def dims(self):
+        return list(self.axes)
+
+    @property
+    def shape(self):
+        return tuple(len(values) for values in self.axes.values())
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.metrics.values()) + \
+            sum(values.nbytes for values in self.axes.values())
+
+    def __getitem__(self, name):
+        """Array of a metric, or the values of an axis (or its alias)."""
+        if name in self.metrics:
+            return self.metrics[name]
+        return self.axes[self.aliases.get(name, name)]
+
+    @classmethod
+    def from_frame(cls, df, axes):
+        """
+        Builds a cube from a long results table holding one row per combination of axes.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Results, e.g. from run_factorial_simulation
+        axes : list of str
+            Parameter columns spanning the grid (e.g. the keys of the param_dict).
+            Parameters with a single value become constants rather than axes.
+
+        Returns:
+        --------
+        ResultCube
+
+        Raises:
+        -------
+        ValueError
+            If the rows do not cover every combination of axis values exactly once
+        """
+        axes = [name for name in axes if df[name].nunique(dropna=False) > 1]
+        levels = {}
+        codes = []
+        for name in axes:
+            levels[name], axis_codes = np.unique(df[name].to_numpy(), return_inverse=True)
+            codes.append(axis_codes)
+        shape = tuple(len(values) for values in levels.values())
+
+        flat = np.ravel_multi_index(codes, shape) if axes else np.zeros(len(df), dtype=np.intp)
+        if len(df) != int(np.prod(shape)) or np.bincount(flat, minlength=len(df)).max(initial=0) > 1:
+            raise ValueError(f"rows do not form a dense grid over {axes}: {len(df)} rows for shape {shape}")
+
+        constants, aliases, metrics, categories = {}, {}, {}, {}
+        for name in df.columns:
+            if name in levels:
+                continue
+            column = df[name]
+            if column.nunique(dropna=False) <= 1 and len(column):
+                constants[name] = column.to_numpy()[0]
+                continue
+            alias = next((axis for axis in axes if column.dtype == df[axis].dtype and column.equals(df[axis])), None)
+            if alias is not None:
+                aliases[name] = alias
+                continue
+            if column.dtype == object or isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+                categorical = pd.Categorical(column)
+                categories[name] = list(categorical.categories)
+                values = categorical.codes
+            else:
+                values = column.to_numpy()
+            dense = np.empty(len(df), dtype=values.dtype)
+            dense[flat] = values
+            metrics[name] = dense.reshape(shape)
+
+        return cls(levels, metrics, constants=constants, aliases=aliases, categories=categories,
+                   columns=df.columns)
+
+    def to_frame(self):
+        """
+        Long results table with one row per grid point, in C order over the axes.
+        """
+        grids = np.meshgrid(*self.axes.values(), indexing='ij') if self.axes else []
+        axis_columns = {name: grid.ravel() for name, grid in zip(self.axes, grids)}
+        n_rows = int(np.prod(self.shape))
+
+        data = {}
+        for name in self.columns:
+            if name in axis_columns:
+                data[name] = axis_columns[name]
+            elif name in self.aliases:
+                data[name] = axis_columns[self.aliases[name]]
+            elif name in self.constants:
+                data[name] = np.full(n_rows, self.constants[name])
+            elif name in self.categories:
+                data[name] = pd.Categorical.from_codes(self.metrics[name].ravel(), categories=self.categories[name])
+            else:
+                data[name] = self.metrics[name].ravel()
+        return pd.DataFrame(data)
+
+    def sel(self, rtol=1e-9, atol=1e-12, **coords):
+        """
+        Sub-cube at the given axis values.
+
+        A single value drops its axis (the value becomes a constant); a list keeps the
+        axis with just those values. Values match within rtol/atol.
+        """
+        index = []
+        axes = {}
+        constants = dict(self.constants)
+        aliases = dict(self.aliases)
+        for name, values in self.axes.items():
+            if name not in coords:
+                index.append(slice(None))
+                axes[name] = values
+                continue
+            wanted = coords[name]
+            scalar = not pd.api.types.is_list_like(wanted)
+            positions = [self._position(name, value, rtol, atol) for value in ([wanted] if scalar else wanted)]
+            if scalar:
+                index.append(positions[0])
+                constants[name] = values[positions[0]]
+                for alias, axis in self.aliases.items():
+                    if axis == name:
+                        constants[alias] = values[positions[0]]
+                        del aliases[alias]
+            else:
+                index.append(positions)
+                axes[name] = values[positions]
+        unknown = set(coords) - set(self.axes)
+        if unknown:
+            raise KeyError(f"no axes {sorted(unknown)}; axes are {self.dims}")
+
+        # Index one axis at a time so lists on several axes select their product
+        metrics = {}
+        for metric, values in self.metrics.items():
+            for axis in reversed(range(len(index))):
+                values = values[(slice(None),) * axis + (index[axis],)]
+            metrics[metric] = values
+        return ResultCube(axes, metrics, constants=constants, aliases=aliases, categories=self.categories,
+                          columns=self.columns)
+
+    def reduce(self, func, dims, metrics=None):
+        """
+        Applies func (e.g. np.mean or np.nanmax, called with an axis tuple) over dims.
+
+        Parameters:
+        -----------
+        func : callable
+            Reduction taking an array and axis=tuple of ints
+        dims : list of str
+            Axes to reduce over; they are dropped from the result
+        metrics : list of str, optional
+            Metrics to reduce (defaults to every non-categorical metric)
+
+        Returns:
+        --------
+        ResultCube
+        """
+        if isinstance(dims, str):
+            dims = [dims]
+        unknown = set(dims) - set(self.axes)
+        if unknown:
+            raise KeyError(f"no axes {sorted(unknown)}; axes are {self.dims}")
+        if metrics is None:
+            metrics = [name for name in self.metrics if name not in self.categories]
+        elif set(metrics) & set(self.categories):
+            raise ValueError(f"cannot reduce categorical metrics {sorted(set(metrics) & set(self.categories))}")
+
+        axis = tuple(self.dims.index(name) for name in dims)
+        axes = {name: values for name, values in self.axes.items() if name not in dims}
+        aliases = {name: target for name, target in self.aliases.items() if target not in dims}
+        reduced = {name: np.asarray(func(self.metrics[name], axis=axis)) for name in metrics}
+        columns = [name for name in self.columns
+                   if name in axes or name in aliases or name in self.constants or name in reduced]
+        return ResultCube(axes, reduced, constants=self.constants, aliases=aliases, columns=columns)
+
+    def _position(self, name, value, rtol, atol):
+        position = match_level(self.axes[name], value, rtol, atol)
+        if position is None:
+            raise KeyError(f"{name}={value!r} is not on the grid")
+        return position
@@ -0,0 +1,225 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_list_like, is_numeric_dtype
+
+
+class ResultTable:
+    """
+    Simulation results indexed by their parameter columns for slicing.
+
+    Rows are indexed in lexicographic order of keys, so every value of the first key
+    (and every combination of values of a leading run of keys) occupies one contiguous
+    range, found by binary search and returned as a view when data is sorted by keys.
+    For the other keys each value's rows are kept in an inverted index, so any subset
+    of keys can be selected without scanning the table. Numeric keys match within rtol/atol of the stored
+    values, so parameters written by np.linspace or rounded floats select cleanly.
+
+    The table refers to data rather than copying it, so selections always return the
+    current values of its columns; only the key columns are indexed, and changing them
+    (or the rows) requires a new table. When data is not sorted by keys, selections
+    are taken through the sort order and are therefore copies.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame
+        Simulation results, held by weak reference (the caller keeps them alive)
+    keys : list of str
+        Parameter columns to index, in sort order
+    rtol, atol : float, optional
+        Tolerances for matching numeric key values
+    """
+    def __init__(self, data, keys, rtol=1e-9, atol=1e-12):
+        self.keys = list(keys)
+        self.rtol = rtol
+        self.atol = atol
+
+        self._levels = {}
+        codes = {}
+        for key in self.keys:
+            codes[key], self._levels[key] = _factorize_sorted(data[key])
+
+        # Weak, so a shared table does not keep the caller's DataFrame alive
+        self._data = weakref.ref(data)
+        order = np.lexsort([codes[key] for key in reversed(self.keys)])
+        if np.array_equal(order, np.arange(len(order))):
+            self._order = None
+        else:
+            self._order = order
+            codes = {key: key_codes[order] for key, key_codes in codes.items()}
+        self._codes = codes
+
+        # Inverted index: rows of level i of key are _rows[key][_bounds[key][i]:_bounds[key][i + 1]],
+        # in ascending row order
+        self._rows = {}
+        self._bounds = {}
+        for key in self.keys:
+            self._rows[key] = np.argsort(codes[key], kind='stable')
+            self._bounds[key] = np.searchsorted(codes[key][self._rows[key]], np.arange(len(self._levels[key]) + 1))
+
+    @property
+    def data(self):
+        return self._data()
+
+    def __len__(self):
+        return len(self.data)
+
+    def levels(self, key):
+        """Sorted distinct values of key."""
+        return self._levels[key]
+
+    def level_code(self, key, value):
+        """
+        Position of value among levels(key), matching numeric keys within tolerance.
+        Returns None if the table holds no such value.
+        """
+        return match_level(self._levels[key], value, self.rtol, self.atol)
+
+    def positions(self, **criteria):
+        """
+        Positions in key order of the rows matching criteria, in ascending order
+        (row positions in data when data is sorted by keys).
+
+        Each keyword names a key and gives either one value or a list of values.
+        """
+        unknown = set(criteria) - set(self.keys)
+        if unknown:
+            raise KeyError(f"not indexed by {sorted(unknown)}; keys are {self.keys}")
+
+        codes = {}
+        for key, value in criteria.items():
+            values = value if is_list_like(value) else [value]
+            matched = [code for code in (self.level_code(key, v) for v in values) if code is not None]
+            if not matched:
+                return np.empty(0, dtype=np.intp)
+            codes[key] = sorted(set(matched))
+
+        # Narrow to a contiguous range through the leading keys fixed to a single value
+        start, stop = 0, len(self.data)
+        remaining = dict(codes)
+        for key in self.keys:
+            if len(remaining.get(key, ())) != 1:
+                break
+            code = remaining.pop(key)[0]
+            key_codes = self._codes[key][start:stop]
+            start, stop = (start + np.searchsorted(key_codes, code, side='left'),
+                           start + np.searchsorted(key_codes, code, side='right'))
+
+        positions = None
+        for key, key_codes in remaining.items():
+            rows, bounds = self._rows[key], self._bounds[key]
+            matched = np.concatenate([_clip(rows[bounds[c]:bounds[c + 1]], start, stop) for c in key_codes])
+            if len(key_codes) > 1:
+                matched.sort()
+            positions = matched if positions is None else np.intersect1d(positions, matched, assume_unique=True)
+        if positions is None:
+            return np.arange(start, stop)
+        return positions
+
+    def select(self, **criteria):
+        """
+        Rows matching criteria (see positions), in key order.
+
+        When data is sorted by keys and the match is a contiguous row range (e.g. a
+        value of the first key) the result is a slice of data rather than a copy and
+        must not be modified.
+        """
+        positions = self.positions(**criteria)
+        if self._order is not None:
+            return self.data.iloc[self._order[positions]]
+        if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+            return self.data.iloc[positions[0]:positions[-1] + 1]
+        return self.data.iloc[positions]
+
+    def groups(self, key):
+        """
+        Iterate over (value, rows) for every level of key, in sorted order.
+        """
+        for value in self._levels[key]:
+            yield value, self.select(**{key: value})
+
+
+def match_level(levels, value, rtol=1e-9, atol=1e-12):
+    """
+    Position of value in the sorted array levels, or None if it is not there.
+    Numeric values match the nearest level within atol + rtol * abs(value).
+    """
+    if not is_numeric_dtype(levels.dtype) or isinstance(value, str):
+        i = np.searchsorted(levels, value)
+        return int(i) if i < len(levels) and levels[i] == value else None
+
+    value = float(value)
+    i = int(np.searchsorted(levels, value))
+    candidates = [j for j in (i - 1, i) if 0 <= j < len(levels)]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda j: abs(levels[j] - value))
+    if abs(levels[best] - value) <= atol + rtol * abs(value):
+        return best
+    return None
+
+
+def _factorize_sorted(column):
+    """Codes of column into its sorted distinct values, and those values."""
+    values = column.to_numpy()
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        values = np.asarray(column.astype(object))
+    levels, codes = np.unique(values, return_inverse=True)
+    return codes.astype(np.intp), levels
+
+
+def _clip(rows, start, stop):
+    """The entries of the ascending array rows within [start, stop)."""
+    return rows[np.searchsorted(rows, start, side='left'):np.searchsorted(rows, stop, side='left')]
+
+
+_tables = {}
+_versions = {}
+_tables_lock = threading.Lock()
+
+
+def invalidate(data):
+    """
+    Marks a results DataFrame as modified in place (key values or rows), so the tables
+    and correlations shared for it are rebuilt on their next use.
+    """
+    key = id(data)
+    with _tables_lock:
+        if key not in _versions:
+            weakref.finalize(data, _versions.pop, key, None)
+        _versions[key] = _versions.get(key, 0) + 1
+
+
+def data_version(data):
+    """
+    Cheap marker of a results DataFrame's state: its length and the number of times it
+    was invalidated. Shared caches compare it instead of hashing the data.
+    """
+    return len(data), _versions.get(id(data), 0)
+
+
+def result_table(data, keys):
+    """
+    The ResultTable of a results DataFrame for keys, built on first use and shared by
+    every caller passing the same object. Keys missing from data are left out.
+
+    The shared table is rebuilt when the length of data changes or after
+    invalidate(data); call that after changing key values in place. New values of
+    other columns are served without a rebuild.
+    """
+    keys = tuple(key for key in keys if key in data.columns)
+    cache_key = (id(data), keys)
+    version = data_version(data)
+    with _tables_lock:
+        entry = _tables.get(cache_key)
+        if entry is not None and entry[0]() is data and entry[1] == version:
+            return entry[2]
+
+    table = ResultTable(data, keys)
+    with _tables_lock:
+        if cache_key not in _tables:
+            weakref.finalize(data, _tables.pop, cache_key, None)
+        _tables[cache_key] = (weakref.ref(data), version, table)
+    return table
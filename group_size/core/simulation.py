@@ -1,10 +1,48 @@
+import inspect
+import itertools
+
 import numpy as np
 import pandas as pd
 from typing import Callable, Dict
 from multiprocessing import Pool, cpu_count
 from functools import partial
 
-from core.disparity_measures import calculate_disparity_measures
+from core.disparity_measures import calculate_disparity_measures, calculate_disparity_measures_array
+
+def joint_rate_model(rate_function: Callable) -> Callable:
+    """
+    Mark a rate function that computes both groups' rates in one call.
+    
+    A joint rate function is called once per parameter combination, without a group
+    argument, and returns a dict with 'rate_disadv' and 'rate_adv'. Any other entries
+    (e.g. diagnostics such as a realized sample size) become extra result columns.
+    """
+    rate_function.joint_rates = True
+    return rate_function
+
+def evaluate_group_rates(rate_function, param_dict, **kwargs):
+    """
+    Evaluate a rate function for both groups.
+    
+    A per-group function with a seed parameter is called for both groups with the
+    same seed (a fresh one unless a seed is given), so that both rates, and with
+    replicates every pair of per-replicate rates, come from the same population draw.
+    
+    Returns:
+    --------
+    tuple
+        (rate_disadv, rate_adv, extra_columns)
+    """
+    if getattr(rate_function, 'joint_rates', False):
+        rates = dict(rate_function(**param_dict, **kwargs))
+        return rates.pop('rate_disadv'), rates.pop('rate_adv'), rates
+    
+    params = {**param_dict, **kwargs}
+    if params.get('seed') is None and 'seed' in inspect.signature(rate_function).parameters:
+        params['seed'] = np.random.SeedSequence().entropy
+    rate_disadv = rate_function(group='disadvantaged', **params)
+    rate_adv = rate_function(group='advantaged', **params)
+    return rate_disadv, rate_adv, {}
 
 def process_param_combination(params, param_names, rate_function):
     # Create parameter dictionary for this combination
@@ -13,8 +51,7 @@ def process_param_combination(params, param_names, rate_function):
     p = param_dict['p']  # Extract population proportion
     
     # Calculate rates for both groups
-    rate_disadv = rate_function(group='disadvantaged', **param_dict)
-    rate_adv = rate_function(group='advantaged', **param_dict)
+    rate_disadv, rate_adv, extras = evaluate_group_rates(rate_function, param_dict)
     
     # Calculate population average
     pop_avg = p * rate_disadv + (1 - p) * rate_adv
@@ -29,31 +66,228 @@ def process_param_combination(params, param_names, rate_function):
         "pop_avg": int(round(pop_avg)),
         "rate_adv": rate_adv,
         "rate_disadv": rate_disadv,
-        **disparities
+        **disparities,
+        **extras
+    }
+    return result
+
+def summarize_replicates(draws: Dict[str, np.ndarray], interval: float = 95) -> dict:
+    """
+    Summarize per-replicate values by their mean, standard error and percentile interval.
+    
+    Parameters:
+    -----------
+    draws : dict
+        Mapping of measure name to an array with one value per replicate
+    interval : float
+        Width of the central percentile interval, in percent
+        
+    Returns:
+    --------
+    dict
+        '<name>' (mean) for every measure, followed by '<name>_se', '<name>_ci_lower'
+        and '<name>_ci_upper'
+    """
+    lower_pct = (100 - interval) / 2
+    summary = {name: np.mean(values) for name, values in draws.items()}
+    with np.errstate(invalid='ignore'):
+        for name, values in draws.items():
+            summary[f'{name}_se'] = np.std(values, ddof=1) / np.sqrt(len(values)) if len(values) > 1 else np.nan
+            summary[f'{name}_ci_lower'], summary[f'{name}_ci_upper'] = np.percentile(values, [lower_pct, 100 - lower_pct])
+    return summary
+
+def process_replicate_combination(params, param_names, rate_function, replicates, interval=95):
+    """
+    Evaluate one parameter combination for several independent replicates at once.
+    
+    The rate function receives replicates=<R> and may return an array of R rates
+    (Monte Carlo models) or a single rate (deterministic models, broadcast to all replicates).
+    Both groups' rates of a replicate come from one population draw: joint models
+    draw it once, and per-group models share a seed (see evaluate_group_rates).
+    """
+    param_dict = dict(zip(param_names, params))
+    
+    p = param_dict['p']
+    
+    # Calculate per-replicate rates for both groups
+    rate_disadv, rate_adv, extras = evaluate_group_rates(rate_function, param_dict, replicates=replicates)
+    rate_disadv = np.broadcast_to(np.asarray(rate_disadv, dtype=float), (replicates,))
+    rate_adv = np.broadcast_to(np.asarray(rate_adv, dtype=float), (replicates,))
+    
+    pop_avg = p * rate_disadv + (1 - p) * rate_adv
+    disparities = calculate_disparity_measures_array(rate_disadv=rate_disadv, rate_adv=rate_adv, p=p)
+    
+    result = {
+        'prop_disadv': p,
+        **param_dict,
+        'replicates': replicates,
+        "pop_avg": int(round(np.mean(pop_avg))),
+        **summarize_replicates({'rate_adv': rate_adv, 'rate_disadv': rate_disadv, **disparities}, interval),
+        **extras
     }
     return result
 
+def declare_scale_invariance(scale_param: str, co_scaled: tuple = (), when: dict = None) -> Callable:
+    """
+    Declare that a rate function is homogeneous of degree one in a scale parameter.
+    
+    The declaration states that scaling scale_param and every co_scaled parameter by
+    the same factor scales both group rates by that factor, so disparity ratios and the
+    normalized disparity index depend on the co_scaled parameters only through their
+    ratio to scale_param. run_factorial_simulation(reduce_invariances=True) uses this to
+    evaluate the model only on the reduced, dimensionless grid.
+    
+    Parameters:
+    -----------
+    scale_param : str
+        Parameter the rates are proportional to (e.g. 'avg_rate')
+    co_scaled : tuple
+        Parameters that must be scaled together with scale_param (e.g. a floor rate)
+    when : dict, optional
+        Parameter values under which the invariance holds (e.g. {'normalized': True});
+        other combinations are evaluated directly
+    """
+    def decorator(rate_function):
+        rate_function.scale_invariance = {
+            'scale_param': scale_param,
+            'co_scaled': tuple(co_scaled),
+            'when': dict(when or {}),
+        }
+        return rate_function
+    return decorator
+
+def param_combinations(param_dict: Dict[str, np.ndarray]):
+    """
+    Lazily generate the parameter combinations of a factorial sweep, with the last
+    parameter varying fastest (the row order of run_factorial_simulation).
+    """
+    # Arrays, so values come out as the same numpy scalars for every way of sweeping
+    values = [np.asarray(param_values) for param_values in param_dict.values()]
+    return itertools.product(*values)
+
+def combination_processor(rate_function, param_names, replicates=1, interval=95) -> Callable:
+    """
+    Picklable function evaluating one parameter combination (a tuple ordered like
+    param_names) into a result row: process_replicate_combination with replicates > 1,
+    process_param_combination otherwise.
+    """
+    if replicates > 1:
+        return partial(process_replicate_combination, param_names=param_names, rate_function=rate_function,
+                       replicates=replicates, interval=interval)
+    return partial(process_param_combination, param_names=param_names, rate_function=rate_function)
+
+def evaluate_param_combinations(rate_function, param_names, all_params, replicates=1, interval=95) -> pd.DataFrame:
+    """
+    Evaluate a list of parameter combinations in parallel and collect the results.
+    """
+    process_func = combination_processor(rate_function, param_names, replicates, interval)
+    
+    # Run in parallel using all available cores
+    with Pool(processes=cpu_count()) as pool:
+        results = pool.map(process_func, all_params)
+    
+    return pd.DataFrame(results)
+
+def rescale_results(results: pd.DataFrame, factor: np.ndarray) -> pd.DataFrame:
+    """
+    Scale both group rates of a result table by factor and recompute the population
+    average and all disparity measures from the scaled rates.
+    """
+    results = results.copy()
+    results['rate_adv'] = results['rate_adv'].to_numpy(dtype=float) * factor
+    results['rate_disadv'] = results['rate_disadv'].to_numpy(dtype=float) * factor
+    
+    p = results['prop_disadv'].to_numpy(dtype=float)
+    pop_avg = np.round(p * results['rate_disadv'] + (1 - p) * results['rate_adv']).to_numpy()
+    results['pop_avg'] = pop_avg.astype(int) if np.isfinite(pop_avg).all() else pop_avg
+    disparities = calculate_disparity_measures_array(
+        rate_disadv=results['rate_disadv'].to_numpy(), rate_adv=results['rate_adv'].to_numpy(), p=p)
+    for name, measure in disparities.items():
+        results[name] = measure
+    return results
+
+def run_scale_reduced_simulation(rate_function, param_names, all_params) -> pd.DataFrame:
+    """
+    Evaluate parameter combinations on the reduced grid implied by the rate function's
+    declared scale invariance, then rebuild every requested row by scaling.
+    
+    Combinations are mapped to the dimensionless point with scale_param = 1 and each
+    co_scaled parameter divided by scale_param. Each distinct dimensionless point is
+    evaluated once. Combinations the invariance does not cover (condition not met,
+    or a zero or non-numeric scale) are evaluated directly. Extra result columns are
+    copied unchanged and must therefore be scale-free.
+    """
+    invariance = rate_function.scale_invariance
+    scale_param = invariance['scale_param']
+    co_scaled = [name for name in invariance['co_scaled'] if name in param_names]
+    grid = pd.DataFrame(all_params, columns=param_names)
+    
+    if scale_param not in param_names:
+        return evaluate_param_combinations(rate_function, param_names, all_params)
+    
+    scale = pd.to_numeric(grid[scale_param], errors='coerce')
+    reducible = scale.notna() & np.isfinite(scale) & (scale != 0)
+    for name in co_scaled:
+        reducible &= pd.to_numeric(grid[name], errors='coerce').notna()
+    for name, value in invariance['when'].items():
+        reducible &= (grid[name] == value) if name in param_names else False
+    
+    # Map reducible combinations to the dimensionless grid
+    reduced = grid[reducible].copy()
+    factor = scale[reducible].to_numpy(dtype=float)
+    for name in co_scaled:
+        reduced[name] = reduced[name].to_numpy(dtype=float) / factor
+    reduced[scale_param] = 1.0
+    unique_reduced = reduced.drop_duplicates()
+    
+    reduced_results = evaluate_param_combinations(
+        rate_function, param_names, list(unique_reduced.itertuples(index=False, name=None)))
+    columns = reduced_results.columns
+    
+    # Rebuild the full rows by scaling, restoring the requested parameter values
+    rebuilt = reduced.merge(reduced_results, on=param_names, how='left')
+    rebuilt.index = reduced.index
+    rebuilt[param_names] = grid.loc[reducible, param_names]
+    rebuilt = rescale_results(rebuilt, factor)
+    
+    parts = [rebuilt[columns]]
+    if (~reducible).any():
+        direct = evaluate_param_combinations(
+            rate_function, param_names, list(grid[~reducible].itertuples(index=False, name=None)))
+        direct.index = grid.index[~reducible]
+        parts.append(direct)
+    
+    return pd.concat(parts).sort_index()
+
 def run_factorial_simulation(
     rate_function: Callable,
-    param_dict: Dict[str, np.ndarray]
+    param_dict: Dict[str, np.ndarray],
+    replicates: int = 1,
+    interval: float = 95,
+    reduce_invariances: bool = False
 ) -> pd.DataFrame:
     """
     Run a factorial simulation for any incarceration rate model in parallel.
+    
+    The rate function is called once per group, or once per combination if it is
+    marked with joint_rate_model.
+    
+    With replicates > 1 every parameter combination is evaluated for that many
+    independent Monte Carlo draws in a single vectorized call, and the table holds
+    the replicate mean of each rate and disparity measure together with its standard
+    error and central percentile interval (see summarize_replicates).
+    
+    With reduce_invariances=True and a rate function carrying declare_scale_invariance,
+    only the reduced dimensionless grid is evaluated (see run_scale_reduced_simulation).
     """
     # Create all parameter combinations
     param_names = list(param_dict.keys())
-    param_values = list(param_dict.values())
-    param_combinations = np.meshgrid(*param_values, indexing='ij')
-    param_combinations = [x.flatten() for x in param_combinations]
-    
-    # Create a list of parameter combinations
-    all_params = list(zip(*param_combinations))
+    all_params = list(param_combinations(param_dict))
     
-    # Create a partial function with fixed parameters
-    process_func = partial(process_param_combination, param_names=param_names, rate_function=rate_function)
-    
-    # Run in parallel using all available cores
-    with Pool(processes=cpu_count()) as pool:
-        results = pool.map(process_func, all_params)
+    if reduce_invariances and getattr(rate_function, 'scale_invariance', None) is not None:
+        if replicates > 1:
+            raise ValueError("reduce_invariances cannot be combined with replicates; "
+                             "replicate summaries are not all scale-equivariant")
+        return run_scale_reduced_simulation(rate_function, param_names, all_params)
     
-    return pd.DataFrame(results)
\ No newline at end of file
+    return evaluate_param_combinations(rate_function, param_names, all_params, replicates, interval)
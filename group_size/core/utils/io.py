@@ -1,4 +1,18 @@
+import hashlib
+import json
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from core.result_cube import ResultCube
+
+FIGURE_HASHES_FILENAME = '.figure_hashes.json'
+
 
 def save_figure(fig, filename_base: str, output_dir: str, html=False):
     """
@@ -13,7 +27,98 @@ def save_figure(fig, filename_base: str, output_dir: str, html=False):
     output_dir : str
         Directory to save the figure
     """
+    save_figures({filename_base: fig}, output_dir, html=html, processes=1, skip_unchanged=False)
+
+def save_figures(figures, output_dir: str, html=False, processes=None, skip_unchanged=True):
+    """
+    Save several plotly figures as PNG (and HTML), rendering them concurrently.
+    
+    Each figure is identified by a hash of its JSON spec, recorded per output file in
+    FIGURE_HASHES_FILENAME in output_dir. With skip_unchanged, a figure whose files
+    exist and were written from an identical spec is not rendered again. Figures are
+    rendered in a pool of worker processes, each starting its image renderer once.
+    
+    Parameters:
+    -----------
+    figures : dict
+        Base filename (without extension) -> plotly.graph_objects.Figure
+    output_dir : str
+        Directory to save the figures
+    html : bool, optional
+        Also save every figure as HTML
+    processes : int, optional
+        Number of worker processes (defaults to at most 4); 1 renders in this process
+    skip_unchanged : bool, optional
+        Skip figures whose saved files match their spec
+    
+    Returns:
+    --------
+    list of str
+        Base filenames of the figures that were rendered
+    """
     os.makedirs(output_dir, exist_ok=True)
+    hashes_path = os.path.join(output_dir, FIGURE_HASHES_FILENAME)
+    recorded = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as f:
+            recorded = json.load(f)
+    
+    extensions = ['png'] + (['html'] if html else [])
+    pending = {}
+    for filename_base, fig in figures.items():
+        spec = fig.to_json()
+        # Key order depends on how the figure was built (e.g. it changes when unpickled)
+        canonical = json.dumps(json.loads(spec), sort_keys=True)
+        spec_hash = hashlib.sha256(canonical.encode()).hexdigest()
+        filenames = [f"{filename_base}.{extension}" for extension in extensions]
+        if skip_unchanged and all(recorded.get(filename) == spec_hash and
+                                  os.path.exists(os.path.join(output_dir, filename)) for filename in filenames):
+            print(f"Figure unchanged, skipped: {os.path.join(output_dir, filename_base)}")
+            continue
+        pending[filename_base] = (spec, spec_hash, filenames)
+    
+    processes = min(processes or min(4, os.cpu_count() or 1), len(pending))
+    errors = []
+    
+    def record(filename_base, error=None):
+        _, spec_hash, filenames = pending[filename_base]
+        for filename in filenames:
+            if error is None:
+                recorded[filename] = spec_hash
+            else:
+                # A failed render may have left a partial file behind
+                recorded.pop(filename, None)
+                errors.append(error)
+    
+    if processes <= 1:
+        for filename_base in pending:
+            try:
+                _render_figure(pending[filename_base][0], filename_base, output_dir, html)
+            except Exception as error:
+                record(filename_base, error)
+            else:
+                record(filename_base)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_warm_renderer) as executor:
+            futures = {executor.submit(_render_figure, spec, filename_base, output_dir, html): filename_base
+                       for filename_base, (spec, _, _) in pending.items()}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as error:
+                    record(futures[future], error)
+                else:
+                    record(futures[future])
+    
+    with open(hashes_path, 'w') as f:
+        json.dump(recorded, f, indent=1, sort_keys=True)
+    if errors:
+        raise errors[0]
+    return list(pending)
+
+def _render_figure(spec, filename_base, output_dir, html):
+    """Writes one figure, given as its JSON spec, as PNG (and HTML)."""
+    fig = pio.from_json(spec)
     if html:
         # Save as HTML
         html_path = os.path.join(output_dir, f"{filename_base}.html")
@@ -25,6 +130,14 @@ def save_figure(fig, filename_base: str, output_dir: str, html=False):
     fig.write_image(png_path)
     print(f"Figure saved as PNG: {png_path}")
 
+def _warm_renderer():
+    """Starts the image renderer of a worker process before its first figure."""
+    try:
+        pio.to_image(go.Figure(), format='png')
+    except Exception:
+        # Rendering errors are reported for the actual figures
+        pass
+
 def save_simulation_data(df, filename: str, output_dir: str):
     """
     Save simulation data to CSV.
@@ -37,10 +150,250 @@ def save_simulation_data(df, filename: str, output_dir: str):
         Filename for the CSV file
     output_dir : str
         Directory to save the data
+    
+    Returns:
+    --------
+    str
+        Path of the CSV file
     """
     os.makedirs(output_dir, exist_ok=True)
     
     # Save as CSV
     csv_path = os.path.join(output_dir, filename)
     df.to_csv(csv_path, index=False)
-    print(f"Data saved as CSV: {csv_path}")
\ No newline at end of file
+    print(f"Data saved as CSV: {csv_path}")
+    return csv_path
+
+def link_artifact(path: str, output_dir: str):
+    """
+    Make a saved file available in another directory without writing it again.
+    
+    The file is hard-linked into output_dir, falling back to a symbolic link and then
+    to a copy where links are not supported. Nothing is done when output_dir already
+    holds this very file.
+    
+    Parameters:
+    -----------
+    path : str
+        Path of the saved file
+    output_dir : str
+        Directory to make it available in
+    
+    Returns:
+    --------
+    str
+        Path of the file in output_dir
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    link_path = os.path.join(output_dir, os.path.basename(path))
+    if os.path.exists(link_path):
+        if os.path.samefile(path, link_path):
+            return link_path
+        os.remove(link_path)
+    try:
+        os.link(path, link_path)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(path), link_path)
+        except OSError:
+            shutil.copy2(path, link_path)
+    print(f"Data linked: {link_path}")
+    return link_path
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def save_data_bundle(df, bundle_name: str, output_dir: str, partition_by=None, source_path=None):
+    """
+    Save a dataframe as a column-per-file binary bundle that can be memory-mapped.
+
+    Each column is written as a .npy file; string columns are stored as categorical
+    codes. Rows are sorted by partition_by (if given) so every value of that column
+    occupies one contiguous row range, recorded in manifest.json.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        The dataframe to save
+    bundle_name : str
+        Name of the bundle directory
+    output_dir : str
+        Directory to save the bundle in
+    partition_by : str, optional
+        Column whose values define contiguous row partitions
+    source_path : str, optional
+        File the bundle was built from; its size and modification time are recorded
+        so stale bundles can be detected
+
+    Returns:
+    --------
+    str
+        Path of the bundle directory
+    """
+    bundle_dir = os.path.join(output_dir, bundle_name)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    if partition_by is not None:
+        df = df.sort_values(partition_by, kind='stable')
+    df = df.reset_index(drop=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        entry = {'name': name, 'file': f"{i:03d}.npy"}
+        if column.dtype == object or isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            categorical = pd.Categorical(column)
+            entry['categories'] = [str(category) for category in categorical.categories]
+            values = categorical.codes
+        else:
+            values = column.to_numpy()
+        np.save(os.path.join(bundle_dir, entry['file']), values)
+        columns.append(entry)
+
+    partitions = []
+    if partition_by is not None:
+        keys = df[partition_by].to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        stops = np.r_[starts[1:], len(keys)]
+        partitions = [[keys[start].item(), int(start), int(stop)] for start, stop in zip(starts, stops)]
+
+    manifest = {
+        'version': BUNDLE_FORMAT_VERSION,
+        'n_rows': len(df),
+        'columns': columns,
+        'partition_by': partition_by,
+        'partitions': partitions,
+        'source': _file_signature(source_path) if source_path is not None else None,
+    }
+    with open(os.path.join(bundle_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(f"Data saved as bundle: {bundle_dir}")
+    return bundle_dir
+
+
+def load_data_bundle(bundle_name: str, data_dir: str, mmap_mode='r', source_path=None):
+    """
+    Load a bundle written by save_data_bundle, memory-mapping its columns.
+
+    Numeric columns are backed directly by the mapped files (read-only with the default
+    mmap_mode), so processes loading the same bundle share its physical pages.
+
+    Parameters:
+    -----------
+    bundle_name : str
+        Name of the bundle directory
+    data_dir : str
+        Directory containing the bundle
+    mmap_mode : str or None, optional
+        Passed to numpy.load; None reads the columns into memory
+    source_path : str, optional
+        If given, the bundle is treated as missing when it was built from a different
+        version of this file
+
+    Returns:
+    --------
+    tuple or None
+        (df, partitions), where partitions maps each partition value to its row slice
+        of df; None if the bundle does not exist or is stale
+    """
+    bundle_dir = os.path.join(data_dir, bundle_name)
+    manifest_path = os.path.join(bundle_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != BUNDLE_FORMAT_VERSION:
+        return None
+    if source_path is not None and manifest['source'] != _file_signature(source_path):
+        return None
+
+    data = {}
+    for entry in manifest['columns']:
+        # np.asarray drops the memmap subclass without copying
+        values = np.asarray(np.load(os.path.join(bundle_dir, entry['file']), mmap_mode=mmap_mode))
+        if 'categories' in entry:
+            values = pd.Categorical.from_codes(values, categories=entry['categories'])
+        data[entry['name']] = values
+    df = pd.DataFrame(data, copy=False)
+
+    partitions = {value: df.iloc[start:stop] for value, start, stop in manifest['partitions']}
+    return df, partitions
+
+
+def _file_signature(path):
+    """Size and modification time of a file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+CUBE_FORMAT_VERSION = 1
+
+
+def save_result_cube(cube, filename: str, output_dir: str):
+    """
+    Save a ResultCube as a compressed .npz archive.
+
+    Parameters:
+    -----------
+    cube : core.result_cube.ResultCube
+        The cube to save
+    filename : str
+        Filename for the archive (conventionally ending in .cube.npz)
+    output_dir : str
+        Directory to save the archive in
+
+    Returns:
+    --------
+    str
+        Path of the archive
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    arrays = {}
+    for i, values in enumerate(cube.axes.values()):
+        arrays[f"axis_{i}"] = values
+    for i, values in enumerate(cube.metrics.values()):
+        arrays[f"metric_{i}"] = values
+    for i, value in enumerate(cube.constants.values()):
+        arrays[f"constant_{i}"] = np.asarray(value)
+    manifest = {
+        'version': CUBE_FORMAT_VERSION,
+        'axes': list(cube.axes),
+        'metrics': list(cube.metrics),
+        'constants': list(cube.constants),
+        'aliases': cube.aliases,
+        'categories': {name: [str(category) for category in labels] for name, labels in cube.categories.items()},
+        'columns': list(cube.columns),
+    }
+    arrays['manifest'] = np.asarray(json.dumps(manifest))
+
+    cube_path = os.path.join(output_dir, filename)
+    with open(cube_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    print(f"Data saved as cube: {cube_path}")
+    return cube_path
+
+
+def load_result_cube(path: str):
+    """
+    Load a ResultCube written by save_result_cube.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the .npz archive
+
+    Returns:
+    --------
+    core.result_cube.ResultCube
+    """
+    with np.load(path) as archive:
+        manifest = json.loads(archive['manifest'].item())
+        if manifest.get('version') != CUBE_FORMAT_VERSION:
+            raise ValueError(f"{path} has cube format version {manifest.get('version')}, "
+                             f"expected {CUBE_FORMAT_VERSION}")
+        axes = {name: archive[f"axis_{i}"] for i, name in enumerate(manifest['axes'])}
+        metrics = {name: archive[f"metric_{i}"] for i, name in enumerate(manifest['metrics'])}
+        constants = {name: archive[f"constant_{i}"][()] for i, name in enumerate(manifest['constants'])}
+    return ResultCube(axes, metrics, constants=constants, aliases=manifest['aliases'],
+                      categories=manifest['categories'], columns=manifest['columns'])
@@ -61,6 +61,157 @@ def create_3d_scatter(df,
     
     return fig
 
+@plotly_theme_decorator
+def create_lean_3d_scatter(df,
+                           x_col,
+                           y_col,
+                           z_col,
+                           color_col=None,
+                           hover_cols=None,
+                           log_z=False,
+                           color_continuous_scale=None,
+                           labels=None,
+                           dtype=np.float32,
+                           ):
+    """
+    3D scatter plot with a compact payload, drawn like create_3d_scatter.
+
+    Builds a single go.Scatter3d instead of going through plotly express. Coordinates,
+    colors and hover values are cast to dtype, so plotly serializes them as binary typed
+    arrays. Hover values are sent once as customdata and formatted by a hovertemplate.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input DataFrame
+    x_col, y_col, z_col : str
+        Column names for the axes
+    color_col : str, optional
+        Column name for color coding points
+    hover_cols : list of str, optional
+        Numeric columns shown on hover, in addition to the axes and color
+    log_z : bool, optional
+        Use a log-scaled z-axis
+    color_continuous_scale : str or list, optional
+        Colorscale for color_col
+    labels : dict, optional
+        Display names for columns
+    dtype : numpy dtype, optional
+        Dtype of the serialized arrays (default float32)
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    labels = labels or {}
+    plotted_cols = [x_col, y_col, z_col] + ([color_col] if color_col is not None else [])
+    hover_cols = list(dict.fromkeys(plotted_cols + list(hover_cols or [])))
+    customdata = df[hover_cols].to_numpy(dtype=dtype)
+    hovertemplate = '<br>'.join(
+        f"{labels.get(col, col)}=%{{customdata[{i}]:.4~g}}" for i, col in enumerate(hover_cols)
+    ) + '<extra></extra>'
+
+    marker = dict(symbol='circle')
+    if color_col is not None:
+        marker.update(color=df[color_col].to_numpy(dtype=dtype), coloraxis='coloraxis')
+
+    fig = go.Figure(go.Scatter3d(
+        x=df[x_col].to_numpy(dtype=dtype),
+        y=df[y_col].to_numpy(dtype=dtype),
+        z=df[z_col].to_numpy(dtype=dtype),
+        mode='markers',
+        marker=marker,
+        customdata=customdata,
+        hovertemplate=hovertemplate,
+        showlegend=False,
+    ))
+
+    fig.update_layout(
+        scene=dict(
+            xaxis=dict(title=labels.get(x_col, x_col)),
+            yaxis=dict(title=labels.get(y_col, y_col)),
+            zaxis=dict(title=labels.get(z_col, z_col), type='log' if log_z else None),
+        ),
+        legend=dict(tracegroupgap=0),
+    )
+
+    # Same horizontal colorbar as create_3d_scatter
+    if color_col is not None:
+        fig.update_layout(
+            coloraxis=dict(
+                colorscale=color_continuous_scale,
+                colorbar=dict(
+                    title=dict(text=labels.get(color_col, color_col)),
+                    orientation='h',
+                    yanchor='bottom',
+                    y=-0.2,
+                    xanchor='center',
+                    x=0.5,
+                    len=0.8
+                )
+            )
+        )
+
+    return fig
+
+def decimate_points(df, plot_cols, axes=None, max_points=None, dtype=np.float32):
+    """
+    Level of detail for 3D scatter plots: reduces df to at most max_points rows while
+    keeping what the plot shows.
+
+    Rows whose plotted values coincide once cast to dtype (the precision they are drawn
+    and serialized at) are drawn on top of each other, so only the first of them is kept.
+    If more than max_points rows remain, the grid is thinned: every axis keeps an evenly
+    spaced subset of its values, including both ends, with the axes holding the most
+    values thinned first. Data that is not a grid over axes is thinned by a uniform
+    row stride instead.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input DataFrame
+    plot_cols : list of str
+        Columns mapped to the axes and color of the plot
+    axes : list of str, optional
+        Parameter columns the rows form a grid over (e.g. the swept parameters)
+    max_points : int, optional
+        Maximum number of rows to keep; None only drops coincident points
+    dtype : numpy dtype, optional
+        Precision at which points are compared
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Subset of the rows of df, in their original order
+    """
+    plot_cols = [col for col in dict.fromkeys(plot_cols) if col is not None]
+    coincident = pd.DataFrame(df[plot_cols].to_numpy(dtype=dtype), columns=plot_cols).duplicated().to_numpy()
+    data = df[~coincident]
+    if max_points is None or len(data) <= max_points:
+        return data
+
+    axes = [axis for axis in (axes or []) if axis in data.columns]
+    if axes:
+        codes, counts = [], []
+        for axis in axes:
+            levels, axis_codes = np.unique(data[axis].to_numpy(), return_inverse=True)
+            codes.append(axis_codes.reshape(-1))
+            counts.append(len(levels))
+        rows_per_point = len(data) / np.prod(counts, dtype=float)
+        kept = list(counts)
+        while rows_per_point * np.prod(kept, dtype=float) > max_points and max(kept) > 1:
+            kept[int(np.argmax(kept))] -= 1
+        mask = np.ones(len(data), dtype=bool)
+        for axis_codes, count, keep in zip(codes, counts, kept):
+            retained = np.zeros(count, dtype=bool)
+            retained[np.round(np.linspace(0, count - 1, keep)).astype(int)] = True
+            mask &= retained[axis_codes]
+        data = data[mask]
+
+    if len(data) > max_points:
+        data = data.iloc[::int(np.ceil(len(data) / max_points))]
+    return data
+
 @plotly_theme_decorator
 def create_line_plot(df, 
                      x_col, 
@@ -139,6 +290,109 @@ def create_box_plot(df,
     )
     return fig
 
+def box_statistics(values, max_outliers=None):
+    """
+    Statistics plotly draws a box from: quartiles (linear interpolation), mean, Tukey
+    fences (the most extreme values within 1.5 IQR of the quartiles) and the outliers
+    beyond them.
+
+    Parameters:
+    -----------
+    values : array-like
+        Sample of one box
+    max_outliers : int, optional
+        Keep at most this many outliers, evenly spaced in sorted order
+
+    Returns:
+    --------
+    dict
+        q1, median, q3, mean, lowerfence, upperfence, outliers (sorted array) and count
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return dict(q1=np.nan, median=np.nan, q3=np.nan, mean=np.nan, lowerfence=np.nan, upperfence=np.nan,
+                    outliers=values, count=0)
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    lower_limit, upper_limit = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = (values >= lower_limit) & (values <= upper_limit)
+    outliers = np.sort(values[~inside])
+    if max_outliers is not None and len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int)]
+    return dict(q1=q1, median=median, q3=q3, mean=values.mean(), lowerfence=values[inside].min(),
+                upperfence=values[inside].max(), outliers=outliers, count=len(values))
+
+
+@plotly_theme_decorator
+def create_precomputed_box_plot(boxes,
+                                x_col,
+                                color_col=None,
+                                color_discrete_sequence=None,
+                                category_orders=None,
+                                **kwargs
+                                ):
+    """
+    Box plot drawn from precomputed box statistics (one row per box, see box_statistics)
+    instead of raw values, laid out like create_box_plot.
+
+    Parameters:
+    -----------
+    boxes : pandas.DataFrame
+        One row per box with x_col, color_col and the box_statistics columns
+    x_col : str
+        Column name for x-axis categories
+    color_col : str, optional
+        Column name for color coding boxes (one trace per value)
+    color_discrete_sequence : list of str, optional
+        Colors for the values of color_col
+    category_orders : dict, optional
+        Column name -> order of its values, as for plotly express
+    **kwargs : dict
+        Additional arguments passed to every go.Box trace (e.g. boxmean=True)
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    category_orders = category_orders or {}
+    colors = color_discrete_sequence or px.colors.qualitative.Plotly
+
+    def ordered_values(column):
+        if column in category_orders:
+            return [value for value in category_orders[column] if (boxes[column] == value).any()]
+        if isinstance(boxes[column].dtype, pd.CategoricalDtype):
+            return [value for value in boxes[column].cat.categories if (boxes[column] == value).any()]
+        return list(pd.unique(boxes[column]))
+
+    groups = [(None, boxes)] if color_col is None else \
+        [(value, boxes[boxes[color_col] == value]) for value in ordered_values(color_col)]
+
+    fig = go.Figure()
+    for i, (value, group) in enumerate(groups):
+        name = None if value is None else str(value)
+        fig.add_trace(go.Box(
+            x=group[x_col].astype(str).tolist(),
+            y=[outliers.tolist() for outliers in group['outliers']],
+            q1=group['q1'].tolist(),
+            median=group['median'].tolist(),
+            q3=group['q3'].tolist(),
+            mean=group['mean'].tolist(),
+            lowerfence=group['lowerfence'].tolist(),
+            upperfence=group['upperfence'].tolist(),
+            boxpoints='outliers',
+            name=name,
+            legendgroup=name,
+            offsetgroup=name,
+            marker_color=colors[i % len(colors)],
+            showlegend=value is not None,
+            **kwargs
+        ))
+    fig.update_layout(boxmode='group' if color_col is not None else 'overlay', legend_title_text=color_col)
+    fig.update_xaxes(title_text=x_col, categoryorder='array',
+                     categoryarray=[str(value) for value in ordered_values(x_col)])
+    return fig
+
 @plotly_theme_decorator
 def create_scatter_plot(df, x_col, y_col, color_col=None, size_col=None, **kwargs):
     """
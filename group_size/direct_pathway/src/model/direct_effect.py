@@ -1,3 +1,7 @@
+from core.simulation import declare_scale_invariance
+
+
+@declare_scale_invariance('avg_rate')
 def direct_pathway_model_incarceration_rate(avg_rate: float, group: str, d: float, p: float, **kwargs) -> float:
     """
     Calculate incarceration rates using the Standard Model.
@@ -26,6 +30,7 @@ def direct_pathway_model_incarceration_rate(avg_rate: float, group: str, d: floa
     else:
         return advantaged_rate
 
+@declare_scale_invariance('avg_rate')
 def bias_controlled_redistribution_rate(avg_rate: float, group: str, b: float, p: float, **kwargs) -> float:
     """
     Calculate incarceration rates using the Bias-Controlled Redistribution Model.
@@ -54,6 +59,7 @@ def bias_controlled_redistribution_rate(avg_rate: float, group: str, b: float, p
         return avg_rate * (1 - b)
 
 
+@declare_scale_invariance('base_rate')
 def non_redistributive_disparity_rate(base_rate: float, group: str, d: float, **kwargs) -> float:
     """
     Calculate incarceration rates using the Non-Redistributive Disparity Model.
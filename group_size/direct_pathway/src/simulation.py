@@ -7,21 +7,53 @@ from visualization.plots import (
     plot_3d_simulation_results,
     plot_prop_disadv_to_bias_by_ratio,
     plot_disadv_deviation_from_avg,
-    plot_disadv_deviation_boxplot
+    plot_disadv_deviation_boxplot,
+    summarize_by_ratio,
+    summarize_deviation_boxes
 )
 
 from core.simulation import run_factorial_simulation
-from core.utils.io import save_figure, save_simulation_data
+from core.derived_metrics import add_derived_metrics
+from core.pipeline import Pipeline
+from core.result_cube import ResultCube
+from core.utils.io import save_figures, save_simulation_data, save_result_cube
 import os
+import sys
 
 DIRECT_PATHWAY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR_DATA = os.path.join(DIRECT_PATHWAY_ROOT, "output", "data")
 OUTPUT_DIR_FIGURES = os.path.join(DIRECT_PATHWAY_ROOT, "output", "figures")
 
+# Task keys and results of the output pipeline
+PIPELINE_STATE_DIR = os.path.join(DIRECT_PATHWAY_ROOT, "output", ".pipeline")
+
+# Outliers drawn per box in the deviation box plot
+BOX_MAX_OUTLIERS = 200
+
+# Points drawn in the saved 3D scatter plot (see decimate_points)
+MAX_3D_POINTS = 20000
+
+
+def run_sweep(rate_function, param_dict):
+    # Rates are proportional to avg_rate, so only the avg_rate=1 slice is simulated
+    return run_factorial_simulation(rate_function, param_dict, reduce_invariances=True)
+
+def store_results(df, name, axes):
+    save_simulation_data(df, f"{name}_simulation.csv", output_dir=OUTPUT_DIR_DATA)
+    save_result_cube(ResultCube.from_frame(df, axes=axes), f"{name}_simulation.cube.npz", output_dir=OUTPUT_DIR_DATA)
+
+def export_figures(**figures):
+    # Render the figures in parallel, skipping those whose saved files are up to date
+    return save_figures(figures, output_dir=OUTPUT_DIR_FIGURES)
+
 if __name__ == "__main__":
     """
     Run factorial simulations for all three models exploring how group size 
     and various disparity parameters affect measured inequality in incarceration rates.
+    
+    The outputs are built by a Pipeline: sweep -> store -> derived metrics -> summary
+    tables -> figures -> export. Rerunning only rebuilds outputs whose inputs changed;
+    pass --force to rebuild everything.
     """
     # Define parameter ranges
     p_values = np.round(np.arange(0.01, 1, 0.01), 2)  # Group proportion values from 0.1 to 1.0 with 100 values
@@ -40,50 +72,52 @@ if __name__ == "__main__":
         },
     ]
     
-    # Run simulations for all models
-    results = []
+    pipeline = Pipeline(PIPELINE_STATE_DIR)
     for config in model_configs:
-        print(f"Running {config['name']} Model simulation...")
-        df = run_factorial_simulation(
-            config['function'],
-            config['param_dict'],
-        )
-        results.append(df)
-        
-        # Save individual model results
-        save_simulation_data(df, f"{config['name'].lower()}_simulation.csv", output_dir=OUTPUT_DIR_DATA)
-        
-        # Create and save visualizations
-        print(f"Creating visualizations for {config['name']} Model...")
-        
-        # 3D visualization of simulation results
-        print("Generating 3D simulation plot...")
-        fig_3d = plot_3d_simulation_results(df, width=900, height=700)
-        save_figure(fig_3d, f"{config['name'].lower()}_3d_simulation", output_dir=OUTPUT_DIR_FIGURES)
+        name = config['name'].lower()
         
-        # Plot proportion disadvantaged to bias by ratio
-        print("Generating proportion disadvantaged to bias plot...")
-        fig_prop = plot_prop_disadv_to_bias_by_ratio(df, width=700, height=700)
-        save_figure(fig_prop, f"{config['name'].lower()}_prop_disadv_to_bias", output_dir=OUTPUT_DIR_FIGURES)
+        # Simulation results, saved as CSV and as a cube
+        sweep = pipeline.add(f"{name}_sweep", run_sweep,
+                             params=dict(rate_function=config['function'], param_dict=config['param_dict']))
+        pipeline.add(f"{name}_store", store_results, deps=dict(df=sweep),
+                     params=dict(name=name, axes=list(config['param_dict'])),
+                     outputs=[os.path.join(OUTPUT_DIR_DATA, f"{name}_simulation.csv"),
+                              os.path.join(OUTPUT_DIR_DATA, f"{name}_simulation.cube.npz")])
         
-        # Plot disadvantaged deviation from average
-        print("Generating disadvantaged deviation plot...")
-        fig_dev = plot_disadv_deviation_from_avg(df, width=700, height=700)
-        save_figure(fig_dev, f"{config['name'].lower()}_disadv_deviation", output_dir=OUTPUT_DIR_FIGURES)
+        # Derived columns (deviations, rounded ratios, labels, bins) and the summary tables of the
+        # line and box plots are computed once for all plots
+        derived = pipeline.add(f"{name}_derived", add_derived_metrics, deps=dict(data=sweep))
+        bias_by_ratio = pipeline.add(f"{name}_bias_by_ratio", summarize_by_ratio, deps=dict(data=derived),
+                                     params=dict(value_col='normalized_disparity_index'))
+        deviation_by_ratio = pipeline.add(f"{name}_deviation_by_ratio", summarize_by_ratio, deps=dict(data=derived),
+                                          params=dict(value_col='disadv_delta_from_avg_percent'))
+        deviation_boxes = pipeline.add(f"{name}_deviation_boxes", summarize_deviation_boxes, deps=dict(data=derived),
+                                       params=dict(max_outliers=BOX_MAX_OUTLIERS))
         
-        # Plot disadvantaged deviation boxplot
-        print("Generating disadvantaged deviation boxplot...")
-        fig_box = plot_disadv_deviation_boxplot(df, width=900, height=700)
-        save_figure(fig_box, f"{config['name'].lower()}_disadv_deviation_boxplot", output_dir=OUTPUT_DIR_FIGURES)
+        # Figures, built in parallel
+        figures = {
+            # 3D visualization of simulation results
+            f"{name}_3d_simulation": (plot_3d_simulation_results, dict(standard_sim_data=derived),
+                                      dict(width=900, height=700, max_points=MAX_3D_POINTS)),
+            # Plot proportion disadvantaged to bias by ratio
+            f"{name}_prop_disadv_to_bias": (plot_prop_disadv_to_bias_by_ratio, dict(summary=bias_by_ratio),
+                                            dict(width=700, height=700)),
+            # Plot disadvantaged deviation from average
+            f"{name}_disadv_deviation": (plot_disadv_deviation_from_avg, dict(summary=deviation_by_ratio),
+                                         dict(width=700, height=700)),
+            # Plot disadvantaged deviation boxplot
+            f"{name}_disadv_deviation_boxplot": (plot_disadv_deviation_boxplot, dict(boxes=deviation_boxes),
+                                                 dict(width=900, height=700)),
+            # Create explanatory visual
+            f"{name}_explanatory_visual": (create_explanatory_visual, dict(standard_sim_data=derived),
+                                           dict(width=700, height=700)),
+            f"{name}_explanatory_visual_relative": (create_explanatory_visual, dict(standard_sim_data=derived),
+                                                    dict(relative=True, width=700, height=700)),
+        }
+        for figure_name, (plot_function, deps, params) in figures.items():
+            pipeline.add(figure_name, plot_function, deps=deps, params=params, parallel=True)
         
-        # Create explanatory visual
-        print("Generating explanatory visual...")
-        fig_exp = create_explanatory_visual(df, width=700, height=700)
-        save_figure(fig_exp, f"{config['name'].lower()}_explanatory_visual", output_dir=OUTPUT_DIR_FIGURES)
-        
-        # Create explanatory visual
-        print("Generating relative explanatory visual...")
-        fig_exp = create_explanatory_visual(df, relative=True, width=700, height=700)
-        save_figure(fig_exp, f"{config['name'].lower()}_explanatory_visual_relative", output_dir=OUTPUT_DIR_FIGURES)
-        
-        
\ No newline at end of file
+        pipeline.add(f"{name}_export", export_figures, deps={figure_name: figure_name for figure_name in figures},
+                     outputs=[os.path.join(OUTPUT_DIR_FIGURES, f"{figure_name}.png") for figure_name in figures])
+    
+    pipeline.run(force='--force' in sys.argv)
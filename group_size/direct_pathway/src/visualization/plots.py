@@ -3,31 +3,21 @@ import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
+from core.derived_metrics import (
+    add_derived_metrics, ensure_derived_metrics, create_disparity_ratio_label, PROP_DISADV_BINS, PROP_DISADV_LABELS
+)
+from core.result_table import result_table
 from core.visualization.style import plotly_theme_decorator
-from core.visualization.base_plots import create_3d_scatter, create_box_plot
-    
+from core.visualization.base_plots import (
+    create_3d_scatter, box_statistics, create_precomputed_box_plot, decimate_points
+)
 
-def create_disparity_ratio_label(disparity_ratio):
-    """
-    Create a standardized label for disparity ratio ranges.
-
-    Parameters:
-    -----------
-    disparity_ratio : float
-        The disparity ratio value
-
-    Returns:
-    --------
-    str
-        Formatted label for the disparity ratio range
-    """
-    if disparity_ratio == 1:
-        return '1-1.49'
-    elif disparity_ratio == 10:
-        return '9.5-10'
-    else:
-        return f'{disparity_ratio-0.5}-{disparity_ratio+0.49}'
+# Parameter columns the simulation results are indexed by (see core.result_table)
+RESULT_KEYS = ['pop_avg', 'prop_disadv', 'avg_rate', 'd']
 
+# Swept parameters the simulation results form a grid over
+GRID_AXES = ['prop_disadv', 'avg_rate', 'd']
+    
 
 def calculate_deviation_metrics(data):
     """
@@ -41,27 +31,9 @@ def calculate_deviation_metrics(data):
     Returns:
     --------
     pandas.DataFrame
-        DataFrame with added deviation metrics
+        DataFrame with added deviation metrics (all of core.derived_metrics.DERIVED_COLUMNS)
     """
-    # Create a copy to avoid modifying the original
-    df = data.copy()
-
-    # Calculate absolute deviation
-    df['disadv_delta_from_avg'] = np.abs(df['rate_disadv'] - df['pop_avg'])
-    df['adv_delta_from_avg'] = np.abs(df['rate_adv'] - df['pop_avg'])
-
-    # Calculate percentage deviation
-    df['disadv_delta_from_avg_percent'] = df['disadv_delta_from_avg'] / df['pop_avg'] * 100
-    df['adv_delta_from_avg_percent'] = df['adv_delta_from_avg'] / df['pop_avg'] * 100
-
-    # Round the disparity ratio for grouping
-    df['disparity_ratio_rounded'] = df['disparity_ratio'].apply(np.round)
-
-    # Add disparity ratio labels
-    df['disparity_ratio_label'] = df['disparity_ratio_rounded'].apply(
-        create_disparity_ratio_label)
-
-    return df
+    return add_derived_metrics(data)
 
 
 def bin_proportion_disadvantaged(data, bins=None, labels=None):
@@ -87,11 +59,10 @@ def bin_proportion_disadvantaged(data, bins=None, labels=None):
 
     # Default bins and labels if not provided
     if bins is None:
-        bins = [0, 0.25, 0.5, 0.75, 1.0]
+        bins = PROP_DISADV_BINS
 
     if labels is None:
-        labels = ['Small Minority (0-25%)', 'Minority (26-50%)',
-                  'Majority (51-75%)', 'Large Majority (76-100%)']
+        labels = PROP_DISADV_LABELS
 
     # Create the binned column
     df['prop_disadv_binned'] = pd.cut(df['prop_disadv'],
@@ -102,6 +73,56 @@ def bin_proportion_disadvantaged(data, bins=None, labels=None):
     return df
 
 
+def summarize_by_ratio(data, value_col):
+    """
+    Mean and standard deviation of value_col for each (prop_disadv, rounded disparity ratio).
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Simulation results (derived metrics are added if missing)
+    value_col : str
+        Column to summarize
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per group with prop_disadv, disparity_ratio_rounded, mean, std and count
+    """
+    data = ensure_derived_metrics(data)
+    return data.groupby(['prop_disadv', 'disparity_ratio_rounded'])[value_col].agg(
+        ['mean', 'std', 'count']).reset_index()
+
+
+def summarize_deviation_boxes(data, max_outliers=None):
+    """
+    Box statistics of the signed disadvantaged deviation from the population average for
+    each (prop_disadv bin, disparity ratio label).
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Simulation results (derived metrics are added if missing)
+    max_outliers : int, optional
+        Keep at most this many outliers per box (see box_statistics)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per box with prop_disadv_binned, disparity_ratio_label and the
+        box_statistics columns
+    """
+    data = ensure_derived_metrics(data)
+    grouped = data.groupby(['prop_disadv_binned', 'disparity_ratio_label'], observed=True)['disadv_deviation_percent']
+    rows = [dict(prop_disadv_binned=prop_bin, disparity_ratio_label=label, **box_statistics(values, max_outliers))
+            for (prop_bin, label), values in grouped]
+    boxes = pd.DataFrame(rows, columns=['prop_disadv_binned', 'disparity_ratio_label', 'q1', 'median', 'q3', 'mean',
+                                        'lowerfence', 'upperfence', 'outliers', 'count'])
+    for column in ('prop_disadv_binned', 'disparity_ratio_label'):
+        boxes[column] = pd.Categorical(boxes[column], categories=data[column].cat.categories)
+    return boxes
+
+
 @plotly_theme_decorator
 def create_explanatory_visual(standard_sim_data, exemplar_pop_avg=200, exemplar_prop_disadv=[0.1, 0.5, 0.9], height=1000, width=1000, relative=False):
     """
@@ -128,16 +149,13 @@ def create_explanatory_visual(standard_sim_data, exemplar_pop_avg=200, exemplar_
         The visualization figure
     """
 
-    # Filter data based on parameters
-    filtered_explanatory_data = standard_sim_data[standard_sim_data['pop_avg']
-                                                  == exemplar_pop_avg]
-    filtered_explanatory_data = filtered_explanatory_data[filtered_explanatory_data['prop_disadv'].isin(
-        exemplar_prop_disadv)]
+    # Filter data based on parameters (prop_disadv values match within float tolerance)
+    filtered_explanatory_data = result_table(standard_sim_data, RESULT_KEYS).select(
+        pop_avg=exemplar_pop_avg, prop_disadv=exemplar_prop_disadv)
 
     if relative:
-        # Calculate deviation metrics if plotting relative values
-        filtered_explanatory_data = calculate_deviation_metrics(
-            filtered_explanatory_data)
+        # Deviation metrics (computed here unless the data already carries them)
+        filtered_explanatory_data = ensure_derived_metrics(filtered_explanatory_data)
 
         # Create melted dataframe with percent deviations
         melted_df = pd.melt(
@@ -215,6 +233,7 @@ def plot_3d_simulation_results(standard_sim_data,
                                y='disadv_delta_from_avg_percent',
                                z='disparity_ratio',
                                color='normalized_disparity_index',
+                               max_points=None,
                                **kwargs
                                ):
     """
@@ -230,6 +249,9 @@ def plot_3d_simulation_results(standard_sim_data,
         Height of the figure in pixels
     width : int, default=1000
         Width of the figure in pixels
+    max_points : int, optional
+        Level of detail: draw coincident points once and thin the parameter grid to at
+        most max_points points (see decimate_points). By default every row is drawn.
 
     Returns
     -------
@@ -238,11 +260,17 @@ def plot_3d_simulation_results(standard_sim_data,
     """
 
     # Calculate deviation metrics
-    data = calculate_deviation_metrics(standard_sim_data)
-
-    # Create a 3D scatter plot with all data columns as hover data
+    data = ensure_derived_metrics(standard_sim_data)
+    points = data
+    if max_points is not None:
+        points = decimate_points(data, [x, y, z, color], axes=GRID_AXES, max_points=max_points)
+
+    # Create a 3D scatter plot with all data columns as hover data (except the signed
+    # deviation and the categorical bins, which repeat other columns)
+    hover_columns = [column for column in data.columns
+                     if column not in ('disadv_deviation_percent', 'prop_disadv_binned', 'disparity_bucket')]
     fig = create_3d_scatter(
-        df=data,
+        df=points,
         x_col=x,
         y_col=y,
         z_col=z,
@@ -250,7 +278,7 @@ def plot_3d_simulation_results(standard_sim_data,
         color_continuous_scale='Turbo',
         # color_continuous_midpoint=0.5,
         opacity=0.5,
-        hover_data=data.columns.tolist(),
+        hover_data=hover_columns,
         **kwargs
     )
 
@@ -302,7 +330,7 @@ def plot_3d_simulation_results(standard_sim_data,
 
 
 @plotly_theme_decorator
-def plot_prop_disadv_to_bias_by_ratio(data, height=800, width=1000, n_std=1):
+def plot_prop_disadv_to_bias_by_ratio(data=None, height=800, width=1000, n_std=1, summary=None):
     """
     Create a line plot showing the relationship between proportion disadvantaged and bias parameter,
     with lines grouped by rounded disparity ratios and confidence bands.
@@ -310,11 +338,13 @@ def plot_prop_disadv_to_bias_by_ratio(data, height=800, width=1000, n_std=1):
     Parameters:
     -----------
     data : pd.DataFrame
-        DataFrame containing the simulation data
+        DataFrame containing the simulation data (not needed when summary is given)
     height : int, default=800
         Height of the figure in pixels
     width : int, default=1000
         Width of the figure in pixels
+    summary : pd.DataFrame, optional
+        summarize_by_ratio(data, 'normalized_disparity_index'), e.g. the driver's bias_by_ratio task
 
     Returns:
     --------
@@ -323,15 +353,13 @@ def plot_prop_disadv_to_bias_by_ratio(data, height=800, width=1000, n_std=1):
     """
     fig = go.Figure()
 
-    # Round disparity ratios for grouping
-    data['disparity_ratio_rounded'] = data['disparity_ratio'].apply(np.round)
+    # Mean and std by prop_disadv and disparity_ratio (rounded) for confidence bands
+    if summary is None:
+        summary = summarize_by_ratio(data, 'normalized_disparity_index')
+    grouped_data = summary[['prop_disadv', 'disparity_ratio_rounded', 'mean', 'std']].copy()
 
     # Get unique rounded disparity ratios
-    rounded_ratios = sorted(data['disparity_ratio_rounded'].unique())
-
-    # Group by prop_disadv and disparity_ratio (rounded) to calculate mean and std for confidence bands
-    grouped_data = data.groupby(['prop_disadv', 'disparity_ratio_rounded'])[
-        'normalized_disparity_index'].agg(['mean', 'std']).reset_index()
+    rounded_ratios = sorted(grouped_data['disparity_ratio_rounded'].unique())
 
     # Add upper and lower bounds for confidence bands
     grouped_data['upper'] = grouped_data['mean'] + n_std*grouped_data['std']
@@ -395,7 +423,7 @@ def plot_prop_disadv_to_bias_by_ratio(data, height=800, width=1000, n_std=1):
 
 
 @plotly_theme_decorator
-def plot_disadv_deviation_from_avg(data, height=800, width=800, n_std=1):
+def plot_disadv_deviation_from_avg(data=None, height=800, width=800, n_std=1, summary=None):
     """
     Create a plot showing the disadvantaged group's incarceration rate deviation from population average
     with confidence bands.
@@ -403,23 +431,23 @@ def plot_disadv_deviation_from_avg(data, height=800, width=800, n_std=1):
     Parameters:
     -----------
     data : pandas.DataFrame
-        DataFrame containing simulation results
+        DataFrame containing simulation results (not needed when summary is given)
     height : int, default=800
         Height of the figure in pixels
     width : int, default=800
         Width of the figure in pixels
+    summary : pd.DataFrame, optional
+        summarize_by_ratio(data, 'disadv_delta_from_avg_percent'), e.g. the driver's deviation_by_ratio task
 
     Returns:
     --------
     plotly.graph_objects.Figure
         The configured plotly figure
     """
-    # Calculate deviation metrics
-    data = calculate_deviation_metrics(data)
-
-    # Group by prop_disadv and disparity_ratio (rounded) to calculate mean and std for confidence bands
-    grouped_data = data.groupby(['prop_disadv', 'disparity_ratio_rounded'])[
-        'disadv_delta_from_avg_percent'].agg(['mean', 'std']).reset_index()
+    # Mean and std by prop_disadv and disparity_ratio (rounded) for confidence bands
+    if summary is None:
+        summary = summarize_by_ratio(data, 'disadv_delta_from_avg_percent')
+    grouped_data = summary[['prop_disadv', 'disparity_ratio_rounded', 'mean', 'std']].copy()
 
     # Add upper and lower bounds for confidence bands
     grouped_data['upper'] = grouped_data['mean'] + n_std*grouped_data['std']
@@ -483,63 +511,44 @@ def plot_disadv_deviation_from_avg(data, height=800, width=800, n_std=1):
 
 
 @plotly_theme_decorator
-def plot_disadv_deviation_boxplot(standard_sim_data, height=700, width=1200, **kwargs):
+def plot_disadv_deviation_boxplot(standard_sim_data=None, height=700, width=1200, boxes=None, max_outliers=None,
+                                  **kwargs):
     """
     Create a box plot showing the disadvantaged group's incarceration rate deviation 
     from population average by proportion group and disparity ratio.
 
+    The boxes are drawn from precomputed statistics, so the figure carries the quartiles,
+    fences and outliers of each box rather than every simulated row.
+
     Parameters:
     -----------
     standard_sim_data : pandas.DataFrame
-        DataFrame containing simulation results
+        DataFrame containing simulation results (not needed when boxes is given)
     height : int, default=700
+    boxes : pandas.DataFrame, optional
+        summarize_deviation_boxes(standard_sim_data), e.g. the driver's deviation_boxes task
+    max_outliers : int, optional
+        Outliers kept per box when computing the boxes here
+    **kwargs : dict
+        Additional arguments passed to create_precomputed_box_plot
 
     Returns:
     --------
     plotly.graph_objects.Figure
         The configured plotly figure
     """
-    # Calculate the difference between disadvantaged group rate and population average
-    standard_sim_data['disadv_delta_from_avg'] = standard_sim_data['rate_disadv'] - \
-        standard_sim_data['pop_avg']
-
-    # Calculate the percent deviation from average
-    standard_sim_data['disadv_delta_from_avg_percent'] = (
-        standard_sim_data['rate_disadv'] - standard_sim_data['pop_avg']) / standard_sim_data['pop_avg'] * 100
-
-    # Round the disparity ratio for grouping
-    standard_sim_data['disparity_ratio_rounded'] = standard_sim_data['disparity_ratio'].apply(
-        np.round)
-
-    # Create label for the rounded disparity ratio range
-    def create_disparity_label(disparity_ratio):
-        if disparity_ratio == 1:
-            return '1-1.49'
-        elif disparity_ratio == 10:
-            return '9.5-10'
-        else:
-            return f'{disparity_ratio-0.5}-{disparity_ratio+0.49}'
-
-    standard_sim_data['disparity_ratio_label'] = standard_sim_data['disparity_ratio_rounded'].apply(
-        create_disparity_label)
-
-    # Create bins for prop_disadv (4 groups split at 50%)
-    bins = [0, 0.25, 0.5, 0.75, 1.0]
-    labels = ['Small Minority (0-25%)', 'Minority (26-50%)',
-              'Majority (51-75%)', 'Large Majority (76-100%)']
-    standard_sim_data['prop_disadv_binned'] = pd.cut(standard_sim_data['prop_disadv'],
-                                                     bins=bins,
-                                                     labels=labels,
-                                                     include_lowest=True)
+    # Box statistics of the signed percent deviation from average, by prop_disadv bin
+    # (4 groups split at 50%) and rounded disparity ratio label
+    if boxes is None:
+        boxes = summarize_deviation_boxes(standard_sim_data, max_outliers)
 
     # Create box plot with binned proportions on x-axis and colored by disparity ratio
-    fig = create_box_plot(
-        df=standard_sim_data,
+    fig = create_precomputed_box_plot(
+        boxes,
         x_col='prop_disadv_binned',
-        y_col='disadv_delta_from_avg_percent',
         color_col='disparity_ratio_label',
         color_discrete_sequence=px.colors.qualitative.D3,
-        category_orders={"prop_disadv_binned": labels},
+        category_orders={"prop_disadv_binned": PROP_DISADV_LABELS},
         **kwargs
     )
 
@@ -1,31 +1,36 @@
 import dash
 import dash_bootstrap_components as dbc
-import pandas as pd
-import numpy as np
 
 from layouts import create_layout
-from callbacks import register_callbacks
-from constants import PORT, APP_DATA_PATH
+from callbacks import register_callbacks, prewarm_parameter_space_figures
+from constants import PORT, APP_DATA_PATH, FIGURE_CACHE_BACKEND, FIGURE_CACHE_DIR, PREWARM_FIGURE_CACHE
+from utils import FigureCache, data_fingerprint, background_callback_manager
+from bundle import load_app_data
 import os
 
-from direct_pathway.src.visualization.plots import calculate_deviation_metrics
-
 port = int(os.environ.get("PORT", PORT))
 
-# Load simulation results from the same path that would be used by save_simulation_data
-simulation_results = pd.read_csv(os.path.join(APP_DATA_PATH,'normalized_indirect_simulation.csv'))
-simulation_results = calculate_deviation_metrics(simulation_results)
-simulation_results['z_position_gap'] = np.round(simulation_results['z_position_gap'],1)
+# Memory-map the precomputed bundle (or prepare the CSV saved by save_simulation_data if it is stale)
+simulation_results = load_app_data(APP_DATA_PATH)
 
-# Initialize the Dash app with bootstrap theme
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUMEN])
+# Initialize the Dash app with bootstrap theme.
+# Background callbacks run in separate processes, with results and progress kept on disk
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUMEN],
+                background_callback_manager=background_callback_manager,
+                compress=True)  # gzip responses (flask-compress)
 server = app.server  # Expose Flask server for Heroku deployment
 
 # Set app layout
 app.layout = create_layout(simulation_results=simulation_results)
 
+# Parameter-space figures are cached per data version
+figure_cache = FigureCache(backend=FIGURE_CACHE_BACKEND, directory=FIGURE_CACHE_DIR,
+                           namespace=data_fingerprint(simulation_results))
+if PREWARM_FIGURE_CACHE:
+    prewarm_parameter_space_figures(simulation_results, figure_cache)
+
 # Register callbacks
-register_callbacks(app, simulation_results=simulation_results)
+register_callbacks(app, simulation_results=simulation_results, figure_cache=figure_cache)
 
 # Run the app
 if __name__ == '__main__':
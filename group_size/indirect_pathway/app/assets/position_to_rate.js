@@ -0,0 +1,75 @@
+// Clientside callbacks for the mechanism explorer.
+//
+// positionToRateFigure mirrors create_position_to_rate_plot: for gamma - 1, gamma and gamma + 1
+// it evaluates
+//     rate(z) = (target_avg_rate * (1 - z)^g * first_norm_factor + floor_rate) * second_norm_factor
+// with the factors the server computed for the gamma grid in norm-factor-store, and draws each
+// curve with a marginal box plot.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    mechanism: {
+        positionToRateFigure: function (spec, dragGamma, gamma) {
+            if (!spec) {
+                return window.dash_clientside.no_update;
+            }
+            if (dragGamma !== null && dragGamma !== undefined) {
+                gamma = dragGamma;
+            }
+
+            const factorIndex = function (value) {
+                return spec.gammas.findIndex(function (g) { return Math.abs(g - value) < 1e-6; });
+            };
+            const x = Array.from({length: spec.num_points}, function (_, i) { return i / (spec.num_points - 1); });
+            const label = function (g) { return 'γ=' + g.toFixed(1); };
+
+            // As on the server, the gamma - 1 curve uses the factors of max(gamma - 1, 0)
+            const curves = [
+                {exponent: gamma - 1, factorGamma: Math.max(gamma - 1, 0), current: false},
+                {exponent: gamma, factorGamma: gamma, current: true},
+                {exponent: gamma + 1, factorGamma: gamma + 1, current: false}
+            ];
+
+            const data = [];
+            for (const curve of curves) {
+                const i = factorIndex(curve.factorGamma);
+                if (i < 0) {
+                    return window.dash_clientside.no_update;
+                }
+                const first = spec.first_norm_factor[i];
+                const second = spec.second_norm_factor[i];
+                const floor = spec.floor_rate > 0 ? spec.floor_rate : 0;
+                const y = x.map(function (z) {
+                    return (spec.target_avg_rate * Math.pow(1 - z, curve.exponent) * first + floor) * second;
+                });
+
+                const name = label(curve.factorGamma);
+                const color = curve.current ? 'black' : 'lightgray';
+                const hover = 'Steepness Parameter=' + name +
+                    '<br>Expected Incarceration Rate (per 100,000)=%{y}<extra></extra>';
+                data.push({
+                    type: 'scatter', mode: 'lines', x: x, y: y,
+                    name: name, legendgroup: name, showlegend: true,
+                    xaxis: 'x', yaxis: 'y',
+                    line: curve.current ? {color: color, width: 3} : {color: color, width: 3, dash: 'dash'},
+                    hovertemplate: 'Steepness Parameter=' + name + '<br>Economic Position (Z)=%{x}' +
+                        '<br>Expected Incarceration Rate (per 100,000)=%{y}<extra></extra>'
+                });
+                data.push({
+                    type: 'box', y: y,
+                    name: name, legendgroup: name, offsetgroup: name, alignmentgroup: 'True',
+                    showlegend: false, notched: true, boxmean: true,
+                    xaxis: 'x2', yaxis: 'y2',
+                    marker: {color: color, symbol: 'circle', opacity: 0.7},
+                    line: {width: 2},
+                    hovertemplate: hover
+                });
+            }
+
+            const title = 'Position-to-Rate Function (' + label(gamma) + ' (+/- 1), Target Average Rate=' +
+                Math.round(spec.target_avg_rate).toLocaleString('en-US') + ')';
+            const layout = Object.assign({}, spec.layout, {
+                title: Object.assign({}, spec.layout.title, {text: title})
+            });
+            return {data: data, layout: layout};
+        }
+    }
+});
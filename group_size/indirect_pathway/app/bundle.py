@@ -0,0 +1,83 @@
+"""
+Build and load the app's precomputed data bundle.
+
+Run `python -m indirect_pathway.app.bundle` from the group_size directory to rebuild the
+bundle from normalized_indirect_simulation.csv (the pipeline of indirect_pathway/src/simulation.py
+does this whenever it rewrites the CSV or the bundle is missing).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.utils.io import save_data_bundle, load_data_bundle
+from core.derived_metrics import add_derived_metrics
+from indirect_pathway.app.constants import APP_DATA_PATH
+from indirect_pathway.src.visualization.plots import RESULT_KEYS
+
+SIMULATION_CSV = 'normalized_indirect_simulation.csv'
+BUNDLE_NAME = 'normalized_indirect_simulation.bundle'
+
+
+def prepare_app_data(simulation_results):
+    """
+    Adds the derived columns the app displays to raw simulation results.
+
+    Parameters:
+    -----------
+    simulation_results : pd.DataFrame
+        Results of the normalized indirect simulation
+
+    Returns:
+    --------
+    pd.DataFrame
+        Results with the derived metrics of core.derived_metrics and rounded z_position_gap,
+        sorted by RESULT_KEYS so result_table can index them without copying
+    """
+    df = add_derived_metrics(simulation_results)
+    df['z_position_gap'] = np.round(df['z_position_gap'], 1)
+    keys = [key for key in RESULT_KEYS if key in df.columns]
+    return df.sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def build_app_bundle(data_dir=APP_DATA_PATH):
+    """
+    Writes the app bundle from the simulation CSV in data_dir.
+
+    The bundle is not partitioned: the rows are sorted by RESULT_KEYS, which start with
+    min_rate, so result_table already serves each floor rate as a contiguous slice.
+
+    Returns:
+    --------
+    str
+        Path of the bundle directory
+    """
+    csv_path = os.path.join(data_dir, SIMULATION_CSV)
+    simulation_results = prepare_app_data(pd.read_csv(csv_path))
+    return save_data_bundle(simulation_results, BUNDLE_NAME, data_dir, source_path=csv_path)
+
+
+def load_app_data(data_dir=APP_DATA_PATH):
+    """
+    Loads the app data, memory-mapping the bundle when it is up to date with the CSV.
+
+    Falls back to reading and preparing the CSV when the bundle is missing or was
+    built from a different version of it.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Simulation results, sorted by RESULT_KEYS
+    """
+    csv_path = os.path.join(data_dir, SIMULATION_CSV)
+    bundle = load_data_bundle(BUNDLE_NAME, data_dir, source_path=csv_path)
+    if bundle is not None:
+        simulation_results, _ = bundle
+        return simulation_results
+    print(f"No up-to-date data bundle in {data_dir}; preparing {SIMULATION_CSV} "
+          f"(run `python -m indirect_pathway.app.bundle` to build it)")
+    return prepare_app_data(pd.read_csv(csv_path))
+
+
+if __name__ == '__main__':
+    build_app_bundle()
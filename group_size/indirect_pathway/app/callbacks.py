@@ -1,148 +1,319 @@
-from dash.dependencies import Input, Output
-from dash import html
+from dash.dependencies import Input, Output, ClientsideFunction
+from dash import html, no_update
 import dash_bootstrap_components as dbc
 import numpy as np
 
-from indirect_pathway.src.model.indirect_effect import generate_stratification_positions, calculate_incarceration_rates_normalized
 from indirect_pathway.src.visualization.plots import (
     create_mechanism_interaction_plot, create_stratification_plot, create_position_to_rate_plot,
     plot_parameter_metric_correlations,
     plot_derived_metric_correlations,
     create_disparity_probability_plot,
-    create_simulation_3d_plot
+    create_simulation_3d_plot,
+    RESULT_KEYS
 )
-from constants import PLOT_HEIGHT
+from core.result_table import result_table
+from constants import (
+    PLOT_HEIGHT, BACKGROUND_POLL_INTERVAL, INTERACTION_MAX_MARKERS, GAMMA_MIN, GAMMA_MAX, GAMMA_STEP,
+    POSITION_TO_RATE_POINTS
+)
+from utils import (
+    cached_stratification_positions, cached_normalized_rates, cached_norm_factor_grid, FigureCache, shared_result,
+    sweep_interpolator
+)
+
+# Moving any of these sliders cancels mechanism-explorer jobs computed for the old values
+MECHANISM_SLIDER_IDS = ['sample-size-slider', 'p-slider', 'mu-disadv-slider', 'z-position-gap-slider',
+                        'c-disadv-slider', 'c-adv-slider', 'gamma-slider', 'floor-rate-slider',
+                        'population-average-rate-slider']
+
+
+def background_progress_options(progress_id):
+    """
+    Keyword arguments that run a callback as a cancellable background job reporting to progress_id.
+    """
+    return dict(
+        background=True,
+        progress=[Output(progress_id, 'value'), Output(progress_id, 'max')],
+        progress_default=[0, 1],
+        running=[(Output(progress_id, 'style'), {'display': 'flex'}, {'display': 'none'})],
+        cancel=[Input(slider_id, 'value') for slider_id in MECHANISM_SLIDER_IDS],
+        interval=BACKGROUND_POLL_INTERVAL,
+    )
+
+
+def create_stats_panel(rate_data, p, sweep_estimate=None):
+    """
+    Creates the statistics display for a set of group rates, with the disparity ratio
+    interpolated from the stored sweep when sweep_estimate (an Interpolation) is given
+    """
+    estimate = []
+    if sweep_estimate is not None:
+        estimate = [html.P([
+            html.Strong("Sweep Estimate of Disparity Ratio: "),
+            f"{sweep_estimate.value:.2f} ± {sweep_estimate.error:.2f}",
+            " (steep region, interpolation unreliable)" if sweep_estimate.steep else ""
+        ], className='text-muted')]
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.P([
+                    html.Strong("Disadvantaged Group Rate: "), 
+                    f"{rate_data['rate_disadv']:.1f} per 100,000"
+                ]),
+                html.P([
+                    html.Strong("Advantaged Group Rate: "), 
+                    f"{rate_data['rate_adv']:.1f} per 100,000"
+                ])
+            ], width=4),
+            dbc.Col([
+                html.P([
+                    html.Strong("Population Average Rate: "), 
+                    f"{rate_data['pop_avg_rate']:.1f} per 100,000"
+                ]),
+                html.P([
+                    html.Strong("Disparity Ratio: "), 
+                    f"{rate_data['rate_disadv'] / rate_data['rate_adv']:.2f}"
+                ])
+            ], width=4),
+            dbc.Col([
+                html.P([
+                    html.Strong("Disparity Difference: "), 
+                    f"{rate_data['rate_disadv'] - rate_data['rate_adv']:.1f} per 100,000"
+                ]),
+                html.P([
+                    html.Strong("Normalized Disparity Index (η): "), 
+                    f"{(rate_data['rate_disadv'] / rate_data['rate_adv'] - 1) / (rate_data['rate_disadv'] / rate_data['rate_adv'] + (1-p)/p):.3f}"
+                ])
+            ], width=4)
+        ])
+    ] + estimate)
+
+
+def create_parameter_space_figures(simulation_results, figure_cache, floor_rate, z_axis_variable,
+                                   color_variable, correlation_method):
+    """
+    Builds the four parameter-space figures, each cached under only the inputs it depends on.
+    """
+    param_corr = figure_cache.get_or_create(
+        ('param-metric-correlation', floor_rate, correlation_method),
+        lambda: plot_parameter_metric_correlations(
+            simulation_results=simulation_results,
+            floor_rate=floor_rate,
+            spearman=correlation_method
+        )
+    )
+    
+    derived_corr = figure_cache.get_or_create(
+        ('derived-metric-correlation', floor_rate, correlation_method),
+        lambda: plot_derived_metric_correlations(
+            simulation_results=simulation_results,
+            min_rate=floor_rate,
+            spearman=correlation_method
+        )
+    )
+    
+    prob_plot = figure_cache.get_or_create(
+        ('disparity-probability', floor_rate),
+        lambda: create_disparity_probability_plot(
+            simulation_results=simulation_results,
+            min_rate_value=floor_rate,
+            height=PLOT_HEIGHT
+        )
+    )
+    
+    sim_3d = figure_cache.get_or_create(
+        ('simulation-3d', floor_rate, z_axis_variable, color_variable),
+        lambda: create_simulation_3d_plot(
+            simulation_results=simulation_results,
+            min_rate=floor_rate,
+            z_col=z_axis_variable,
+            color_col=color_variable,
+            lean=True,
+            height=PLOT_HEIGHT
+        )
+    )
+    
+    return param_corr, derived_corr, prob_plot, sim_3d
+
+
+def prewarm_parameter_space_figures(simulation_results, figure_cache, z_axis_variable='disparity_ratio',
+                                    color_variable='z_position_gap'):
+    """
+    Fills the figure cache for every floor-rate slider stop and both correlation methods,
+    using the default dropdown selections.
+    """
+    for floor_rate in result_table(simulation_results, RESULT_KEYS).levels('min_rate').tolist():
+        for correlation_method in (True, False):
+            create_parameter_space_figures(simulation_results, figure_cache, floor_rate, z_axis_variable,
+                                           color_variable, correlation_method)
+
+
+def register_callbacks(app, simulation_results, figure_cache=None):
+    if figure_cache is None:
+        figure_cache = FigureCache()
+    disparity_interpolator = sweep_interpolator(simulation_results)
+    
 
-def register_callbacks(app, simulation_results):
+    # The mechanism explorer is split so each output only recomputes when its own inputs change:
+    #   position sliders -> position-sample-store -> stratification plot
+    #   position-sample-store + rate sliders -> rate-store -> position-to-rate plot, interaction plot, stats
+    # The stores hold parameter keys; positions, rates and norm factors are memoized server-side.
+    # Figures on inactive tabs are skipped and built when their tab is opened.
     @app.callback(
-        [Output('incarceration-plot', 'figure'),
-         Output('position-distribution-plot', 'figure'),
-         Output('position-to-rate-plot', 'figure'),
-         Output('stats-container', 'children')],
+        Output('position-sample-store', 'data'),
         [Input('sample-size-slider', 'value'),
          Input('p-slider', 'value'),
          Input('mu-disadv-slider', 'value'),
          Input('z-position-gap-slider', 'value'),
          Input('c-disadv-slider', 'value'),
-         Input('c-adv-slider', 'value'),
-         Input('gamma-slider', 'value'),
-         Input('floor-rate-slider', 'value'),
-         Input('population-average-rate-slider', 'value')]
+         Input('c-adv-slider', 'value')]
     )
-    def update_graph(sample_size, p, mu_disadv, z_position_gap, c_disadv, c_adv, gamma, floor_rate, population_avg_rate):
-        # Generate positions
-        positions = generate_stratification_positions(
+    def update_position_sample(sample_size, p, mu_disadv, z_position_gap, c_disadv, c_adv):
+        position_params = dict(
+            sample_size=sample_size,
             p=p,
             mu_disadv=mu_disadv,
             z_position_gap=z_position_gap,
             c_disadv=c_disadv,
             c_adv=c_adv,
-            sample_size=sample_size,
-        )
-        
-        # Calculate incarceration rates
-        rate_data = calculate_incarceration_rates_normalized(
-            positions=positions,
-            gamma=gamma,
-            target_avg_rate=population_avg_rate,
-            floor_rate=floor_rate
         )
-        
-        # Get positions for additional gamma values
-        positions_for_factors = positions
-        
-        # Get norm factors for different gamma values
-        norm_factors = {
-            'gamma': {
-                'value': gamma,
-                'factors': {
-                    'first_norm_factor': rate_data['first_norm_factor'],
-                    'second_norm_factor': rate_data['second_norm_factor'],
-                    'total_norm_factor': rate_data['total_norm_factor']
-                }
-            },
-            'gamma-1': {
-                'value': max(gamma-1, 0),
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions_for_factors,
-                    gamma=max(gamma-1, 0),
-                    target_avg_rate=population_avg_rate,
-                    floor_rate=floor_rate,
-                    return_only_factors=True
-                )
-            },
-            'gamma+1': {
-                'value': gamma+1,
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions_for_factors,
-                    gamma=gamma+1,
-                    target_avg_rate=population_avg_rate,
-                    floor_rate=floor_rate,
-                    return_only_factors=True
-                )
-            }
-        }
-        
-        # Create plots
-        incarceration_fig = create_mechanism_interaction_plot(
-            rate_data=rate_data,
+        # Draw the sample once here so downstream callbacks hit the cache
+        cached_stratification_positions(**position_params)
+        return position_params
+
+    @app.callback(
+        Output('rate-store', 'data'),
+        [Input('position-sample-store', 'data'),
+         Input('gamma-slider', 'value'),
+         Input('floor-rate-slider', 'value'),
+         Input('population-average-rate-slider', 'value')]
+    )
+    def update_rate_parameters(position_params, gamma, floor_rate, population_avg_rate):
+        return dict(
+            position_params=position_params,
             gamma=gamma,
             target_avg_rate=population_avg_rate,
-            positions=positions,
-            norm_factors=norm_factors['gamma']['factors'],
-            height=PLOT_HEIGHT 
+            floor_rate=floor_rate,
         )
 
-        position_fig = create_stratification_plot(
+    @app.callback(
+        Output('position-distribution-plot', 'figure'),
+        [Input('position-sample-store', 'data'),
+         Input('visualization-tabs', 'active_tab')]
+    )
+    def update_position_plot(position_params, active_tab):
+        if active_tab != 'position-distribution-tab':
+            return no_update
+        positions = cached_stratification_positions(**position_params)
+        return create_stratification_plot(
             positions=positions,
+            binned=True,
             height=PLOT_HEIGHT
         )
 
-        position_to_rate_fig = create_position_to_rate_plot(
-            gamma=gamma,
-            target_avg_rate=population_avg_rate,
+    # The position-to-rate curves are closed-form given the norm factors, so the server only sends
+    # the factors for the whole gamma grid and the browser redraws the curves while gamma is dragged
+    # (see assets/position_to_rate.js). The curve count and layout come from create_position_to_rate_plot.
+    position_to_rate_layout = create_position_to_rate_plot(
+        gamma=1,
+        target_avg_rate=1,
+        norm_factors={key: {'factors': {'first_norm_factor': 1, 'second_norm_factor': 1}}
+                      for key in ('gamma-1', 'gamma', 'gamma+1')},
+        height=PLOT_HEIGHT
+    ).layout.to_plotly_json()
+    gamma_grid = np.round(np.arange(GAMMA_MIN, GAMMA_MAX + 1 + GAMMA_STEP / 2, GAMMA_STEP), 10).tolist()
+
+    @app.callback(
+        Output('norm-factor-store', 'data'),
+        [Input('position-sample-store', 'data'),
+         Input('floor-rate-slider', 'value'),
+         Input('population-average-rate-slider', 'value'),
+         Input('visualization-tabs', 'active_tab')]
+    )
+    def update_norm_factor_store(position_params, floor_rate, target_avg_rate, active_tab):
+        if active_tab != 'position-to-rate-tab':
+            return no_update
+        factors = cached_norm_factor_grid(position_params, gamma_grid, target_avg_rate, floor_rate)
+        return dict(
+            gammas=gamma_grid,
+            first_norm_factor=factors['first_norm_factor'].tolist(),
+            second_norm_factor=np.broadcast_to(factors['second_norm_factor'], len(gamma_grid)).tolist(),
+            target_avg_rate=target_avg_rate,
             floor_rate=floor_rate,
-            norm_factors=norm_factors,
-            height=PLOT_HEIGHT
+            num_points=POSITION_TO_RATE_POINTS,
+            layout=position_to_rate_layout,
         )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='mechanism', function_name='positionToRateFigure'),
+        Output('position-to-rate-plot', 'figure'),
+        [Input('norm-factor-store', 'data'),
+         Input('gamma-slider', 'drag_value'),
+         Input('gamma-slider', 'value')]
+    )
+
+    # The interaction figure is the expensive update, so it runs as a background job reporting
+    # progress. Identical in-flight requests from any worker share one computation via shared_result.
+    @app.callback(
+        Output('incarceration-plot', 'figure'),
+        [Input('rate-store', 'data'),
+         Input('visualization-tabs', 'active_tab')],
+        **background_progress_options('incarceration-progress')
+    )
+    def update_interaction_plot(set_progress, rate_params, active_tab):
+        if active_tab != 'disparity-generation-tab':
+            return no_update
         
-        # Create statistics display
-        stats = html.Div([
-            dbc.Row([
-                dbc.Col([
-                    html.P([
-                        html.Strong("Disadvantaged Group Rate: "), 
-                        f"{rate_data['rate_disadv']:.1f} per 100,000"
-                    ]),
-                    html.P([
-                        html.Strong("Advantaged Group Rate: "), 
-                        f"{rate_data['rate_adv']:.1f} per 100,000"
-                    ])
-                ], width=4),
-                dbc.Col([
-                    html.P([
-                        html.Strong("Population Average Rate: "), 
-                        f"{rate_data['pop_avg_rate']:.1f} per 100,000"
-                    ]),
-                    html.P([
-                        html.Strong("Disparity Ratio: "), 
-                        f"{rate_data['rate_disadv'] / rate_data['rate_adv']:.2f}"
-                    ])
-                ], width=4),
-                dbc.Col([
-                    html.P([
-                        html.Strong("Disparity Difference: "), 
-                        f"{rate_data['rate_disadv'] - rate_data['rate_adv']:.1f} per 100,000"
-                    ]),
-                    html.P([
-                        html.Strong("Normalized Disparity Index (η): "), 
-                        f"{(rate_data['rate_disadv'] / rate_data['rate_adv'] - 1) / (rate_data['rate_disadv'] / rate_data['rate_adv'] + (1-p)/p):.3f}"
-                    ])
-                ], width=4)
-            ])
-        ])
+        def create():
+            set_progress((0, 2))
+            rate_data = cached_normalized_rates(
+                rate_params['position_params'],
+                gamma=rate_params['gamma'],
+                target_avg_rate=rate_params['target_avg_rate'],
+                floor_rate=rate_params['floor_rate']
+            )
+            set_progress((1, 2))
+            
+            return create_mechanism_interaction_plot(
+                rate_data=rate_data,
+                gamma=rate_params['gamma'],
+                target_avg_rate=rate_params['target_avg_rate'],
+                positions=cached_stratification_positions(**rate_params['position_params']),
+                norm_factors={
+                    'first_norm_factor': rate_data['first_norm_factor'],
+                    'second_norm_factor': rate_data['second_norm_factor'],
+                    'total_norm_factor': rate_data['total_norm_factor']
+                },
+                binned=True,
+                max_markers_per_group=INTERACTION_MAX_MARKERS,
+                webgl=True,
+                height=PLOT_HEIGHT 
+            )
         
-        return incarceration_fig, position_fig, position_to_rate_fig, stats
+        return shared_result(('interaction', rate_params), create)
+
+    @app.callback(
+        Output('stats-container', 'children'),
+        Input('rate-store', 'data')
+    )
+    def update_stats(rate_params):
+        rate_data = cached_normalized_rates(
+            rate_params['position_params'],
+            gamma=rate_params['gamma'],
+            target_avg_rate=rate_params['target_avg_rate'],
+            floor_rate=rate_params['floor_rate']
+        )
+        sweep_estimate = None
+        if disparity_interpolator is not None:
+            position_params = dict(rate_params['position_params'])
+            position_params.pop('sample_size')
+            try:
+                sweep_estimate = disparity_interpolator(
+                    **position_params, gamma=rate_params['gamma'], min_rate=rate_params['floor_rate'],
+                    target_avg_rate=rate_params['target_avg_rate'])
+            except (KeyError, ValueError):
+                pass  # Slider values outside the stored sweep
+        return create_stats_panel(rate_data, p=rate_params['position_params']['p'], sweep_estimate=sweep_estimate)
     
     
     # Add new callback for parameter space analysis
@@ -158,35 +329,5 @@ def register_callbacks(app, simulation_results):
          ]
     )
     def update_parameter_space_plots(floor_rate, z_axis_variable, color_variable, correlation_method):
-        # You'll need to load or generate simulation_results here
-        # This should be your DataFrame containing the simulation results
-        # For now, I'll assume it's loaded from somewhere
-        
-        # Create all plots
-        param_corr = plot_parameter_metric_correlations(
-            simulation_results=simulation_results,
-            floor_rate=floor_rate,
-            spearman=correlation_method
-        )
-        
-        derived_corr = plot_derived_metric_correlations(
-            simulation_results=simulation_results,
-            min_rate=floor_rate,
-            spearman=correlation_method
-        )
-        
-        prob_plot = create_disparity_probability_plot(
-            simulation_results=simulation_results,
-            min_rate_value=floor_rate,
-            height=PLOT_HEIGHT
-        )
-        
-        sim_3d = create_simulation_3d_plot(
-            simulation_results=simulation_results,
-            min_rate=floor_rate,
-            z_col=z_axis_variable,
-            color_col=color_variable,
-            height=PLOT_HEIGHT
-        )
-        
-        return param_corr, derived_corr, prob_plot, sim_3d
\ No newline at end of file
+        return create_parameter_space_figures(simulation_results, figure_cache, floor_rate, z_axis_variable,
+                                              color_variable, correlation_method)
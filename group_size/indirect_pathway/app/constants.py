@@ -1,4 +1,5 @@
 import os
+import tempfile
 # Constants shared across modules
 PLOT_HEIGHT = 700
 PLOT_CARD_WIDTH = 9
@@ -6,3 +7,38 @@ PORT = 8052
 
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 APP_DATA_PATH = os.path.join(os.path.dirname(APP_ROOT), "output", "data")
+
+# Position samples kept by the mechanism explorer, and the seed they are drawn with
+POSITION_CACHE_SIZE = 32
+POSITION_SEED = 0
+
+# Rate calculations kept by the mechanism explorer
+RATE_CACHE_SIZE = 128
+
+# Gamma slider range; the norm-factor store covers it plus each value's gamma +/- 1 neighbours
+GAMMA_MIN = 0
+GAMMA_MAX = 5
+GAMMA_STEP = 0.1
+
+# Points per position-to-rate curve, as in create_position_to_rate_plot
+POSITION_TO_RATE_POINTS = 100
+
+# Individuals per group drawn as markers in the interaction plot
+INTERACTION_MAX_MARKERS = 1000
+
+# Parameter-space figure cache: 'memory' (per process) or 'filesystem' (shared by all workers)
+FIGURE_CACHE_BACKEND = os.environ.get("FIGURE_CACHE_BACKEND", "memory")
+FIGURE_CACHE_DIR = os.environ.get("FIGURE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "indirect_pathway_figures"))
+FIGURE_CACHE_SIZE = 256
+PREWARM_FIGURE_CACHE = os.environ.get("PREWARM_FIGURE_CACHE", "0") == "1"
+
+# Background callbacks: job results, progress and shared mechanism figures, for all workers
+BACKGROUND_CACHE_DIR = os.environ.get("BACKGROUND_CACHE_DIR",
+                                      os.path.join(tempfile.gettempdir(), "indirect_pathway_jobs"))
+BACKGROUND_RESULT_EXPIRE = 600  # seconds
+BACKGROUND_POLL_INTERVAL = 500  # milliseconds
+
+# Production server (gunicorn.conf.py): worker processes and threads per worker
+WEB_WORKERS = int(os.environ.get("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 4))
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", 120))
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for the app, configured through the environment:
+
+    WEB_CONCURRENCY       worker processes (default 2 * CPUs + 1)
+    WEB_THREADS           threads per worker (default 4)
+    WEB_TIMEOUT           seconds before a silent worker is restarted (default 120)
+    PORT                  port to bind (default constants.PORT)
+    FIGURE_CACHE_BACKEND  defaults to 'filesystem' so workers share cached figures
+"""
+import os
+import sys
+
+# Workers are separate processes, so parameter-space figures are cached on disk unless overridden
+os.environ.setdefault("FIGURE_CACHE_BACKEND", "filesystem")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from constants import PORT, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', PORT)}"
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread"
+timeout = WEB_TIMEOUT
+
+# Load the data and build the layout once in the master, then fork
+preload_app = True
@@ -1,6 +1,6 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html
-from constants import PLOT_HEIGHT, PLOT_CARD_WIDTH
+from constants import PLOT_HEIGHT, PLOT_CARD_WIDTH, GAMMA_MIN, GAMMA_MAX, GAMMA_STEP
 
 
 def create_controls_card():
@@ -60,7 +60,7 @@ def create_controls_card():
                 html.Label("Shape Parameter (γ):"),
                 dcc.Slider(
                     id='gamma-slider',
-                    min=0, max=5, step=0.1, value=1,
+                    min=GAMMA_MIN, max=GAMMA_MAX, step=GAMMA_STEP, value=1,
                     marks={i: str(i) for i in range(0, 6)},
                 ),
                 html.Label("Incarceration Rate Floor (per 100,000):"),
@@ -198,6 +198,12 @@ This two-step normalization process is critical for maintaining comparable scena
                                          "The disparity ratio (disadvantaged/advantaged) and normalized disparity index (η) quantify the level of inequality. ",
                                          "Observe how group size (proportion disadvantaged) interacts with stratification parameters to produce disparities."
                                      ], className="text-muted mb-2"),
+                                     # Shown while the background job for the plot is running
+                                     dbc.Progress(
+                                         id='incarceration-progress',
+                                         value=0, striped=True, animated=True,
+                                         style={'display': 'none'}, className="mb-2"
+                                     ),
                                      dcc.Graph(
                                          id='incarceration-plot',
                                          style={'height': '100%', 'width': '100%'}
@@ -224,11 +230,17 @@ Our analysis reveals an important distinction between unconstrained and constrai
                              ]
                              ),
                      ],
+                    id='visualization-tabs',
                     active_tab='disparity-generation-tab',
                     className="nav-justified"
                 )
             ])
-        ])
+        ]),
+        # Parameter keys of the server-side memoized positions and rates
+        dcc.Store(id='position-sample-store'),
+        dcc.Store(id='rate-store'),
+        # Norm factors over the gamma grid, from which the browser draws the position-to-rate curves
+        dcc.Store(id='norm-factor-store')
     ], gap=2)
 
 
@@ -349,7 +361,7 @@ The contrast between the unconstrained and constrained models reveals important
         ])
 
     # Get unique floor rate values from simulation results
-    floor_rate_values = sorted(simulation_results['min_rate'].unique())
+    floor_rate_values = sorted(simulation_results['min_rate'].unique().tolist())
     min_floor_rate = min(floor_rate_values)
     max_floor_rate = max(floor_rate_values)
     default_floor_rate = min_floor_rate
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import diskcache
+import numpy as np
+import pandas as pd
+import psutil
+from dash import DiskcacheManager
+
+from core.interpolation import GridInterpolator
+from core.result_cube import ResultCube
+from indirect_pathway.src.model.indirect_effect import (
+    generate_stratification_positions, calculate_incarceration_rates_normalized
+)
+from indirect_pathway.src.visualization.plots import RESULT_KEYS
+from constants import (
+    POSITION_CACHE_SIZE, POSITION_SEED, RATE_CACHE_SIZE, FIGURE_CACHE_SIZE,
+    BACKGROUND_CACHE_DIR, BACKGROUND_RESULT_EXPIRE
+)
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache.
+    
+    Parameters:
+    -----------
+    maxsize : int
+        Maximum number of entries kept; the least recently used entry is evicted first
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() and storing its result on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # Compute outside the lock so slow misses don't block hits for other keys
+        value = compute()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Position samples and rate calculations shared by the mechanism-explorer callbacks.
+# These caches are per process: every worker recomputes its own entries. Samples are
+# drawn with the fixed POSITION_SEED, so all workers hold identical values, and each
+# entry takes milliseconds to compute but megabytes to pickle. The expensive work is
+# shared one level up instead: shared_result keeps finished figures such as the
+# mechanism interaction plot in job_cache for every worker.
+position_cache = LRUCache(maxsize=POSITION_CACHE_SIZE)
+rate_cache = LRUCache(maxsize=RATE_CACHE_SIZE)
+norm_factor_cache = LRUCache(maxsize=RATE_CACHE_SIZE)
+
+
+def cached_stratification_positions(sample_size, p, mu_disadv, z_position_gap, c_disadv, c_adv, seed=POSITION_SEED):
+    """
+    Generate stratification positions, reusing the sample for repeated parameter values.
+    
+    Only these parameters affect positions, so changes to gamma, the floor rate or the
+    target rate reuse the cached sample. The returned dict is shared and must not be mutated.
+    """
+    key = (sample_size, p, mu_disadv, z_position_gap, c_disadv, c_adv, seed)
+    return position_cache.get_or_compute(key, lambda: generate_stratification_positions(
+        p=p,
+        mu_disadv=mu_disadv,
+        z_position_gap=z_position_gap,
+        c_disadv=c_disadv,
+        c_adv=c_adv,
+        sample_size=sample_size,
+        seed=seed,
+    ))
+
+
+def cached_normalized_rates(position_params, gamma, target_avg_rate, floor_rate):
+    """
+    Normalized incarceration rates for the cached position sample described by position_params
+    (keyword arguments of cached_stratification_positions). The returned dict is shared.
+    """
+    key = (tuple(sorted(position_params.items())), gamma, target_avg_rate, floor_rate)
+    return rate_cache.get_or_compute(key, lambda: calculate_incarceration_rates_normalized(
+        positions=cached_stratification_positions(**position_params),
+        gamma=gamma,
+        target_avg_rate=target_avg_rate,
+        floor_rate=floor_rate,
+    ))
+
+
+def cached_norm_factor_grid(position_params, gammas, target_avg_rate, floor_rate):
+    """
+    Normalization factors for every value in gammas on the cached position sample described
+    by position_params, computed in one vectorized pass.
+    
+    Returns:
+    --------
+    dict
+        'first_norm_factor' and 'second_norm_factor' arrays aligned with gammas
+    """
+    key = (tuple(sorted(position_params.items())), tuple(gammas), target_avg_rate, floor_rate)
+    return norm_factor_cache.get_or_compute(key, lambda: calculate_incarceration_rates_normalized(
+        positions=cached_stratification_positions(**position_params),
+        gamma=np.asarray(gammas)[:, np.newaxis],
+        target_avg_rate=target_avg_rate,
+        floor_rate=floor_rate,
+        return_only_factors=True,
+    ))
+
+
+def sweep_interpolator(simulation_results, metric='disparity_ratio', log=True):
+    """
+    GridInterpolator of a metric over the stored sweep, for estimates between its grid
+    points; None if the results do not form a dense grid over RESULT_KEYS.
+    """
+    try:
+        cube = ResultCube.from_frame(simulation_results, axes=RESULT_KEYS)
+    except ValueError:
+        return None
+    return GridInterpolator(cube, metric, log=log)
+
+
+def data_fingerprint(df):
+    """Short content hash of a DataFrame, used to namespace caches derived from it."""
+    return format(int(pd.util.hash_pandas_object(df, index=False).sum()), 'x')
+
+
+class FigureCache:
+    """
+    Cache of plotly figures keyed by tuples of plain values.
+    
+    Parameters:
+    -----------
+    backend : str
+        'memory' keeps figures in a per-process LRU cache; 'filesystem' stores their
+        JSON in directory, where every worker process can read them
+    directory : str, optional
+        Cache directory for the filesystem backend
+    namespace : str, optional
+        Prefix for all keys, e.g. a data fingerprint so figures of stale data are never served
+    maxsize : int, optional
+        Maximum number of figures held; the filesystem backend evicts the files least
+        recently read or written (by modification time) once the directory exceeds it
+    """
+    def __init__(self, backend='memory', directory=None, namespace='', maxsize=FIGURE_CACHE_SIZE):
+        if backend not in ('memory', 'filesystem'):
+            raise ValueError(f"backend must be 'memory' or 'filesystem', got {backend!r}")
+        if backend == 'filesystem':
+            if directory is None:
+                raise ValueError("directory must be provided for the filesystem backend")
+            os.makedirs(directory, exist_ok=True)
+        self.backend = backend
+        self.directory = directory
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self._memory = LRUCache(maxsize=maxsize)
+
+    def _key(self, key):
+        # Numpy scalars serialize like their Python counterparts, so slider values and data values match
+        return json.dumps([self.namespace, *key], default=float)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get_or_create(self, key, create):
+        """
+        Return the cached figure for key, calling create() and storing its result on a miss.
+        Filesystem hits are returned as figure dicts, which Dash accepts like Figure objects.
+        """
+        key = self._key(key)
+        if self.backend == 'memory':
+            return self._memory.get_or_compute(key, create)
+        
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                fig = json.load(f)
+            # Mark the figure as recently used for eviction
+            os.utime(path)
+            return fig
+        except (OSError, ValueError):
+            pass
+        
+        fig = create()
+        # Write to a temporary file first so other workers never read a partial figure
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(fig.to_json())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+        return fig
+
+    def _evict(self):
+        """Remove the least recently used figure files beyond maxsize."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        for _, path in sorted(entries)[:max(len(entries) - self.maxsize, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another worker
+                pass
+
+
+# Disk cache shared by every worker and background job: Dash keeps job results and progress
+# here, and shared_result memoizes the mechanism-explorer figures in it
+job_cache = diskcache.Cache(BACKGROUND_CACHE_DIR)
+background_callback_manager = DiskcacheManager(job_cache, expire=BACKGROUND_RESULT_EXPIRE)
+
+
+def _process_alive(pid):
+    """Whether pid is a running (not terminated or zombie) process."""
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+def shared_result(key, compute, cache=job_cache, expire=BACKGROUND_RESULT_EXPIRE, poll_interval=0.05):
+    """
+    Return compute() memoized under key in a cache shared by all processes.
+    
+    The first caller claims the key and computes; concurrent callers with the same key wait
+    for its result instead of repeating the work. A claim held by a process that has since
+    been terminated (e.g. a cancelled background job) is taken over.
+    
+    Parameters:
+    -----------
+    key : tuple
+        Plain values identifying the result
+    compute : callable
+        Called without arguments on a miss; its result must be picklable
+    cache : diskcache.Cache, optional
+        Cache holding results and claims
+    expire : float, optional
+        Seconds a result (or an abandoned claim) is kept
+    poll_interval : float, optional
+        Seconds between checks while waiting for another process's result
+    """
+    key = json.dumps(list(key), sort_keys=True, default=float)
+    claim_key = f"claim:{key}"
+    while True:
+        value = cache.get(key, default=diskcache.ENOVAL)
+        if value is not diskcache.ENOVAL:
+            return value
+        
+        if cache.add(claim_key, os.getpid(), expire=expire):
+            try:
+                value = compute()
+                cache.set(key, value, expire=expire)
+                return value
+            finally:
+                cache.delete(claim_key)
+        
+        owner = cache.get(claim_key)
+        if owner is not None and not _process_alive(owner):
+            with cache.transact():
+                if cache.get(claim_key) == owner:
+                    cache.delete(claim_key)
+            continue
+        time.sleep(poll_interval)
@@ -0,0 +1,9 @@
+"""
+WSGI entry point for production serving:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Importing app loads the data and registers the callbacks. With preload_app the
+master does this once and the workers share it copy-on-write.
+"""
+from app import server  # noqa: F401
@@ -1,6 +1,11 @@
 import numpy as np
 from scipy.stats import beta
 
+from core.simulation import joint_rate_model, declare_scale_invariance
+
+# Sampling schemes of draw_unit_samples, which validates them for every function drawing positions
+SAMPLING_METHODS = ('random', 'stratified', 'antithetic')
+
 def beta_params_from_mean_concentration(mean, concentration):
     """
     Calculate alpha and beta parameters for a beta distribution
@@ -25,7 +30,151 @@ def beta_params_from_mean_concentration(mean, concentration):
     
     return alpha, beta
 
-def generate_stratification_positions(p, mu_disadv, z_position_gap, c_disadv, c_adv, sample_size):
+def draw_unit_samples(n, sampling='random', rng=None, replicates=None):
+    """
+    Draw points in the unit interval to be mapped through an inverse CDF.
+    
+    Parameters:
+    -----------
+    n : int
+        Number of points to draw
+    sampling : str, optional
+        One of SAMPLING_METHODS:
+        - 'random': independent uniform draws
+        - 'stratified': one uniform draw inside each of n equal-width strata
+        - 'antithetic': interleaved pairs (u, 1-u)
+    rng : numpy.random.Generator, optional
+        Random generator (default: a freshly seeded generator)
+    replicates : int, optional
+        If given, draw this many independent rows of n points
+        
+    Returns:
+    --------
+    numpy.ndarray
+        Array of shape (n,) or (replicates, n) with points in (0,1), laid out along the
+        last axis as expected by estimate_mean_standard_error
+    """
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError(f"sampling must be one of {SAMPLING_METHODS}, got {sampling!r}")
+    rng = np.random.default_rng(rng)
+    shape = (n,) if replicates is None else (replicates, n)
+    
+    if n <= 0:
+        return np.empty(shape)
+    
+    if sampling == 'stratified':
+        return (np.arange(n) + rng.random(shape)) / n
+    
+    if sampling == 'antithetic':
+        half = rng.random(shape[:-1] + ((n + 1) // 2,))
+        return np.stack([half, 1 - half], axis=-1).reshape(shape[:-1] + (-1,))[..., :n]
+    
+    return rng.random(shape)
+
+def _nan_per_row(values):
+    """nan for a 1-D sample, or an array of nans with one entry per row of a 2-D sample."""
+    return np.nan if values.ndim == 1 else np.full(values.shape[:-1], np.nan)
+
+def estimate_mean_standard_error(values, sampling='random', blocks=None):
+    """
+    Estimate the standard error of np.mean(values, axis=-1) for values computed
+    elementwise from points drawn with draw_unit_samples.
+    
+    Parameters:
+    -----------
+    values : numpy.ndarray
+        Per-individual values (e.g. incarceration rates) in sampling order along the last axis
+    sampling : str, optional
+        Sampling scheme used to draw the underlying points
+    blocks : list of int, optional
+        Sizes of the independently drawn batches laid end to end along the last axis
+        (default: a single batch)
+        
+    Returns:
+    --------
+    float or numpy.ndarray
+        Estimated standard error, one per row for 2-D input
+        (nan where a batch is too small to estimate it from)
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    if n < 2:
+        return _nan_per_row(values)
+    
+    if sampling == 'antithetic':
+        # Pair means are independent; an odd trailing value is left out
+        paired = values[..., :n - n % 2].reshape(values.shape[:-1] + (-1, 2))
+        pair_means = paired.mean(axis=-1)
+        if pair_means.shape[-1] < 2:
+            return _nan_per_row(values)
+        return np.std(pair_means, axis=-1, ddof=1) / np.sqrt(pair_means.shape[-1])
+    
+    if sampling == 'stratified':
+        variance = 0
+        for block in np.split(values, np.cumsum(blocks)[:-1], axis=-1) if blocks is not None else [values]:
+            if block.shape[-1] == 0:
+                continue
+            if block.shape[-1] < 3:
+                return _nan_per_row(values)
+            variance = variance + _stratified_variance_sum(block)
+        return np.sqrt(variance) / n
+    
+    return np.std(values, axis=-1, ddof=1) / np.sqrt(n)
+
+def _stratified_variance_sum(values):
+    """
+    Estimated sum of the within-stratum variances of values drawn one per stratum.
+    
+    Second differences cancel the drift of the stratum means, leaving six times the
+    variance of an interior stratum. The two edge strata, where the inverse CDF is
+    steepest, usually dominate the sum, so each is estimated from its neighbouring
+    second difference alone.
+    """
+    second_differences = values[..., 2:] - 2 * values[..., 1:-1] + values[..., :-2]
+    squared = second_differences ** 2
+    return np.sum(squared, axis=-1) / 6 + squared[..., 0] + squared[..., -1]
+
+def estimate_ratio_standard_error(rate_disadv, rate_adv, rate_disadv_se, rate_adv_se):
+    """
+    First-order (delta method) standard error of rate_disadv / rate_adv,
+    treating the two group means as independent.
+    """
+    rate_disadv = np.asarray(rate_disadv, dtype=float)
+    rate_adv = np.asarray(rate_adv, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = rate_disadv / rate_adv
+        ratio_se = ratio * np.sqrt((rate_disadv_se / rate_disadv) ** 2 + (rate_adv_se / rate_adv) ** 2)
+    return np.where((rate_adv > 0) & (rate_disadv > 0), ratio_se, np.nan)[()]
+
+def group_beta_params(mu_disadv, z_position_gap, c_disadv, c_adv):
+    """
+    Beta distribution parameters of both groups' positions.
+    
+    Returns:
+    --------
+    tuple
+        (mu_adv, (alpha_disadv, beta_disadv), (alpha_adv, beta_adv))
+    """
+    # Calculate mu_adv based on mu_disadv and z_position_gap
+    mu_adv = mu_disadv + z_position_gap
+    
+    # Ensure mu_adv is within valid range (0,1)
+    mu_adv = min(max(mu_adv, 0.001), 0.999)
+    
+    return (mu_adv,
+            beta_params_from_mean_concentration(mu_disadv, c_disadv),
+            beta_params_from_mean_concentration(mu_adv, c_adv))
+
+def draw_group_positions(alpha, beta_param, n, sampling='random', rng=None, replicates=None):
+    """
+    Draw n positions for one group from Beta(alpha, beta_param) using the given sampling scheme.
+    """
+    rng = np.random.default_rng(rng)
+    if sampling == 'random':
+        return beta.rvs(alpha, beta_param, size=n if replicates is None else (replicates, n), random_state=rng)
+    return beta.ppf(draw_unit_samples(n, sampling, rng, replicates), alpha, beta_param)
+
+def generate_stratification_positions(p, mu_disadv, z_position_gap, c_disadv, c_adv, sample_size, sampling='random', seed=None, replicates=None):
     """
     Generate positions in the stratification dimension Z for both groups
     using beta distributions.
@@ -44,35 +193,38 @@ def generate_stratification_positions(p, mu_disadv, z_position_gap, c_disadv, c_
         Concentration parameter for advantaged group
     sample_size : int
         Total number of individuals to simulate
+    sampling : str, optional
+        Sampling scheme, one of SAMPLING_METHODS (default='random'). Every scheme other
+        than 'random' uses inverse-CDF sampling (beta.ppf) on the points from draw_unit_samples.
+    seed : int or numpy.random.Generator, optional
+        Seed for reproducible draws (default: fresh entropy on each call)
+    replicates : int, optional
+        If given, draw this many independent populations at once. Position arrays then
+        have shape (replicates, n) while group assignments stay 1-D.
         
     Returns:
     --------
     dict
         Dictionary with positions for both groups and group assignments
     """
-    # Calculate mu_adv based on mu_disadv and z_position_gap
-    mu_adv = mu_disadv + z_position_gap
+    rng = np.random.default_rng(seed)
     
-    # Ensure mu_adv is within valid range (0,1)
-    mu_adv = min(max(mu_adv, 0.001), 0.999)
+    mu_adv, (alpha_disadv, beta_disadv), (alpha_adv, beta_adv) = group_beta_params(
+        mu_disadv, z_position_gap, c_disadv, c_adv)
     
     # Calculate number of individuals in each group
     n_disadv = int(p * sample_size)
     n_adv = sample_size - n_disadv
     
-    # Calculate beta distribution parameters
-    alpha_disadv, beta_disadv = beta_params_from_mean_concentration(mu_disadv, c_disadv)
-    alpha_adv, beta_adv = beta_params_from_mean_concentration(mu_adv, c_adv)
-    
     # Generate positions from beta distributions
-    positions_disadv = beta.rvs(alpha_disadv, beta_disadv, size=n_disadv)
-    positions_adv = beta.rvs(alpha_adv, beta_adv, size=n_adv)
+    positions_disadv = draw_group_positions(alpha_disadv, beta_disadv, n_disadv, sampling, rng, replicates)
+    positions_adv = draw_group_positions(alpha_adv, beta_adv, n_adv, sampling, rng, replicates)
     
     # Create group assignments (1 for disadvantaged, 0 for advantaged)
     groups = np.concatenate([np.ones(n_disadv), np.zeros(n_adv)])
     
     # Combine positions
-    all_positions = np.concatenate([positions_disadv, positions_adv])
+    all_positions = np.concatenate([positions_disadv, positions_adv], axis=-1)
     
     return {
         'positions': all_positions,
@@ -83,7 +235,30 @@ def generate_stratification_positions(p, mu_disadv, z_position_gap, c_disadv, c_
         'alpha_disadv': alpha_disadv,
         'beta_disadv': beta_disadv,
         'alpha_adv': alpha_adv,
-        'beta_adv': beta_adv
+        'beta_adv': beta_adv,
+        'sampling': sampling
+    }
+
+def group_rate_standard_errors(rates_disadv, rates_adv, rate_disadv, rate_adv, sampling='random',
+                               blocks_disadv=None, blocks_adv=None):
+    """
+    Standard errors of the group-level rates and of the disparity ratio.
+    
+    Normalization factors are treated as fixed, so the errors are conditional on them.
+    blocks_disadv and blocks_adv give the batch sizes of adaptively drawn samples
+    (see estimate_mean_standard_error).
+    
+    Returns:
+    --------
+    dict
+        Dictionary with rate_disadv_se, rate_adv_se and disparity_ratio_se
+    """
+    rate_disadv_se = estimate_mean_standard_error(rates_disadv, sampling, blocks_disadv)
+    rate_adv_se = estimate_mean_standard_error(rates_adv, sampling, blocks_adv)
+    return {
+        'rate_disadv_se': rate_disadv_se,
+        'rate_adv_se': rate_adv_se,
+        'disparity_ratio_se': estimate_ratio_standard_error(rate_disadv, rate_adv, rate_disadv_se, rate_adv_se)
     }
 
 def calculate_incarceration_rates_non_normalized(positions, gamma, max_rate):
@@ -103,7 +278,7 @@ def calculate_incarceration_rates_non_normalized(positions, gamma, max_rate):
     Returns:
     --------
     dict
-        Dictionary with incarceration rates for both groups
+        Dictionary with incarceration rates and their standard errors for both groups
     """
     
     # Extract positions for each group
@@ -119,12 +294,14 @@ def calculate_incarceration_rates_non_normalized(positions, gamma, max_rate):
     rates_adv = max_rate * effect_adv
     
     # Calculate group-level rates (average)
-    rate_disadv = np.mean(rates_disadv)
-    rate_adv = np.mean(rates_adv)
+    rate_disadv = np.mean(rates_disadv, axis=-1)
+    rate_adv = np.mean(rates_adv, axis=-1)
     
     return {
         'rate_disadv': rate_disadv,
-        'rate_adv': rate_adv
+        'rate_adv': rate_adv,
+        **group_rate_standard_errors(rates_disadv, rates_adv, rate_disadv, rate_adv,
+                                     sampling=positions.get('sampling', 'random'))
     }
 
 import numpy as np
@@ -136,7 +313,7 @@ def normalize_rates_to_target(rates, target_avg_rate):
     Parameters:
     -----------
     rates : numpy.ndarray
-        Array of rates to normalize
+        Array of rates to normalize (each row separately for 2-D input)
     target_avg_rate : float
         Target average rate to achieve
         
@@ -145,9 +322,9 @@ def normalize_rates_to_target(rates, target_avg_rate):
     tuple
         (normalized_rates, normalization_factor)
     """
-    current_avg = np.mean(rates)
+    current_avg = np.mean(rates, axis=-1)
     norm_factor = target_avg_rate / current_avg
-    normalized_rates = rates * norm_factor
+    normalized_rates = rates * np.expand_dims(norm_factor, -1)
     
     return normalized_rates, norm_factor
 
@@ -186,21 +363,24 @@ def calculate_incarceration_rates_normalized(positions, gamma, target_avg_rate,
     """
     Calculate incarceration rates based on positions in the stratification dimension
     using the normalized approach to maintain a constant population-average rate.
+    
+    Position arrays of shape (replicates, n) are normalized row by row, and the
+    group-level results then have shape (replicates,).
     """
     # Extract positions for each group
     positions_disadv = positions['positions_disadv']
     positions_adv = positions['positions_adv']
-    all_positions = positions['positions'] if 'positions' in positions else np.concatenate([positions_disadv, positions_adv])
+    all_positions = positions['positions'] if 'positions' in positions else np.concatenate([positions_disadv, positions_adv], axis=-1)
     
     # Calculate base position effect: (1-z)^gamma for all positions
     all_base_effects = np.power(1 - all_positions, gamma)
     
     # First normalization: adjust for expected effect
-    expected_effect = np.mean(all_base_effects)
+    expected_effect = np.mean(all_base_effects, axis=-1)
     first_norm_factor = 1 / expected_effect
     
     # Calculate initial normalized rates (without floor)
-    initial_rates_all = target_avg_rate * all_base_effects * first_norm_factor
+    initial_rates_all = target_avg_rate * all_base_effects * np.expand_dims(first_norm_factor, -1)
     
     # Apply floor if specified
     if floor_rate > 0:
@@ -226,8 +406,8 @@ def calculate_incarceration_rates_normalized(positions, gamma, target_avg_rate,
     adv_base_effects = np.power(1 - positions_adv, gamma)
     
     # Apply normalization factors to calculate rates
-    initial_rates_disadv = target_avg_rate * disadv_base_effects * first_norm_factor
-    initial_rates_adv = target_avg_rate * adv_base_effects * first_norm_factor
+    initial_rates_disadv = target_avg_rate * disadv_base_effects * np.expand_dims(first_norm_factor, -1)
+    initial_rates_adv = target_avg_rate * adv_base_effects * np.expand_dims(first_norm_factor, -1)
     
     # Apply floor if needed
     if floor_rate > 0:
@@ -236,22 +416,23 @@ def calculate_incarceration_rates_normalized(positions, gamma, target_avg_rate,
         rates_with_floor_adv = apply_floor_constraint(initial_rates_adv, floor_rate)
         
         # Apply second normalization
-        rates_disadv = rates_with_floor_disadv * second_norm_factor
-        rates_adv = rates_with_floor_adv * second_norm_factor
+        rates_disadv = rates_with_floor_disadv * np.expand_dims(second_norm_factor, -1)
+        rates_adv = rates_with_floor_adv * np.expand_dims(second_norm_factor, -1)
     else:
         rates_disadv = initial_rates_disadv
         rates_adv = initial_rates_adv
     
     # Calculate group-level rates (average)
-    rate_disadv = np.mean(rates_disadv)
-    rate_adv = np.mean(rates_adv)
+    rate_disadv = np.mean(rates_disadv, axis=-1)
+    rate_adv = np.mean(rates_adv, axis=-1)
+    all_rates = np.concatenate([rates_disadv, rates_adv], axis=-1)
     
     # Create return data structure with all the relevant information
-    groups = np.concatenate([np.ones(len(positions_disadv)), np.zeros(len(positions_adv))])
+    groups = np.concatenate([np.ones(positions_disadv.shape[-1]), np.zeros(positions_adv.shape[-1])])
     
     return {
         'all_positions': all_positions,
-        'all_rates': np.concatenate([rates_disadv, rates_adv]),
+        'all_rates': all_rates,
         'groups': groups,
         'rate_disadv': rate_disadv,
         'rate_adv': rate_adv,
@@ -259,14 +440,232 @@ def calculate_incarceration_rates_normalized(positions, gamma, target_avg_rate,
         'positions_adv': positions_adv,
         'rates_disadv': rates_disadv,
         'rates_adv': rates_adv,
-        'pop_avg_rate': np.mean(np.concatenate([rates_disadv, rates_adv])),
+        'pop_avg_rate': np.mean(all_rates, axis=-1),
         'first_norm_factor': first_norm_factor,
         'second_norm_factor': second_norm_factor,
         'total_norm_factor': first_norm_factor * second_norm_factor,
         'floor_rate': floor_rate,
-        'effective_floor': floor_rate * second_norm_factor
+        'effective_floor': floor_rate * second_norm_factor,
+        **group_rate_standard_errors(rates_disadv, rates_adv, rate_disadv, rate_adv,
+                                     sampling=positions.get('sampling', 'random'),
+                                     blocks_disadv=positions.get('blocks_disadv'),
+                                     blocks_adv=positions.get('blocks_adv'))
     }
     
+def calculate_indirect_model_rates(positions, gamma, normalized=False, max_rate=None, min_rate=None, target_avg_rate=None):
+    """
+    Calculate incarceration rates from generated positions with the normalized or
+    non-normalized approach.
+    
+    Returns:
+    --------
+    dict
+        Output of calculate_incarceration_rates_normalized or calculate_incarceration_rates_non_normalized
+    """
+    if normalized:
+        if target_avg_rate is None:
+            raise ValueError("target_avg_rate must be provided when normalized=True")
+        
+        return calculate_incarceration_rates_normalized(
+            positions=positions,
+            gamma=gamma,
+            target_avg_rate=target_avg_rate,
+            floor_rate=min_rate
+        )
+    return calculate_incarceration_rates_non_normalized(
+        positions=positions,
+        gamma=gamma,
+        max_rate=max_rate
+    )
+
+def adaptive_incarceration_rates_normalized(
+    p,
+    gamma,
+    target_avg_rate,
+    rel_tol,
+    floor_rate=0,
+    mu_disadv=0.3,
+    z_position_gap=0.4,
+    c_disadv=5,
+    c_adv=5,
+    initial_sample_size=1000,
+    max_sample_size=100000,
+    growth_factor=2,
+    sampling='random',
+    seed=None
+    ):
+    """
+    Calculate normalized incarceration rates, drawing individuals in growing batches
+    until the disparity ratio reaches a relative precision.
+    
+    After each batch the rates are recomputed on all individuals drawn so far and the
+    run stops once disparity_ratio_se / disparity_ratio <= rel_tol (to first order this
+    is the standard error of the log ratio) or max_sample_size is reached. The total
+    sample grows geometrically, so the repeated recomputation costs at most a constant
+    factor over a single evaluation at the final size.
+    
+    Parameters:
+    -----------
+    rel_tol : float
+        Target relative standard error of the disparity ratio
+    initial_sample_size : int
+        Size of the first batch
+    max_sample_size : int
+        Maximum number of individuals to draw
+    growth_factor : float
+        Factor by which the total sample grows after each batch
+    sampling : str
+        One of SAMPLING_METHODS. With 'antithetic' each group's batch is rounded
+        up to an even size, so the realized size can exceed max_sample_size by 2.
+    
+    Other parameters are as in generate_stratification_positions and
+    calculate_incarceration_rates_normalized.
+        
+    Returns:
+    --------
+    dict
+        Output of calculate_incarceration_rates_normalized for the final sample, with
+        'realized_sample_size' and 'relative_standard_error' added
+    """
+    rng = np.random.default_rng(seed)
+    
+    _, (alpha_disadv, beta_disadv), (alpha_adv, beta_adv) = group_beta_params(
+        mu_disadv, z_position_gap, c_disadv, c_adv)
+    
+    batches_disadv, batches_adv = [], []
+    n_disadv = n_adv = 0
+    sample_size = initial_sample_size
+    while True:
+        # Top both groups up to their share of the current total
+        increment_disadv = max(int(p * sample_size) - n_disadv, 0)
+        increment_adv = max(sample_size - int(p * sample_size) - n_adv, 0)
+        if sampling == 'antithetic':
+            # Keep pairs inside a batch so the pair-based error estimator stays valid
+            increment_disadv += increment_disadv % 2
+            increment_adv += increment_adv % 2
+        batches_disadv.append(draw_group_positions(alpha_disadv, beta_disadv, increment_disadv, sampling, rng))
+        batches_adv.append(draw_group_positions(alpha_adv, beta_adv, increment_adv, sampling, rng))
+        n_disadv += increment_disadv
+        n_adv += increment_adv
+        
+        positions = {
+            'positions_disadv': np.concatenate(batches_disadv),
+            'positions_adv': np.concatenate(batches_adv),
+            'blocks_disadv': [len(batch) for batch in batches_disadv],
+            'blocks_adv': [len(batch) for batch in batches_adv],
+            'sampling': sampling
+        }
+        rates = calculate_incarceration_rates_normalized(
+            positions=positions,
+            gamma=gamma,
+            target_avg_rate=target_avg_rate,
+            floor_rate=floor_rate
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_se = rates['disparity_ratio_se'] * rates['rate_adv'] / rates['rate_disadv']
+        
+        if relative_se <= rel_tol or sample_size >= max_sample_size:
+            break
+        sample_size = min(int(np.ceil(sample_size * growth_factor)), max_sample_size)
+    
+    rates['realized_sample_size'] = n_disadv + n_adv
+    rates['relative_standard_error'] = relative_se
+    return rates
+
+@declare_scale_invariance('target_avg_rate', co_scaled=('min_rate',), when={'normalized': True})
+@joint_rate_model
+def indirect_model_group_rates(
+    p,
+    gamma,
+    max_rate=None,
+    min_rate=None,
+    mu_disadv=0.3,
+    z_position_gap=0.4,
+    c_disadv=5,
+    c_adv=5,
+    sample_size=10000,
+    normalized=False,
+    target_avg_rate=None,
+    sampling='random',
+    seed=None,
+    rel_tol=None,
+    initial_sample_size=1000,
+    max_sample_size=None,
+    **kwargs
+    ):
+    """
+    Calculate incarceration rates for both groups of the indirect pathway model from a
+    single population draw.
+    
+    Takes the same parameters as indirect_model_incarceration_rate. If rel_tol is given
+    (normalized approach only), the sample grows adaptively from initial_sample_size
+    until the disparity ratio reaches that relative standard error or the sample reaches
+    max_sample_size (default: sample_size, so no cell draws more than at a fixed size);
+    see adaptive_incarceration_rates_normalized.
+    
+    Returns:
+    --------
+    dict
+        rate_disadv, rate_adv and disparity_ratio_se (left to the replicate summary
+        when replicates are given), plus realized_sample_size in adaptive mode
+    """
+    if rel_tol is not None:
+        if kwargs.get('replicates') is not None:
+            raise ValueError("adaptive sample sizes (rel_tol) cannot be combined with replicates")
+        if not normalized:
+            raise ValueError("adaptive sample sizes (rel_tol) require normalized=True")
+        if target_avg_rate is None:
+            raise ValueError("target_avg_rate must be provided when normalized=True")
+        if max_sample_size is None:
+            max_sample_size = sample_size
+        rates = adaptive_incarceration_rates_normalized(
+            p=p,
+            gamma=gamma,
+            target_avg_rate=target_avg_rate,
+            rel_tol=rel_tol,
+            floor_rate=min_rate,
+            mu_disadv=mu_disadv,
+            z_position_gap=z_position_gap,
+            c_disadv=c_disadv,
+            c_adv=c_adv,
+            initial_sample_size=min(initial_sample_size, max_sample_size),
+            max_sample_size=max_sample_size,
+            sampling=sampling,
+            seed=seed
+        )
+        return {
+            'rate_disadv': rates['rate_disadv'],
+            'rate_adv': rates['rate_adv'],
+            'realized_sample_size': rates['realized_sample_size'],
+            'disparity_ratio_se': rates['disparity_ratio_se']
+        }
+    
+    # Fixed sample size: evaluate both groups on the same population
+    positions = generate_stratification_positions(
+        p=p,
+        mu_disadv=mu_disadv,
+        z_position_gap=z_position_gap,
+        c_disadv=c_disadv,
+        c_adv=c_adv,
+        sample_size=sample_size,
+        sampling=sampling,
+        seed=seed,
+        replicates=kwargs.get('replicates')
+    )
+    rates = calculate_indirect_model_rates(
+        positions=positions,
+        gamma=gamma,
+        normalized=normalized,
+        max_rate=max_rate,
+        min_rate=min_rate,
+        target_avg_rate=target_avg_rate
+    )
+    result = {'rate_disadv': rates['rate_disadv'], 'rate_adv': rates['rate_adv']}
+    if kwargs.get('replicates') is None:
+        result['disparity_ratio_se'] = rates['disparity_ratio_se']
+    return result
+
+@declare_scale_invariance('target_avg_rate', co_scaled=('min_rate',), when={'normalized': True})
 def indirect_model_incarceration_rate(
     group, 
     p, 
@@ -279,7 +678,10 @@ def indirect_model_incarceration_rate(
     c_adv=5, 
     sample_size=10000,
     normalized=False,
-    target_avg_rate=None
+    target_avg_rate=None,
+    sampling='random',
+    seed=None,
+    replicates=None
     ):
     """
     Calculate incarceration rates for the indirect pathway model.
@@ -308,11 +710,17 @@ def indirect_model_incarceration_rate(
         Whether to use the normalized approach (True) or non-normalized approach (False)
     target_avg_rate : float
         Target population-average incarceration rate for normalized approach
+    sampling : str
+        Position sampling scheme, one of SAMPLING_METHODS
+    seed : int, optional
+        Seed for the position draws. With a fixed seed both groups' rates come from the same draw.
+    replicates : int, optional
+        Number of independent populations to evaluate at once as (replicates, n) arrays
         
     Returns:
     --------
-    float
-        Incarceration rate for the specified group
+    float or numpy.ndarray
+        Incarceration rate for the specified group (one per replicate if replicates is given)
     """
     # Generate positions for both groups
     positions = generate_stratification_positions(
@@ -321,26 +729,21 @@ def indirect_model_incarceration_rate(
         z_position_gap=z_position_gap,
         c_disadv=c_disadv,
         c_adv=c_adv,
-        sample_size=sample_size
+        sample_size=sample_size,
+        sampling=sampling,
+        seed=seed,
+        replicates=replicates
     )
     
     # Calculate incarceration rates using appropriate method
-    if normalized:
-        if target_avg_rate is None:
-            raise ValueError("target_avg_rate must be provided when normalized=True")
-        
-        rates = calculate_incarceration_rates_normalized(
-            positions=positions,
-            gamma=gamma,
-            target_avg_rate=target_avg_rate,
-            floor_rate=min_rate
-        )
-    else:
-        rates = calculate_incarceration_rates_non_normalized(
-            positions=positions,
-            gamma=gamma,
-            max_rate=max_rate
-        )
+    rates = calculate_indirect_model_rates(
+        positions=positions,
+        gamma=gamma,
+        normalized=normalized,
+        max_rate=max_rate,
+        min_rate=min_rate,
+        target_avg_rate=target_avg_rate
+    )
     
     # Return rate for the requested group
     if group == 'disadvantaged':
@@ -0,0 +1,222 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from core.disparity_measures import calculate_disparity_measures_array
+from indirect_pathway.src.model.indirect_effect import (
+    group_beta_params,
+    draw_group_positions,
+    estimate_ratio_standard_error
+)
+
+# Sampling schemes for which every prefix of a draw is itself a valid sample
+PREFIX_SAMPLING_METHODS = ('random', 'antithetic')
+
+# Parameters of indirect_model_group_rates supported by the prefix sweep, with their defaults
+PREFIX_SWEEP_DEFAULTS = {
+    'mu_disadv': 0.3,
+    'z_position_gap': 0.4,
+    'c_disadv': 5,
+    'c_adv': 5,
+    'sampling': 'random',
+    'sample_size': 10000,
+    'normalized': False,
+    'target_avg_rate': None,
+    'max_rate': None,
+    'min_rate': None,
+}
+
+# Parameters that determine the position distributions (one draw per combination)
+DRAW_PARAMS = ('mu_disadv', 'z_position_gap', 'c_disadv', 'c_adv', 'sampling')
+
+# Parameters that only change how rates are computed from the drawn positions
+RATE_PARAMS = ('normalized', 'target_avg_rate', 'max_rate', 'min_rate')
+
+
+def prefix_group_rates(base_sums_disadv, base_sums_adv, n_disadv, n_adv, normalized, target_avg_rate=None,
+                       max_rate=None, min_rate=None):
+    """
+    Group-level incarceration rates from sums of position effects (1-z)^gamma.
+
+    Equivalent to calculate_incarceration_rates_normalized (or _non_normalized) on the
+    individuals behind the sums. With a floor f the shifted rates average to
+    target_avg_rate + f, so the second normalization factor is target_avg_rate / (target_avg_rate + f).
+
+    Parameters:
+    -----------
+    base_sums_disadv, base_sums_adv : numpy.ndarray
+        Sums of position effects over each group's individuals
+    n_disadv, n_adv : numpy.ndarray
+        Number of individuals behind each sum
+
+    Returns:
+    --------
+    tuple
+        (rate_disadv, rate_adv) arrays
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_disadv = base_sums_disadv / n_disadv
+        mean_adv = base_sums_adv / n_adv
+
+        if not normalized:
+            return max_rate * mean_disadv, max_rate * mean_adv
+        if target_avg_rate is None:
+            raise ValueError("target_avg_rate must be provided when normalized=True")
+
+        first_norm_factor = (n_disadv + n_adv) / (base_sums_disadv + base_sums_adv)
+        rate_disadv = target_avg_rate * mean_disadv * first_norm_factor
+        rate_adv = target_avg_rate * mean_adv * first_norm_factor
+
+    if min_rate is not None and min_rate > 0:
+        second_norm_factor = target_avg_rate / (target_avg_rate + min_rate)
+        rate_disadv = (rate_disadv + min_rate) * second_norm_factor
+        rate_adv = (rate_adv + min_rate) * second_norm_factor
+    return rate_disadv, rate_adv
+
+
+def prefix_cumulative_moments(effects, sampling):
+    """
+    Cumulative sums behind prefix_mean_standard_errors: the running sum and sum of
+    squares of the independent units of a draw (individuals, or antithetic pair means).
+    """
+    units = effects if sampling != 'antithetic' else (effects[0:len(effects) - 1:2] + effects[1::2]) / 2
+    return (np.concatenate([[0.0], np.cumsum(units)]),
+            np.concatenate([[0.0], np.cumsum(units ** 2)]))
+
+
+def prefix_mean_standard_errors(cumulative_moments, n, sampling):
+    """
+    Standard errors of the mean effect over the first n individuals of a draw, as
+    estimate_mean_standard_error gives for each prefix (nan below two units).
+    """
+    cumulative, cumulative_squares = cumulative_moments
+    units = n // 2 if sampling == 'antithetic' else n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sums = cumulative[units]
+        variance = (cumulative_squares[units] - sums ** 2 / units) / (units - 1)
+        standard_errors = np.sqrt(np.maximum(variance, 0) / units)
+    return np.where(units > 1, standard_errors, np.nan)
+
+
+def prefix_rate_standard_errors(rate, effect_sum, effect_sum_se, normalized, target_avg_rate=None, max_rate=None,
+                                min_rate=None):
+    """
+    Standard error of a group rate from prefix_group_rates, treating the normalization
+    factors as fixed: the rate less its floor contribution is proportional to the
+    group's sum of position effects.
+    """
+    floor_part = 0
+    if normalized and min_rate is not None and min_rate > 0:
+        floor_part = min_rate * target_avg_rate / (target_avg_rate + min_rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (rate - floor_part) / effect_sum * effect_sum_se
+
+
+def run_prefix_sweep_simulation(param_dict, seed=None) -> pd.DataFrame:
+    """
+    Run a factorial simulation of the indirect pathway model, reusing one population draw
+    across all values of p and sample_size.
+
+    Changing p or sample_size only changes how many individuals are drawn from each
+    group's beta distribution. For each combination of DRAW_PARAMS the largest needed
+    per-group sample is drawn once, and every (p, sample_size) cell is evaluated on
+    prefixes of it through cumulative sums of the position effects. Results are
+    therefore coupled (common random numbers) across p and sample_size.
+
+    Parameters:
+    -----------
+    param_dict : dict
+        Parameter values as for run_factorial_simulation with indirect_model_group_rates.
+        Must contain 'p' and 'gamma'; other keys must be in PREFIX_SWEEP_DEFAULTS.
+    seed : int, optional
+        Seed for the population draws
+
+    Returns:
+    --------
+    pd.DataFrame
+        Same rows (in the same order) and columns as run_factorial_simulation
+    """
+    param_names = list(param_dict.keys())
+    unsupported = set(param_names) - set(PREFIX_SWEEP_DEFAULTS) - {'p', 'gamma'}
+    if unsupported or not {'p', 'gamma'} <= set(param_names):
+        raise ValueError(f"prefix sweep requires 'p' and 'gamma' and supports {list(PREFIX_SWEEP_DEFAULTS)}; "
+                         f"got unsupported parameters {sorted(unsupported)}")
+    values = {name: list(param_dict.get(name, [default])) for name, default in PREFIX_SWEEP_DEFAULTS.items()}
+    values['p'] = list(param_dict['p'])
+    values['gamma'] = list(param_dict['gamma'])
+    bad_sampling = set(values['sampling']) - set(PREFIX_SAMPLING_METHODS)
+    if bad_sampling:
+        raise ValueError(f"prefix sweep supports sampling in {PREFIX_SAMPLING_METHODS}, got {sorted(bad_sampling)}")
+
+    rng = np.random.default_rng(seed)
+
+    # Group sizes for every (p, sample_size) cell, as in generate_stratification_positions
+    p_grid, size_grid = np.meshgrid(np.asarray(values['p'], dtype=float),
+                                    np.asarray(values['sample_size'], dtype=int), indexing='ij')
+    n_disadv = (p_grid * size_grid).astype(int)
+    n_adv = size_grid - n_disadv
+
+    # Rates are filled into arrays with one axis per parameter, in canonical order
+    canonical_axes = ('p', 'sample_size', 'gamma') + DRAW_PARAMS + RATE_PARAMS
+    canonical_shape = tuple(len(values[name]) for name in canonical_axes)
+    rate_disadv = np.empty(canonical_shape)
+    rate_adv = np.empty(canonical_shape)
+    disparity_ratio_se = np.empty(canonical_shape)
+
+    for draw_values in itertools.product(*(enumerate(values[name]) for name in DRAW_PARAMS)):
+        draw_index = tuple(i for i, _ in draw_values)
+        mu_disadv, z_position_gap, c_disadv, c_adv, sampling = (value for _, value in draw_values)
+
+        _, (alpha_disadv, beta_disadv), (alpha_adv, beta_adv) = group_beta_params(
+            mu_disadv, z_position_gap, c_disadv, c_adv)
+        positions_disadv = draw_group_positions(alpha_disadv, beta_disadv, n_disadv.max(), sampling, rng)
+        positions_adv = draw_group_positions(alpha_adv, beta_adv, n_adv.max(), sampling, rng)
+
+        for gamma_index, gamma in enumerate(values['gamma']):
+            effects_disadv = np.power(1 - positions_disadv, gamma)
+            effects_adv = np.power(1 - positions_adv, gamma)
+            cumulative_disadv = np.concatenate([[0.0], np.cumsum(effects_disadv)])
+            cumulative_adv = np.concatenate([[0.0], np.cumsum(effects_adv)])
+            effect_se_disadv = prefix_mean_standard_errors(
+                prefix_cumulative_moments(effects_disadv, sampling), n_disadv, sampling)
+            effect_se_adv = prefix_mean_standard_errors(
+                prefix_cumulative_moments(effects_adv, sampling), n_adv, sampling)
+
+            for rate_values in itertools.product(*(enumerate(values[name]) for name in RATE_PARAMS)):
+                index = (slice(None), slice(None), gamma_index) + draw_index + tuple(i for i, _ in rate_values)
+                rate_params = {name: value for name, (_, value) in zip(RATE_PARAMS, rate_values)}
+                cell_disadv, cell_adv = prefix_group_rates(
+                    cumulative_disadv[n_disadv], cumulative_adv[n_adv], n_disadv, n_adv, **rate_params)
+                rate_se_disadv = prefix_rate_standard_errors(
+                    cell_disadv, cumulative_disadv[n_disadv], effect_se_disadv * n_disadv, **rate_params)
+                rate_se_adv = prefix_rate_standard_errors(
+                    cell_adv, cumulative_adv[n_adv], effect_se_adv * n_adv, **rate_params)
+                rate_disadv[index], rate_adv[index] = cell_disadv, cell_adv
+                disparity_ratio_se[index] = estimate_ratio_standard_error(cell_disadv, cell_adv, rate_se_disadv, rate_se_adv)
+
+    # Reorder axes to param_dict order; axes of unswept parameters have length 1 and are dropped
+    axis_order = ([canonical_axes.index(name) for name in param_names] +
+                  [i for i, name in enumerate(canonical_axes) if name not in param_names])
+    shape = tuple(len(param_dict[name]) for name in param_names)
+    rate_disadv = rate_disadv.transpose(axis_order).reshape(shape)
+    rate_adv = rate_adv.transpose(axis_order).reshape(shape)
+    disparity_ratio_se = disparity_ratio_se.transpose(axis_order).reshape(shape)
+
+    # Assemble the long table in the same row order as run_factorial_simulation
+    param_combinations = np.meshgrid(*[list(param_dict[name]) for name in param_names], indexing='ij')
+    results = pd.DataFrame({name: grid.flatten() for name, grid in zip(param_names, param_combinations)})
+    p = results['p'].to_numpy(dtype=float)
+    rate_disadv = rate_disadv.flatten()
+    rate_adv = rate_adv.flatten()
+
+    pop_avg = np.round(p * rate_disadv + (1 - p) * rate_adv)
+    results.insert(0, 'prop_disadv', p)
+    results['pop_avg'] = pop_avg.astype(int) if np.isfinite(pop_avg).all() else pop_avg
+    results['rate_adv'] = rate_adv
+    results['rate_disadv'] = rate_disadv
+    for name, measure in calculate_disparity_measures_array(rate_disadv=rate_disadv, rate_adv=rate_adv, p=p).items():
+        results[name] = measure
+    results['disparity_ratio_se'] = disparity_ratio_se.flatten()
+
+    return results
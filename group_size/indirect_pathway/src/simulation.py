@@ -1,15 +1,21 @@
 import numpy as np
 import os
+import sys
 import pandas as pd
+from core.pipeline import Pipeline
+from core.result_cube import ResultCube
+from core.result_table import result_table
 from core.simulation import run_factorial_simulation
-from core.utils.io import save_figure, save_simulation_data
+from core.utils.io import link_artifact, save_figures, save_simulation_data, save_result_cube
 from model.indirect_effect import (
-    indirect_model_incarceration_rate,
+    indirect_model_group_rates,
     generate_stratification_positions,
     calculate_incarceration_rates_normalized
 )
+from model.prefix_sweep import run_prefix_sweep_simulation
 from direct_pathway.src.visualization.plots import calculate_deviation_metrics
 from indirect_pathway.app.constants import APP_DATA_PATH
+from indirect_pathway.app.bundle import BUNDLE_NAME, build_app_bundle
 from indirect_pathway.src.visualization.plots import (
     plot_parameter_metric_correlations,
     plot_derived_metric_correlations,
@@ -17,7 +23,8 @@ from indirect_pathway.src.visualization.plots import (
     create_simulation_3d_plot,
     create_stratification_plot,
     create_position_to_rate_plot,
-    create_mechanism_interaction_plot
+    create_mechanism_interaction_plot,
+    RESULT_KEYS
 )
 
 
@@ -25,11 +32,157 @@ INDIRECT_PATHWAY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__
 OUTPUT_DIR_DATA = os.path.join(INDIRECT_PATHWAY_ROOT, "output", "data")
 OUTPUT_DIR_FIGURES = os.path.join(INDIRECT_PATHWAY_ROOT, "output", "figures")
 
+# Task keys and results of the output pipeline
+PIPELINE_STATE_DIR = os.path.join(INDIRECT_PATHWAY_ROOT, "output", ".pipeline")
+
+# Points drawn in the saved 3D scatter plots (see decimate_points)
+MAX_3D_POINTS = 20000
+
+
+def run_sweep(rate_function, param_dict):
+    # p and sample_size only change how many individuals are drawn from each group, so the
+    # indirect model is evaluated on prefixes of one population draw per position distribution
+    if rate_function is indirect_model_group_rates:
+        return run_prefix_sweep_simulation(param_dict)
+    return run_factorial_simulation(rate_function, param_dict)
+
+def store_results(df, name, axes):
+    # The CSV is written once and linked into the app's data directory
+    csv_path = save_simulation_data(df, f"{name}_simulation.csv", output_dir=OUTPUT_DIR_DATA)
+    app_csv_path = link_artifact(csv_path, APP_DATA_PATH)
+    save_result_cube(ResultCube.from_frame(df, axes=axes), f"{name}_simulation.cube.npz", output_dir=OUTPUT_DIR_DATA)
+    # The size and modification time of the app's CSV change whenever it is rewritten,
+    # so tasks that read it rerun too
+    stat = os.stat(app_csv_path)
+    return app_csv_path, stat.st_size, stat.st_mtime_ns
+
+def store_app_bundle(stored_csv):
+    app_csv_path, _, _ = stored_csv
+    return build_app_bundle(os.path.dirname(app_csv_path))
+
+def derive_metrics(df):
+    df = calculate_deviation_metrics(df)
+    df['z_position_gap'] = np.round(df['z_position_gap'],1)
+    return df
+
+def slice_by_floor_rate(df, floor_rates):
+    results_table = result_table(df, RESULT_KEYS)
+    return {floor_rate: results_table.select(min_rate=floor_rate) for floor_rate in floor_rates}
+
+def floor_rate_figure(slices, floor_rate, plot_function, floor_rate_arg, **kwargs):
+    # Figure of the results at one floor rate, or None if there are none
+    plot_df = slices[floor_rate]
+    if plot_df.empty:
+        return None
+    fig = plot_function(simulation_results=plot_df, **{floor_rate_arg: floor_rate}, **kwargs)
+    fig.update_layout(plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+def stratification_figure(positions, p, mu_disadv, z_position_gap, c_disadv, c_adv):
+    stratification_fig = create_stratification_plot(
+        positions=positions,
+        width=900, height=700
+    )
+    # Update title and subtitle after generating the plot
+    stratification_fig.update_layout(
+        title=dict(
+            text="Stratification Position Distribution",
+            subtitle=dict(
+                text=f"p={p}, μ_disadv={mu_disadv}, z_gap={z_position_gap}, c_disadv={c_disadv}, c_adv={c_adv}"
+            )
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return stratification_fig
+
+def position_to_rate_figure(positions, gamma, target_avg_rate, floor_rate, title):
+    # Get norm factors for gamma and its neighbours gamma-1 and gamma+1
+    norm_factors = {
+        label: {
+            'value': value,
+            'factors': calculate_incarceration_rates_normalized(
+                positions=positions,
+                gamma=value,
+                target_avg_rate=target_avg_rate,
+                floor_rate=floor_rate,
+                return_only_factors=True
+            )
+        }
+        for label, value in [('gamma', gamma), ('gamma-1', max(gamma-1, 0)), ('gamma+1', gamma+1)]
+    }
+    
+    position_to_rate_fig = create_position_to_rate_plot(
+        gamma=gamma,
+        target_avg_rate=target_avg_rate,
+        floor_rate=floor_rate,
+        norm_factors=norm_factors,
+        width=900, height=700
+    )
+    # Update title and subtitle after generating the plot
+    position_to_rate_fig.update_layout(
+        title=dict(
+            text=title,
+            subtitle=dict(
+                text=f"γ={gamma}, target_rate={target_avg_rate}, floor_rate={floor_rate}"
+            )
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return position_to_rate_fig
+
+def interaction_figure(positions, p, gamma, z_position_gap, target_avg_rate, floor_rate):
+    # Calculate incarceration rates and norm factors for gamma
+    rate_data = calculate_incarceration_rates_normalized(
+        positions=positions,
+        gamma=gamma,
+        target_avg_rate=target_avg_rate,
+        floor_rate=floor_rate
+    )
+    interaction_norm_factors = calculate_incarceration_rates_normalized(
+        positions=positions,
+        gamma=gamma,
+        target_avg_rate=target_avg_rate,
+        floor_rate=floor_rate,
+        return_only_factors=True
+    )
+    
+    incarceration_fig = create_mechanism_interaction_plot(
+        rate_data=rate_data,
+        gamma=gamma,
+        target_avg_rate=target_avg_rate,
+        positions=positions,
+        norm_factors=interaction_norm_factors,
+        width=900, height=700
+    )
+    # Update title and subtitle after generating the plot
+    incarceration_fig.update_layout(
+        title=dict(
+            text="Incarceration Rate Interaction",
+            subtitle=dict(
+                text=f"p={p}, γ={gamma}, z_gap={z_position_gap}, target_rate={target_avg_rate}, floor_rate={floor_rate}"
+            )
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return incarceration_fig
+
+def export_figures(**figures):
+    # Render the figures in parallel, skipping those whose saved files are up to date
+    return save_figures({name: fig for name, fig in figures.items() if fig is not None},
+                        output_dir=OUTPUT_DIR_FIGURES)
+
 if __name__ == "__main__":
     """
     Run factorial simulations for the indirect pathway model exploring how group size,
     stratification distributions, and the shape parameter affect measured inequality
     in incarceration rates.
+    
+    The outputs are built by a Pipeline: sweep -> store -> derived metrics -> floor rate
+    slices -> figures -> export. Rerunning only rebuilds outputs whose inputs changed;
+    pass --force to rebuild everything.
     """
     # Create output directories if they don't exist
     os.makedirs(OUTPUT_DIR_DATA, exist_ok=True)
@@ -78,7 +231,7 @@ if __name__ == "__main__":
     model_configs = [
         {
             'name': 'normalized_indirect',
-            'function': indirect_model_incarceration_rate,
+            'function': indirect_model_group_rates,
             'param_dict': {
                 'p': p_values,
                 'gamma': gamma_values,
@@ -94,112 +247,48 @@ if __name__ == "__main__":
         },
     ]
     
-    # Run simulations for all models
-    results = []
+    pipeline = Pipeline(PIPELINE_STATE_DIR)
     for config in model_configs:
-        print(f"Running {config['name']} Model simulation...")
-        df = run_factorial_simulation(
-            config['function'],
-            config['param_dict'],
-        )
-        results.append(df)
+        name = config['name'].lower()
         
-        # Save individual model results
-        save_simulation_data(df, f"{config['name'].lower()}_simulation.csv", output_dir=OUTPUT_DIR_DATA)
-        save_simulation_data(df, f"{config['name'].lower()}_simulation.csv", output_dir=APP_DATA_PATH)
-        
-        # Create and save visualizations
-        print(f"Creating visualizations for {config['name']} Model...")
-        
-        # 1. Correlation Heatmap - Unconstrained model (floor_rate = 0)
-        print("Generating parameter-metric correlation heatmap (unconstrained)...")
-        df = calculate_deviation_metrics(df)
-        df['z_position_gap'] = np.round(df['z_position_gap'],1)
-        unconstrained_df = df[df['min_rate'] == 0]
-        if not unconstrained_df.empty:
-            fig_corr_unconstrained = plot_parameter_metric_correlations(
-                simulation_results=unconstrained_df,
-                floor_rate=0
-            )
-            fig_corr_unconstrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_corr_unconstrained, f"{config['name'].lower()}_correlation_heatmap_unconstrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
-            
-            # 2. Probability Distribution Visualization (unconstrained)
-            print("Generating disparity probability distribution (unconstrained)...")
-            fig_prob_unconstrained = create_disparity_probability_plot(
-                simulation_results=unconstrained_df,
-                min_rate_value=0
-            )
-            fig_prob_unconstrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_prob_unconstrained, f"{config['name'].lower()}_disparity_probability_unconstrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
-            
-            # 3. Parameter Space 3D visualization (unconstrained)
-            print("Generating 3D parameter space visualization (unconstrained)...")
-            fig_3d_unconstrained = create_simulation_3d_plot(
-                simulation_results=unconstrained_df,
-                z_col='disparity_ratio',
-                min_rate=0,
-                color_col='z_position_gap', 
-                width=900, height=700
-            )
-            fig_3d_unconstrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_3d_unconstrained, f"{config['name'].lower()}_3d_parameter_space_unconstrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
+        # Simulation results, saved as CSV (linked for the app) and as a cube
+        sweep = pipeline.add(f"{name}_sweep", run_sweep,
+                             params=dict(rate_function=config['function'], param_dict=config['param_dict']))
+        stored = pipeline.add(f"{name}_store", store_results, deps=dict(df=sweep),
+                              params=dict(name=name, axes=list(config['param_dict'])),
+                              outputs=[os.path.join(OUTPUT_DIR_DATA, f"{name}_simulation.csv"),
+                                       os.path.join(APP_DATA_PATH, f"{name}_simulation.csv"),
+                                       os.path.join(OUTPUT_DIR_DATA, f"{name}_simulation.cube.npz")])
+        if name == 'normalized_indirect':
+            # The app's data bundle, rebuilt from the CSV whenever it is rewritten or the bundle is missing
+            pipeline.add(f"{name}_app_bundle", store_app_bundle, deps=dict(stored_csv=stored),
+                         outputs=[os.path.join(APP_DATA_PATH, BUNDLE_NAME, 'manifest.json')])
         
+        # Deviation metrics, and the unconstrained (floor_rate = 0) and constrained slices
         # Get a representative non-zero floor rate value from the simulation parameters
         constrained_floor_rate = floor_rate_values[5] if len(floor_rate_values) > 1 else floor_rate_values[0]
-        constrained_df = df[df['min_rate'] == constrained_floor_rate]
-        
-        if not constrained_df.empty:
-            # 4. Disparity Probability Distribution (constrained)
-            print(f"Generating disparity probability distribution (floor_rate={constrained_floor_rate})...")
-            fig_prob_constrained = create_disparity_probability_plot(
-                simulation_results=constrained_df,
-                min_rate_value=constrained_floor_rate
-            )
-            fig_prob_constrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_prob_constrained, f"{config['name'].lower()}_disparity_probability_constrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
-            
-            # 5. Correlation Heatmap (constrained)
-            print(f"Generating parameter-metric correlation heatmap (floor_rate={constrained_floor_rate})...")
-            fig_corr_constrained = plot_parameter_metric_correlations(
-                simulation_results=constrained_df,
-                floor_rate=constrained_floor_rate
-            )
-            fig_corr_constrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_corr_constrained, f"{config['name'].lower()}_correlation_heatmap_constrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
-            
-            # 6. Parameter Space 3D visualization (constrained)
-            print(f"Generating 3D parameter space visualization (floor_rate={constrained_floor_rate})...")
-            fig_3d_constrained = create_simulation_3d_plot(
-                simulation_results=constrained_df,
-                z_col='disparity_ratio',
-                min_rate=constrained_floor_rate,
-                color_col='z_position_gap', 
-                width=900, height=700
-            )
-            fig_3d_constrained.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_3d_constrained, f"{config['name'].lower()}_3d_parameter_space_constrained", 
-                        output_dir=OUTPUT_DIR_FIGURES)
-            
-            # Additional visualization: Derived metric correlations
-            print(f"Generating derived metric correlation heatmap (floor_rate={constrained_floor_rate})...")
-            fig_derived_corr = plot_derived_metric_correlations(
-                simulation_results=constrained_df,
-                min_rate=constrained_floor_rate
-            )
-            fig_derived_corr.update_layout(plot_bgcolor='white', paper_bgcolor='white')
-            save_figure(fig_derived_corr, f"{config['name'].lower()}_derived_metric_correlations", 
-                        output_dir=OUTPUT_DIR_FIGURES)
+        derived = pipeline.add(f"{name}_derived", derive_metrics, deps=dict(df=sweep))
+        slices = pipeline.add(f"{name}_floor_rate_slices", slice_by_floor_rate, deps=dict(df=derived),
+                              params=dict(floor_rates=[0, constrained_floor_rate]))
         
-        # Generate mechanism explanation plots
-        print("Generating mechanism explanation plots...")
+        # Figures of the sweep, built in parallel
+        figures = {}
+        for floor_rate, suffix in [(0, 'unconstrained'), (constrained_floor_rate, 'constrained')]:
+            # Correlation heatmap, disparity probability distribution and 3D parameter space
+            figures[f"{name}_correlation_heatmap_{suffix}"] = dict(
+                plot_function=plot_parameter_metric_correlations, floor_rate=floor_rate, floor_rate_arg='floor_rate')
+            figures[f"{name}_disparity_probability_{suffix}"] = dict(
+                plot_function=create_disparity_probability_plot, floor_rate=floor_rate, floor_rate_arg='min_rate_value')
+            figures[f"{name}_3d_parameter_space_{suffix}"] = dict(
+                plot_function=create_simulation_3d_plot, floor_rate=floor_rate, floor_rate_arg='min_rate',
+                z_col='disparity_ratio', color_col='z_position_gap', max_points=MAX_3D_POINTS, width=900, height=700)
+        # Additional visualization: Derived metric correlations
+        figures[f"{name}_derived_metric_correlations"] = dict(
+            plot_function=plot_derived_metric_correlations, floor_rate_arg='min_rate', floor_rate=constrained_floor_rate)
+        for figure_name, params in figures.items():
+            pipeline.add(figure_name, floor_rate_figure, deps=dict(slices=slices), params=params, parallel=True)
         
-        # Use fixed parameters from the simulation
+        # Mechanism explanation plots, using fixed parameters from the simulation
         p = 0.15  # Proportion of disadvantaged group
         mu_disadv = mu_disadv_values[0]  # Mean position of disadvantaged group
         z_position_gap = 0.3  # Fixed position gap
@@ -207,195 +296,37 @@ if __name__ == "__main__":
         c_adv = c_adv_values[0]  # Concentration parameter for advantaged group
         sample_size = sample_size_values[0]  # Sample size
         target_avg_rate = target_avg_rate_values[0]  # Target average incarceration rate
+        gamma_position_rate = 1.0
+        gamma_interaction = 2.0
         
         # Generate positions for stratification plot
-        positions = generate_stratification_positions(
+        positions = pipeline.add(f"{name}_positions", generate_stratification_positions, params=dict(
             p=p,
             mu_disadv=mu_disadv,
             z_position_gap=z_position_gap,
             c_disadv=c_disadv,
             c_adv=c_adv,
             sample_size=sample_size,
-        )
-        
-        # Create stratification plot
-        print("Generating stratification position distribution plot...")
-        stratification_fig = create_stratification_plot(
-            positions=positions,
-            width=900, height=700
-        )
-        # Update title and subtitle after generating the plot
-        stratification_fig.update_layout(
-            title=dict(
-                text="Stratification Position Distribution",
-                subtitle=dict(
-                    text=f"p={p}, μ_disadv={mu_disadv}, z_gap={z_position_gap}, c_disadv={c_disadv}, c_adv={c_adv}"
-                )
-            ),
-            plot_bgcolor='white',
-            paper_bgcolor='white'
-        )
-        save_figure(stratification_fig, f"{config['name'].lower()}_stratification_distribution", 
-                    output_dir=OUTPUT_DIR_FIGURES)
-        
-        # Create position-to-rate plot with gamma=1 (with floor rate)
-        print("Generating position-to-rate function plot with floor rate...")
-        gamma_position_rate = 1.0
-        floor_rate = constrained_floor_rate
-        
-        # Get norm factors for different gamma values with floor rate
-        norm_factors_with_floor = {
-            'gamma': {
-                'value': gamma_position_rate,
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=gamma_position_rate,
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=floor_rate,
-                    return_only_factors=True
-                )
-            },
-            'gamma-1': {
-                'value': max(gamma_position_rate-1, 0),
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=max(gamma_position_rate-1, 0),
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=floor_rate,
-                    return_only_factors=True
-                )
-            },
-            'gamma+1': {
-                'value': gamma_position_rate+1,
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=gamma_position_rate+1,
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=floor_rate,
-                    return_only_factors=True
-                )
-            }
-        }
-        
-        position_to_rate_fig_with_floor = create_position_to_rate_plot(
-            gamma=gamma_position_rate,
-            target_avg_rate=target_avg_rate,
-            floor_rate=floor_rate,
-            norm_factors=norm_factors_with_floor,
-            width=900, height=700
-        )
-        # Update title and subtitle after generating the plot
-        position_to_rate_fig_with_floor.update_layout(
-            title=dict(
-                text="Position to Incarceration Rate Function (With Floor Rate)",
-                subtitle=dict(
-                    text=f"γ={gamma_position_rate}, target_rate={target_avg_rate}, floor_rate={floor_rate}"
-                )
-            ),
-            plot_bgcolor='white',
-            paper_bgcolor='white'
-        )
-        save_figure(position_to_rate_fig_with_floor, f"{config['name'].lower()}_position_to_rate_function_with_floor", 
-                    output_dir=OUTPUT_DIR_FIGURES)
-        
-        # Create position-to-rate plot with gamma=1 (without floor rate)
-        print("Generating position-to-rate function plot without floor rate...")
-        no_floor_rate = 0.0
-        
-        # Get norm factors for different gamma values without floor rate
-        norm_factors_no_floor = {
-            'gamma': {
-                'value': gamma_position_rate,
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=gamma_position_rate,
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=no_floor_rate,
-                    return_only_factors=True
-                )
-            },
-            'gamma-1': {
-                'value': max(gamma_position_rate-1, 0),
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=max(gamma_position_rate-1, 0),
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=no_floor_rate,
-                    return_only_factors=True
-                )
-            },
-            'gamma+1': {
-                'value': gamma_position_rate+1,
-                'factors': calculate_incarceration_rates_normalized(
-                    positions=positions,
-                    gamma=gamma_position_rate+1,
-                    target_avg_rate=target_avg_rate,
-                    floor_rate=no_floor_rate,
-                    return_only_factors=True
-                )
-            }
+        ))
+        mechanism_figures = {
+            f"{name}_stratification_distribution": (stratification_figure, dict(
+                p=p, mu_disadv=mu_disadv, z_position_gap=z_position_gap, c_disadv=c_disadv, c_adv=c_adv)),
+            f"{name}_position_to_rate_function_with_floor": (position_to_rate_figure, dict(
+                gamma=gamma_position_rate, target_avg_rate=target_avg_rate, floor_rate=constrained_floor_rate,
+                title="Position to Incarceration Rate Function (With Floor Rate)")),
+            f"{name}_position_to_rate_function_no_floor": (position_to_rate_figure, dict(
+                gamma=gamma_position_rate, target_avg_rate=target_avg_rate, floor_rate=0.0,
+                title="Position to Incarceration Rate Function (No Floor Rate)")),
+            # Incarceration rate plot with gamma=2 (for interaction visualization)
+            f"{name}_incarceration_rate_interaction": (interaction_figure, dict(
+                p=p, gamma=gamma_interaction, z_position_gap=z_position_gap, target_avg_rate=target_avg_rate,
+                floor_rate=constrained_floor_rate)),
         }
+        for figure_name, (figure_function, params) in mechanism_figures.items():
+            pipeline.add(figure_name, figure_function, deps=dict(positions=positions), params=params, parallel=True)
         
-        position_to_rate_fig_no_floor = create_position_to_rate_plot(
-            gamma=gamma_position_rate,
-            target_avg_rate=target_avg_rate,
-            floor_rate=no_floor_rate,
-            norm_factors=norm_factors_no_floor,
-            width=900, height=700
-        )
-        # Update title and subtitle after generating the plot
-        position_to_rate_fig_no_floor.update_layout(
-            title=dict(
-                text="Position to Incarceration Rate Function (No Floor Rate)",
-                subtitle=dict(
-                    text=f"γ={gamma_position_rate}, target_rate={target_avg_rate}, floor_rate={no_floor_rate}"
-                )
-            ),
-            plot_bgcolor='white',
-            paper_bgcolor='white'
-        )
-        save_figure(position_to_rate_fig_no_floor, f"{config['name'].lower()}_position_to_rate_function_no_floor", 
-                    output_dir=OUTPUT_DIR_FIGURES)
-        
-        # Create incarceration rate plot with gamma=2 (for interaction visualization)
-        print("Generating incarceration rate interaction plot...")
-        gamma_interaction = 2.0
-        
-        # Calculate incarceration rates with gamma=2
-        rate_data = calculate_incarceration_rates_normalized(
-            positions=positions,
-            gamma=gamma_interaction,
-            target_avg_rate=target_avg_rate,
-            floor_rate=floor_rate
-        )
-        
-        # Get norm factors for gamma=2
-        interaction_norm_factors = calculate_incarceration_rates_normalized(
-            positions=positions,
-            gamma=gamma_interaction,
-            target_avg_rate=target_avg_rate,
-            floor_rate=floor_rate,
-            return_only_factors=True
-        )
-        
-        incarceration_fig = create_mechanism_interaction_plot(
-            rate_data=rate_data,
-            gamma=gamma_interaction,
-            target_avg_rate=target_avg_rate,
-            positions=positions,
-            norm_factors=interaction_norm_factors,
-            width=900, height=700
-        )
-        # Update title and subtitle after generating the plot
-        incarceration_fig.update_layout(
-            title=dict(
-                text="Incarceration Rate Interaction",
-                subtitle=dict(
-                    text=f"p={p}, γ={gamma_interaction}, z_gap={z_position_gap}, target_rate={target_avg_rate}, floor_rate={floor_rate}"
-                )
-            ),
-            plot_bgcolor='white',
-            paper_bgcolor='white'
-        )
-        save_figure(incarceration_fig, f"{config['name'].lower()}_incarceration_rate_interaction", 
-                    output_dir=OUTPUT_DIR_FIGURES)
+        figure_names = list(figures) + list(mechanism_figures)
+        pipeline.add(f"{name}_export", export_figures, deps={figure_name: figure_name for figure_name in figure_names},
+                     outputs=[os.path.join(OUTPUT_DIR_FIGURES, f"{figure_name}.png") for figure_name in figure_names])
+    
+    pipeline.run(force='--force' in sys.argv)
@@ -1,3 +1,5 @@
+import functools
+
 import numpy as np
 import plotly.express as px
 import pandas as pd
@@ -5,7 +7,12 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from scipy.stats import beta
 
-from core.visualization.base_plots import create_3d_scatter
+from core.correlation import correlation_engine
+from core.derived_metrics import ensure_derived_metrics
+from core.result_table import result_table
+from core.visualization.base_plots import (
+    create_3d_scatter, create_lean_3d_scatter, box_statistics, decimate_points
+)
 from core.visualization.style import plotly_theme_decorator
 from indirect_pathway.src.model.indirect_effect import normalize_rates_to_target, apply_floor_constraint
 
@@ -13,73 +20,120 @@ from indirect_pathway.src.model.indirect_effect import normalize_rates_to_target
 DISADV_GROUP = "Disadvantaged"
 ADV_GROUP = "Advantaged"
 
+# Parameter columns the simulation results are sorted and indexed by (see core.result_table)
+RESULT_KEYS = ['min_rate', 'prop_disadv', 'gamma', 'z_position_gap']
+
+# Variable parameters (those that have multiple values in the simulation) and derived metrics
+# compared by the correlation heatmaps
+CORRELATION_PARAMS = [
+    'prop_disadv',  # Same as 'p'
+    'gamma',
+    'z_position_gap',
+]
+CORRELATION_METRICS = [
+    'disparity_ratio',
+    'rate_difference',
+    'rate_disadv',
+    'disadv_delta_from_avg_percent',
+    'rate_adv',
+    'adv_delta_from_avg_percent',
+    'normalized_disparity_index',
+]
+
+# Columns shown on hover by the lean 3D parameter-space plot
+LEAN_3D_HOVER_COLS = ['gamma', 'z_position_gap', 'min_rate', 'rate_disadv', 'rate_adv', 'disparity_ratio']
+
+
+@functools.lru_cache(maxsize=64)
+def beta_pdf_curve(alpha, beta_param, num_points=1000):
+    """
+    Beta PDF evaluated on an even grid over [0, 1], cached per (alpha, beta_param).
 
-@plotly_theme_decorator
-def create_stratification_plot(positions, num_bins=100, **kwargs):
-    """Creates a combined plot with histograms and PDF curves for both groups"""
-    # Create figure with secondary y-axis
-    fig = make_subplots(rows=1, cols=1, specs=[[{"secondary_y": True}]])
+    Returns:
+    --------
+    tuple
+        (x, pdf) read-only arrays
+    """
+    x = np.linspace(0, 1, num_points)
+    pdf = beta.pdf(x, alpha, beta_param)
+    x.flags.writeable = False
+    pdf.flags.writeable = False
+    return x, pdf
 
-    # Extract parameters
-    alpha_disadv = positions['alpha_disadv']
-    beta_disadv = positions['beta_disadv']
-    alpha_adv = positions['alpha_adv']
-    beta_adv = positions['beta_adv']
 
-    # Create histograms and PDF curves for disadvantaged group
-    fig.add_trace(
-        go.Histogram(
-            x=positions['positions_disadv'],
-            name=DISADV_GROUP,
-            opacity=0.5,
-            marker_color='red',
-            nbinsx=num_bins,
-            showlegend=True,
-            legendgroup=DISADV_GROUP
-        ),
-        secondary_y=False
-    )
+def position_histogram(positions, num_bins=100):
+    """
+    Counts of positions in num_bins equal-width bins over [0, 1].
 
-    x = np.linspace(0, 1, 1000)
-    fig.add_trace(
-        go.Scatter(
-            x=x,
-            y=beta.pdf(x, alpha_disadv, beta_disadv),
-            mode='lines',
-            name=DISADV_GROUP,
-            line=dict(color='darkred', width=2),
-            showlegend=False,
-            legendgroup=DISADV_GROUP
-        ),
-        secondary_y=True
-    )
+    Returns:
+    --------
+    tuple
+        (bin_centers, counts, bin_width)
+    """
+    counts, edges = np.histogram(positions, bins=num_bins, range=(0, 1))
+    return (edges[:-1] + edges[1:]) / 2, counts, edges[1] - edges[0]
 
-    # Create histograms and PDF curves for advantaged group
-    fig.add_trace(
-        go.Histogram(
-            x=positions['positions_adv'],
-            name=ADV_GROUP,
-            opacity=0.5,
-            marker_color='blue',
-            nbinsx=num_bins,
-            showlegend=True,
-            legendgroup=ADV_GROUP
-        ),
-        secondary_y=False
-    )
 
-    fig.add_trace(
-        go.Scatter(
-            x=x,
-            y=beta.pdf(x, alpha_adv, beta_adv),
-            mode='lines',
-            name=ADV_GROUP,
-            line=dict(color='darkblue', width=2),
-            showlegend=False,
-            legendgroup=ADV_GROUP
-        ),
-        secondary_y=True
-    )
+@plotly_theme_decorator
+def create_stratification_plot(positions, num_bins=100, binned=False, **kwargs):
+    """
+    Creates a combined plot with histograms and PDF curves for both groups.
+
+    With binned=True the histograms are computed on the server and drawn as bars, so the
+    figure carries num_bins counts per group instead of every position, and the PDF curves
+    are sampled at the bin edges and centres.
+    """
+    # Create figure with secondary y-axis
+    fig = make_subplots(rows=1, cols=1, specs=[[{"secondary_y": True}]])
+
+    groups = [
+        (DISADV_GROUP, positions['positions_disadv'], positions['alpha_disadv'], positions['beta_disadv'],
+         'red', 'darkred'),
+        (ADV_GROUP, positions['positions_adv'], positions['alpha_adv'], positions['beta_adv'],
+         'blue', 'darkblue'),
+    ]
+
+    # Create histograms and PDF curves for each group
+    for name, group_positions, alpha, beta_param, color, line_color in groups:
+        if binned:
+            bin_centers, counts, bin_width = position_histogram(group_positions, num_bins)
+            histogram = go.Bar(
+                x=bin_centers,
+                y=counts,
+                width=bin_width,
+                name=name,
+                opacity=0.5,
+                marker_color=color,
+                marker_line_width=0,
+                showlegend=True,
+                legendgroup=name
+            )
+        else:
+            histogram = go.Histogram(
+                x=group_positions,
+                name=name,
+                opacity=0.5,
+                marker_color=color,
+                nbinsx=num_bins,
+                showlegend=True,
+                legendgroup=name
+            )
+        fig.add_trace(histogram, secondary_y=False)
+
+        # Binned figures sample the PDF at every bin edge and centre rather than 1000 points
+        x, pdf = beta_pdf_curve(alpha, beta_param, 2 * num_bins + 1) if binned else beta_pdf_curve(alpha, beta_param)
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=pdf,
+                mode='lines',
+                name=name,
+                line=dict(color=line_color, width=2),
+                showlegend=False,
+                legendgroup=name
+            ),
+            secondary_y=True
+        )
 
     # Update layout
     fig.update_layout(
@@ -212,9 +266,55 @@ def create_position_to_rate_plot(gamma, target_avg_rate, norm_factors, floor_rat
     return fig
 
 
+def decimate_by_position(positions, max_points=None):
+    """
+    Indices of at most max_points individuals at evenly spaced position ranks, so the
+    subsample follows the group's position distribution. All indices if max_points is None.
+    """
+    n = len(positions)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    order = np.argsort(positions, kind='stable')
+    return order[np.linspace(0, n - 1, max_points).round().astype(int)]
+
+
+def precomputed_box(values, name, color, max_outliers=None, **kwargs):
+    """
+    Box trace built from quartiles, mean and Tukey fences computed on the server, carrying
+    only the outliers (at most max_outliers, evenly spaced) instead of every value.
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return go.Box(y=values, name=name, marker_color=color, **kwargs)
+
+    stats = box_statistics(values, max_outliers)
+    return go.Box(
+        x=[name],
+        y=[stats['outliers']],
+        q1=[stats['q1']],
+        median=[stats['median']],
+        q3=[stats['q3']],
+        mean=[stats['mean']],
+        lowerfence=[stats['lowerfence']],
+        upperfence=[stats['upperfence']],
+        boxpoints='outliers',
+        name=name,
+        marker_color=color,
+        **kwargs
+    )
+
+
 @plotly_theme_decorator
-def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positions, norm_factors, **kwargs):
-    """Creates a plot of incarceration rates with position markers and group boxplots"""
+def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positions, norm_factors, binned=False,
+                                      max_markers_per_group=None, webgl=False, **kwargs):
+    """
+    Creates a plot of incarceration rates with position markers and group boxplots.
+    binned is passed to create_stratification_plot for the marginal position histograms.
+
+    Boxes are drawn from precomputed statistics. With max_markers_per_group, each group's
+    markers (and box outliers) are thinned to that many individuals at evenly spaced
+    position ranks; webgl draws the markers with Scattergl.
+    """
     # Create figure with marginal box plots
     fig = make_subplots(
         rows=2, cols=2,
@@ -265,11 +365,15 @@ def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positio
         row=2, col=2
     )
 
+    marker_trace = go.Scattergl if webgl else go.Scatter
+    shown_disadv = decimate_by_position(positions_disadv, max_markers_per_group)
+    shown_adv = decimate_by_position(positions_adv, max_markers_per_group)
+
     # Add position/rate markers for disadvantaged group
     fig.add_trace(
-        go.Scatter(
-            x=positions_disadv,
-            y=rates_disadv,
+        marker_trace(
+            x=positions_disadv[shown_disadv],
+            y=rates_disadv[shown_disadv],
             mode='markers',
             name=DISADV_GROUP,
             marker=dict(color='red',
@@ -285,9 +389,9 @@ def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positio
 
     # Add position/rate markers for advantaged group
     fig.add_trace(
-        go.Scatter(
-            x=positions_adv,
-            y=rates_adv,
+        marker_trace(
+            x=positions_adv[shown_adv],
+            y=rates_adv[shown_adv],
             mode='markers',
             name=ADV_GROUP,
             marker=dict(color='blue',
@@ -328,10 +432,11 @@ def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positio
 
     # Add boxplot for disadvantaged group
     fig.add_trace(
-        go.Box(
-            y=rates_disadv,
+        precomputed_box(
+            rates_disadv,
             name=DISADV_GROUP,
-            marker_color='red',
+            color='red',
+            max_outliers=max_markers_per_group,
             boxmean=True,
             legendgroup=DISADV_GROUP,
             showlegend=False,
@@ -341,10 +446,11 @@ def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positio
 
     # Add boxplot for advantaged group
     fig.add_trace(
-        go.Box(
-            y=rates_adv,
+        precomputed_box(
+            rates_adv,
             name=ADV_GROUP,
-            marker_color='blue',
+            color='blue',
+            max_outliers=max_markers_per_group,
             boxmean=True,
             legendgroup=ADV_GROUP,
             showlegend=False,
@@ -354,7 +460,7 @@ def create_mechanism_interaction_plot(rate_data, gamma, target_avg_rate, positio
 
     # Add distribution of positions along x-axis
     # Get the traces from create_stratification_plot
-    strat_plot = create_stratification_plot(positions)
+    strat_plot = create_stratification_plot(positions, binned=binned)
 
     # Add each trace to our main figure in row 1, col 2
     for i, trace in enumerate(strat_plot.data):
@@ -415,33 +521,12 @@ def plot_parameter_metric_correlations(simulation_results, floor_rate=0, spearma
     Returns:
         plotly.graph_objects.Figure: The correlation heatmap figure
     """
-    # Variable parameters (those that have multiple values in the simulation)
-    variable_params = [
-        'prop_disadv',  # Same as 'p'
-        'gamma',
-        'z_position_gap',
-    ]
-
-    # Derived metrics (calculated from the simulation results)
-    derived_metrics = [
-        'disparity_ratio',
-        'rate_difference',
-        'rate_disadv',
-        'disadv_delta_from_avg_percent',
-        'rate_adv',
-        'adv_delta_from_avg_percent',
-        'normalized_disparity_index',
-    ]
-
-    # Filter data for a specific min_rate to focus analysis
-    plot_df = simulation_results[simulation_results['min_rate']==floor_rate]
-
-    # Create a non-square correlation matrix with variable parameters as rows and derived metrics as columns
-    var_derived_corr = pd.DataFrame(index=variable_params, columns=derived_metrics)
+    # Non-square block of the correlation matrix for the min_rate slice, with variable
+    # parameters as rows and derived metrics as columns
     method = 'spearman' if spearman else 'pearson'
-    for param in variable_params:
-        for metric in derived_metrics:
-            var_derived_corr.loc[param, metric] = plot_df[param].corr(plot_df[metric], method=method)
+    correlations = correlation_engine(simulation_results).correlations(
+        floor_rate, CORRELATION_PARAMS + CORRELATION_METRICS, method=method)
+    var_derived_corr = correlations.loc[CORRELATION_PARAMS, CORRELATION_METRICS]
 
     # Create a heatmap for variable parameters vs derived metrics (non-square matrix)
     fig = go.Figure(data=go.Heatmap(
@@ -492,26 +577,15 @@ def plot_derived_metric_correlations(simulation_results, min_rate=0, spearman=Tr
     Returns:
         plotly.graph_objects.Figure: The correlation heatmap figure
     """
-    # Derived metrics (calculated from the simulation results)
-    derived_metrics = [
-        'disparity_ratio',
-        'rate_difference',
-        'rate_disadv',
-        'disadv_delta_from_avg_percent',
-        'rate_adv',
-        'adv_delta_from_avg_percent',
-        'normalized_disparity_index',
-    ]
-
-    # Filter data for a specific min_rate to focus analysis
-    plot_df = simulation_results[simulation_results['min_rate']==min_rate]
-
-    # Create a correlation matrix for derived metrics only
+    # Derived-metric block of the correlation matrix for the min_rate slice
+    # (shared with plot_parameter_metric_correlations)
     method = 'spearman' if spearman else 'pearson'
-    derived_corr = plot_df[derived_metrics].corr(method=method)
+    correlations = correlation_engine(simulation_results).correlations(
+        min_rate, CORRELATION_PARAMS + CORRELATION_METRICS, method=method)
+    derived_corr = correlations.loc[CORRELATION_METRICS, CORRELATION_METRICS]
     mask = np.triu(np.ones_like(derived_corr, dtype=bool))
-    derived_corr_masked = derived_corr.copy()
-    derived_corr_masked.values[mask] = None
+    derived_corr_masked = pd.DataFrame(np.where(mask, np.nan, derived_corr.values),
+                                       index=derived_corr.index, columns=derived_corr.columns)
 
     # Create a heatmap for derived metrics only
     fig = go.Figure(data=go.Heatmap(
@@ -557,17 +631,13 @@ def create_disparity_probability_plot(simulation_results, min_rate_value=None):
     Returns:
         plotly.graph_objects.Figure: The created figure
     """
-    # Define disparity ratio buckets
-    plot_df = simulation_results.copy()
-    plot_df['disparity_bucket'] = pd.cut(plot_df['disparity_ratio'], 
-                                        bins=[0, 2, 4, 10, 30, float('inf')],
-                                        labels=['Low (1-2)', 'Moderate (2-4)', 
-                                               'High (5-10)', 'Very High (10-30)',
-                                               'Extreme (30+)'])
-
     # Filter data based on provided min_rate parameter
+    plot_df = simulation_results
     if min_rate_value is not None:
-        plot_df = plot_df[plot_df['min_rate'] == min_rate_value]
+        plot_df = result_table(simulation_results, RESULT_KEYS).select(min_rate=min_rate_value)
+
+    # Disparity ratio buckets (disparity_bucket) are read from the derived metrics
+    plot_df = ensure_derived_metrics(plot_df)
     
     # Calculate probability of each bucket for each prop_disadv value
     # This aggregates across all gamma and position gap values
@@ -610,7 +680,8 @@ def create_disparity_probability_plot(simulation_results, min_rate_value=None):
             
     return fig
 
-def create_simulation_3d_plot(simulation_results, z_col='disparity_ratio', min_rate=0, color_col='z_position_gap', **kwargs):
+def create_simulation_3d_plot(simulation_results, z_col='disparity_ratio', min_rate=0, color_col='z_position_gap',
+                              lean=False, max_points=None, **kwargs):
     """
     Creates a 3D scatter plot of simulation results with customizable z-axis and color dimension.
     
@@ -619,20 +690,28 @@ def create_simulation_3d_plot(simulation_results, z_col='disparity_ratio', min_r
         z_col (str, optional): Column to use for z-axis. Defaults to 'disparity_ratio'.
         min_rate (int, optional): Minimum incarceration rate to filter by. Defaults to 0.
         color_col (str, optional): Column to use for color dimension. Defaults to 'z_position_gap'.
+        lean (bool, optional): Build with create_lean_3d_scatter, sending float32 arrays and only
+            the LEAN_3D_HOVER_COLS on hover instead of every column. Defaults to False.
+        max_points (int, optional): Level of detail: draw coincident points once and thin the
+            parameter grid to at most max_points points (see decimate_points). Defaults to None,
+            which draws every row.
         **kwargs: Additional arguments to pass to create_3d_scatter
         
     Returns:
         plotly.graph_objects.Figure: The created 3D scatter plot
     """
-    plot_df = simulation_results[simulation_results['min_rate']==min_rate]
+    plot_df = result_table(simulation_results, RESULT_KEYS).select(min_rate=min_rate)
     
     # Set default parameters that can be overridden by kwargs
     params = {
         'x_col': 'prop_disadv',
         'y_col': 'gamma',
         'color_continuous_scale': 'Turbo',
-        'hover_data': plot_df.columns.tolist(),
     }
+    if lean:
+        params['hover_cols'] = [col for col in LEAN_3D_HOVER_COLS if col in plot_df.columns]
+    else:
+        params['hover_data'] = plot_df.columns.tolist()
     
     # Add log_z=True by default only for disparity_ratio
     if z_col == 'disparity_ratio':
@@ -641,7 +720,11 @@ def create_simulation_3d_plot(simulation_results, z_col='disparity_ratio', min_r
     # Override defaults with any provided kwargs
     params.update(kwargs)
     
-    fig = create_3d_scatter(
+    if max_points is not None:
+        plot_df = decimate_points(plot_df, [params['x_col'], params['y_col'], z_col, color_col],
+                                  axes=RESULT_KEYS, max_points=max_points)
+    
+    fig = (create_lean_3d_scatter if lean else create_3d_scatter)(
         plot_df,
         z_col=z_col,
         color_col=color_col,
@@ -0,0 +1,9 @@
+import os
+import sys
+
+GROUP_SIZE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The drivers run with the project root and the indirect pathway sources on the path
+for path in (GROUP_SIZE_ROOT, os.path.join(GROUP_SIZE_ROOT, 'indirect_pathway', 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from model.indirect_effect import adaptive_incarceration_rates_normalized, indirect_model_group_rates
+
+PARAMS = dict(p=0.3, gamma=2.0, mu_disadv=0.2, z_position_gap=0.4, c_disadv=20, c_adv=20,
+              normalized=True, target_avg_rate=500, min_rate=0)
+
+
+@pytest.mark.parametrize('sampling', ['random', 'stratified', 'antithetic'])
+def test_loose_tolerance_stops_at_initial_sample(sampling):
+    rates = indirect_model_group_rates(**PARAMS, sample_size=10000, rel_tol=0.5, initial_sample_size=200,
+                                       sampling=sampling, seed=0)
+    assert rates['realized_sample_size'] == 200
+    assert np.isfinite(rates['disparity_ratio_se'])
+
+
+@pytest.mark.parametrize('sampling', ['random', 'stratified', 'antithetic'])
+def test_tight_tolerance_is_capped_at_fixed_sample_size(sampling):
+    rates = indirect_model_group_rates(**PARAMS, sample_size=5000, rel_tol=1e-6, sampling=sampling, seed=0)
+    assert rates['realized_sample_size'] <= 5000 + 2
+
+
+def test_stops_once_tolerance_is_reached():
+    for seed in range(5):
+        rates = adaptive_incarceration_rates_normalized(
+            p=0.3, gamma=2.0, target_avg_rate=500, rel_tol=0.01, mu_disadv=0.2, c_disadv=20, c_adv=20,
+            initial_sample_size=100, max_sample_size=10 ** 6, sampling='random', seed=seed)
+        assert rates['relative_standard_error'] <= 0.01
+        assert 100 < rates['realized_sample_size'] < 10 ** 6
+        # The batch before the last one had not reached the tolerance on half the sample
+        half = adaptive_incarceration_rates_normalized(
+            p=0.3, gamma=2.0, target_avg_rate=500, rel_tol=0.01, mu_disadv=0.2, c_disadv=20, c_adv=20,
+            initial_sample_size=100, max_sample_size=rates['realized_sample_size'] // 2,
+            sampling='random', seed=seed)
+        assert half['relative_standard_error'] > 0.01
+
+
+def test_stratified_needs_fewer_samples_than_random():
+    sizes = {sampling: indirect_model_group_rates(**PARAMS, sample_size=10 ** 6, rel_tol=0.005, initial_sample_size=100,
+                                                  sampling=sampling, seed=1)['realized_sample_size']
+             for sampling in ('random', 'stratified')}
+    assert sizes['stratified'] < sizes['random']
+
+
+def test_adaptive_mode_requires_normalized_rates():
+    with pytest.raises(ValueError):
+        indirect_model_group_rates(**{**PARAMS, 'normalized': False}, max_rate=1000, rel_tol=0.01)
+
+
+def test_adaptive_mode_rejects_unknown_sampling():
+    with pytest.raises(ValueError):
+        indirect_model_group_rates(**PARAMS, sample_size=1000, rel_tol=0.01, sampling='sobol')
@@ -0,0 +1,46 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.correlation import correlation_engine
+from core.result_table import invalidate
+
+
+def _results(seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'min_rate': np.repeat([0, 100], 50), 'gamma': rng.random(100), 'p': rng.random(100)})
+    df['disparity_ratio'] = df['gamma'] * 2 + rng.random(100)
+    return df
+
+
+def test_engine_matches_dataframe_corr():
+    df = _results()
+    columns = ['gamma', 'p', 'disparity_ratio']
+    for method in ('pearson', 'spearman'):
+        matrix = correlation_engine(df).correlations(100, columns, method=method)
+        expected = df[df['min_rate'] == 100][columns].corr(method=method)
+        pd.testing.assert_frame_equal(matrix, expected)
+
+
+def test_engine_recomputes_after_invalidation():
+    df = _results()
+    columns = ['gamma', 'disparity_ratio']
+    before = correlation_engine(df).correlations(0, columns)
+    assert correlation_engine(df).correlations(0, columns) is before
+
+    df['disparity_ratio'] = -df['disparity_ratio']
+    invalidate(df)
+    after = correlation_engine(df).correlations(0, columns)
+    np.testing.assert_allclose(after.loc['gamma', 'disparity_ratio'], -before.loc['gamma', 'disparity_ratio'])
+
+
+def test_engine_is_shared_across_threads():
+    df = _results()
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(correlation_engine(df))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(engine is engines[0] for engine in engines)
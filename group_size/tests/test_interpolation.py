@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from core.interpolation import GridInterpolator
+from core.result_cube import ResultCube
+
+X = np.array([0.0, 0.5, 1.0, 2.0])
+Y = np.array([1.0, 2.0, 4.0, 8.0])
+
+
+def _cube(func):
+    x, y = np.meshgrid(X, Y, indexing='ij')
+    return ResultCube({'x': X, 'y': Y}, {'f': func(x, y)}, constants={'avg_rate': 500}, aliases={'x_alias': 'x'})
+
+
+def test_multilinear_surfaces_are_exact():
+    interpolator = GridInterpolator(_cube(lambda x, y: 1 + 2 * x - y + 3 * x * y), 'f')
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 2, 50), rng.uniform(1, 4, 50)
+    result = interpolator.query(x=x, y=y)
+    np.testing.assert_allclose(result.value, 1 + 2 * x - y + 3 * x * y)
+    np.testing.assert_allclose(result.error, 0, atol=1e-12)
+    assert not result.steep.any()
+
+
+def test_error_estimate_is_exact_for_quadratics():
+    interpolator = GridInterpolator(_cube(lambda x, y: x ** 2 + 0 * y), 'f', steep_tol=np.inf)
+    x = np.array([0.1, 0.25, 0.75, 1.5])
+    result = interpolator.query(x=x, y=np.full(4, 2.0))
+    np.testing.assert_allclose(result.error, np.abs(result.value - x ** 2))
+
+
+def test_log_interpolation_is_exact_for_exponentials():
+    interpolator = GridInterpolator(_cube(lambda x, y: np.exp(0.5 * x + 0.1 * y)), 'f', log=True)
+    value, error, steep = interpolator(x=0.3, y=3.3)
+    np.testing.assert_allclose(value, np.exp(0.5 * 0.3 + 0.1 * 3.3))
+    assert abs(error) < 1e-12 and not steep
+
+
+def test_steep_and_non_finite_cells_are_flagged():
+    interpolator = GridInterpolator(_cube(lambda x, y: np.exp(8 * x) + y), 'f', steep_tol=0.05)
+    assert interpolator(x=1.5, y=2).steep
+    assert not interpolator(x=0.0, y=2).steep
+    holes = GridInterpolator(_cube(lambda x, y: np.where(x > 1, np.nan, x + y)), 'f')
+    assert holes(x=1.5, y=2).steep
+    assert not holes(x=0.25, y=2).steep
+
+
+def test_pchip_matches_grid_values():
+    interpolator = GridInterpolator(_cube(lambda x, y: np.sqrt(1 + x) * y), 'f', method='pchip')
+    np.testing.assert_allclose(interpolator.query(x=X, y=np.full(len(X), 2.0)).value, np.sqrt(1 + X) * 2)
+
+
+def test_aliases_constants_and_bounds():
+    interpolator = GridInterpolator(_cube(lambda x, y: x + y), 'f')
+    assert interpolator(x_alias=0.5, y=1, avg_rate=500).value == pytest.approx(1.5)
+    with pytest.raises(ValueError):
+        interpolator(x=0.5, y=1, avg_rate=250)
+    with pytest.raises(ValueError):
+        interpolator(x=2.5, y=1)
+    with pytest.raises(KeyError):
+        interpolator(x=0.5)
+    with pytest.raises(KeyError):
+        interpolator(x=0.5, y=1, gamma=2)
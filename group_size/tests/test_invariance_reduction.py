@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.simulation import run_factorial_simulation
+from direct_pathway.src.model.direct_effect import direct_pathway_model_incarceration_rate
+from model.indirect_effect import indirect_model_group_rates
+
+
+def _assert_same_results(reduced, full):
+    assert list(reduced.columns) == list(full.columns)
+    pd.testing.assert_frame_equal(reduced.reset_index(drop=True), full.reset_index(drop=True),
+                                  check_dtype=False, rtol=1e-9)
+
+
+def test_direct_model_reduction_matches_full_grid():
+    param_dict = {'avg_rate': [0, 250, 500, 1000], 'd': [1, 2, 5], 'p': [0.1, 0.5]}
+    full = run_factorial_simulation(direct_pathway_model_incarceration_rate, param_dict)
+    reduced = run_factorial_simulation(direct_pathway_model_incarceration_rate, param_dict, reduce_invariances=True)
+    _assert_same_results(reduced, full)
+
+
+def test_indirect_model_reduction_matches_full_grid():
+    # A fixed seed makes every cell a deterministic function of its parameters
+    param_dict = {
+        'p': [0.2, 0.6],
+        'gamma': [0.5, 2.0],
+        'sample_size': [1000],
+        'normalized': [True, False],
+        'max_rate': [1000],
+        'target_avg_rate': [250, 500, 1000],
+        'min_rate': [0, 50, 100],
+        'seed': [3],
+    }
+    full = run_factorial_simulation(indirect_model_group_rates, param_dict)
+    reduced = run_factorial_simulation(indirect_model_group_rates, param_dict, reduce_invariances=True)
+    _assert_same_results(reduced, full)
+
+
+def test_reduction_rejects_replicates():
+    with pytest.raises(ValueError):
+        run_factorial_simulation(direct_pathway_model_incarceration_rate,
+                                 {'avg_rate': [500], 'd': [2], 'p': [0.5]}, replicates=10, reduce_invariances=True)
@@ -0,0 +1,84 @@
+import hashlib
+import os
+
+import numpy as np
+
+from core.pipeline import Pipeline, _fingerprint
+
+
+def draw(seed=None, size=5):
+    return np.random.default_rng(seed).random(size)
+
+
+def total(values):
+    return float(values.sum())
+
+
+def doubled(value):
+    return 2 * value
+
+
+def build(state_dir, size=5):
+    pipeline = Pipeline(str(state_dir), processes=1)
+    pipeline.add('draw', draw, params={'size': size})
+    pipeline.add('total', total, deps={'values': 'draw'})
+    pipeline.add('doubled', doubled, deps={'value': 'total'})
+    return pipeline
+
+
+def test_up_to_date_run_runs_nothing(tmp_path):
+    assert build(tmp_path).run() == ['draw', 'total', 'doubled']
+    assert build(tmp_path).run() == []
+
+
+def test_rerun_upstream_reruns_dependents(tmp_path):
+    build(tmp_path).run()
+    os.remove(tmp_path / 'draw.pkl')
+
+    # The unseeded draw comes out different, so everything downstream is recomputed
+    pipeline = build(tmp_path)
+    assert pipeline.run() == ['draw', 'total', 'doubled']
+    assert pipeline.result('doubled') == 2 * pipeline.result('draw').sum()
+
+
+def test_dependents_stale_after_interrupted_run(tmp_path):
+    build(tmp_path).run()
+    os.remove(tmp_path / 'draw.pkl')
+    build(tmp_path).run(targets=['draw'])
+
+    # total was computed from the previous draw, even though its own key still matches
+    pipeline = build(tmp_path)
+    assert pipeline.run() == ['total', 'doubled']
+    assert pipeline.result('total') == pipeline.result('draw').sum()
+
+
+def test_changed_param_reruns_dependents(tmp_path):
+    build(tmp_path).run()
+    assert build(tmp_path, size=6).run() == ['draw', 'total', 'doubled']
+
+
+def test_missing_output_marks_task_stale(tmp_path):
+    output = tmp_path / 'figure.txt'
+
+    def build_with_output():
+        pipeline = build(tmp_path)
+        pipeline.add('write', write_text, deps={'value': 'doubled'}, params={'path': str(output)},
+                      outputs=[str(output)])
+        return pipeline
+
+    build_with_output().run()
+    assert build_with_output().run() == []
+    os.remove(output)
+    assert build_with_output().run() == ['write']
+
+
+def write_text(value, path):
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+def test_dict_order_does_not_change_fingerprint():
+    a, b = hashlib.sha256(), hashlib.sha256()
+    _fingerprint({'x': 1, 'y': [2, 3]}, a)
+    _fingerprint({'y': [2, 3], 'x': 1}, b)
+    assert a.hexdigest() == b.hexdigest()
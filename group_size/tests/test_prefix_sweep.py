@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.simulation import run_factorial_simulation
+from indirect_pathway.src.model.prefix_sweep import prefix_group_rates, run_prefix_sweep_simulation
+from indirect_pathway.src.model.indirect_effect import (
+    calculate_incarceration_rates_normalized,
+    indirect_model_group_rates
+)
+
+PARAM_DICT = {
+    'p': [0.3],
+    'gamma': [0.5, 2.0],
+    'sample_size': [2000],
+    'sampling': ['random', 'antithetic'],
+    'normalized': [True],
+    'target_avg_rate': [500],
+    'min_rate': [0, 100],
+}
+
+
+@pytest.mark.parametrize('sampling', ['random', 'antithetic'])
+def test_single_cell_matches_factorial_engine(sampling):
+    # With one p and sample_size the prefix sweep draws exactly what the engine draws for the seed
+    param_dict = {**PARAM_DICT, 'sampling': [sampling]}
+    prefix = run_prefix_sweep_simulation(param_dict, seed=5)
+    engine = run_factorial_simulation(indirect_model_group_rates, {**param_dict, 'seed': [5]}).drop(columns='seed')
+    assert list(prefix.columns) == list(engine.columns)
+    pd.testing.assert_frame_equal(prefix, engine, check_dtype=False, rtol=1e-9)
+
+
+def test_prefix_cells_match_rates_on_prefixes():
+    rng = np.random.default_rng(0)
+    positions_disadv = rng.beta(4, 16, 3000)
+    positions_adv = rng.beta(12, 8, 7000)
+    cumulative_disadv = np.concatenate([[0.0], np.cumsum(1 - positions_disadv)])
+    cumulative_adv = np.concatenate([[0.0], np.cumsum(1 - positions_adv)])
+    for n_disadv, n_adv, floor_rate in [(300, 700, 0), (1500, 3500, 100), (3000, 7000, 50)]:
+        expected = calculate_incarceration_rates_normalized(
+            {'positions_disadv': positions_disadv[:n_disadv], 'positions_adv': positions_adv[:n_adv]},
+            gamma=1, target_avg_rate=500, floor_rate=floor_rate)
+        rate_disadv, rate_adv = prefix_group_rates(cumulative_disadv[n_disadv], cumulative_adv[n_adv], n_disadv, n_adv,
+                                                   normalized=True, target_avg_rate=500, min_rate=floor_rate)
+        np.testing.assert_allclose([rate_disadv, rate_adv], [expected['rate_disadv'], expected['rate_adv']])
+
+
+def test_rows_follow_factorial_order():
+    param_dict = {'p': [0.1, 0.5, 0.9], 'gamma': [1.0, 3.0], 'sample_size': [500, 1000],
+                  'normalized': [True], 'target_avg_rate': [500]}
+    results = run_prefix_sweep_simulation(param_dict, seed=0)
+    grid = pd.MultiIndex.from_product(list(param_dict.values()), names=list(param_dict)).to_frame(index=False)
+    pd.testing.assert_frame_equal(results[list(param_dict)], grid, check_dtype=False)
+    np.testing.assert_allclose(results['pop_avg'], 500, atol=1)
+
+
+def test_stratified_sampling_is_rejected():
+    with pytest.raises(ValueError):
+        run_prefix_sweep_simulation({**PARAM_DICT, 'sampling': ['stratified']})
@@ -0,0 +1,48 @@
+import numpy as np
+
+from core.simulation import evaluate_group_rates, process_replicate_combination, summarize_replicates
+from model.indirect_effect import indirect_model_group_rates, indirect_model_incarceration_rate
+
+PARAMS = dict(p=0.3, gamma=2.0, mu_disadv=0.2, z_position_gap=0.4, c_disadv=20, c_adv=20,
+              sample_size=1000, normalized=True, target_avg_rate=500, min_rate=0)
+
+
+def _population_averages(rate_disadv, rate_adv):
+    # With normalized rates each draw averages exactly to the target
+    return PARAMS['p'] * np.asarray(rate_disadv) + (1 - PARAMS['p']) * np.asarray(rate_adv)
+
+
+def test_per_group_replicates_share_population_draws():
+    rate_disadv, rate_adv, _ = evaluate_group_rates(indirect_model_incarceration_rate, PARAMS, replicates=50)
+    np.testing.assert_allclose(_population_averages(rate_disadv, rate_adv), PARAMS['target_avg_rate'])
+
+
+def test_per_group_and_joint_models_agree_for_a_seed():
+    per_group = evaluate_group_rates(indirect_model_incarceration_rate, PARAMS, replicates=5, seed=7)
+    joint = evaluate_group_rates(indirect_model_group_rates, PARAMS, replicates=5, seed=7)
+    np.testing.assert_allclose(per_group[0], joint[0])
+    np.testing.assert_allclose(per_group[1], joint[1])
+
+
+def test_replicate_summary_intervals():
+    params = {**PARAMS, 'seed': 3}
+    result = process_replicate_combination(tuple(params.values()), list(params), indirect_model_group_rates,
+                                           replicates=400, interval=90)
+    assert result['pop_avg'] == PARAMS['target_avg_rate']
+    assert result['disparity_ratio_ci_lower'] < result['disparity_ratio'] < result['disparity_ratio_ci_upper']
+
+    # A large independent draw lies within the replicate interval
+    reference = indirect_model_group_rates(**{**PARAMS, 'sample_size': 200000}, seed=1)
+    reference_ratio = reference['rate_disadv'] / reference['rate_adv']
+    assert result['disparity_ratio_ci_lower'] < reference_ratio < result['disparity_ratio_ci_upper']
+    # The standard error of the mean is the spread of the replicates over sqrt(R)
+    normal_width = 2 * 1.645 * result['disparity_ratio_se'] * np.sqrt(400)
+    width = result['disparity_ratio_ci_upper'] - result['disparity_ratio_ci_lower']
+    assert 0.8 < width / normal_width < 1.25
+
+
+def test_summarize_replicates_percentiles():
+    summary = summarize_replicates({'x': np.arange(101.0)}, interval=90)
+    assert summary['x'] == 50
+    assert summary['x_ci_lower'] == 5 and summary['x_ci_upper'] == 95
+    np.testing.assert_allclose(summary['x_se'], np.std(np.arange(101.0), ddof=1) / np.sqrt(101))
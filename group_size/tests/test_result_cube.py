@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.derived_metrics import add_derived_metrics
+from core.result_cube import ResultCube
+from core.simulation import run_factorial_simulation
+from core.utils.io import load_result_cube, save_result_cube
+from direct_pathway.src.model.direct_effect import direct_pathway_model_incarceration_rate
+
+PARAM_DICT = {'avg_rate': [500], 'd': [1.0, 2.0, 4.0], 'p': np.linspace(0.1, 0.9, 5)}
+
+
+@pytest.fixture(scope='module')
+def results():
+    return add_derived_metrics(run_factorial_simulation(direct_pathway_model_incarceration_rate, PARAM_DICT))
+
+
+def _assert_round_trip(frame, expected):
+    # Categoricals come back with their categories; compare their labels
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False, check_categorical=False)
+
+
+def test_frame_round_trip(results):
+    cube = ResultCube.from_frame(results, axes=list(PARAM_DICT))
+    assert cube.dims == ['d', 'p']
+    assert cube.constants['avg_rate'] == 500
+    assert cube.aliases['prop_disadv'] == 'p'
+    assert 'disparity_bucket' in cube.categories
+    _assert_round_trip(cube.to_frame(), results)
+
+
+def test_frame_round_trip_of_shuffled_rows(results):
+    shuffled = results.sample(frac=1, random_state=0)
+    cube = ResultCube.from_frame(shuffled, axes=list(PARAM_DICT))
+    _assert_round_trip(cube.to_frame(), results)
+
+
+def test_file_round_trip(results, tmp_path):
+    cube = ResultCube.from_frame(results, axes=list(PARAM_DICT))
+    loaded = load_result_cube(save_result_cube(cube, 'direct.cube.npz', str(tmp_path)))
+    assert loaded.dims == cube.dims and loaded.columns == cube.columns
+    for name in cube.metrics:
+        np.testing.assert_array_equal(loaded[name], cube[name])
+    _assert_round_trip(loaded.to_frame(), results)
+
+
+def test_sel_and_reduce_match_pandas(results):
+    cube = ResultCube.from_frame(results, axes=list(PARAM_DICT))
+    row = results[(results['d'] == 2.0) & np.isclose(results['p'], 0.3)]
+    point = cube.sel(d=2.0, p=0.3 + 1e-12)
+    assert point.shape == ()
+    np.testing.assert_allclose(point['rate_disadv'], row['rate_disadv'].iloc[0])
+
+    subset = cube.sel(d=[1.0, 4.0]).to_frame()
+    _assert_round_trip(subset, results[results['d'].isin([1.0, 4.0])].reset_index(drop=True))
+
+    means = cube.reduce(np.mean, 'p', metrics=['rate_adv']).to_frame()
+    expected = results.groupby('d')['rate_adv'].mean()
+    np.testing.assert_allclose(means['rate_adv'], expected.to_numpy())
+
+
+def test_sparse_rows_are_rejected(results):
+    with pytest.raises(ValueError):
+        ResultCube.from_frame(results.iloc[1:], axes=list(PARAM_DICT))
+    with pytest.raises(ValueError):
+        ResultCube.from_frame(pd.concat([results, results.iloc[:1]]), axes=list(PARAM_DICT))
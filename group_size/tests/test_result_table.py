@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.result_table import ResultTable, invalidate, result_table
+
+KEYS = ['min_rate', 'prop_disadv', 'gamma']
+
+
+def _grid(shuffle_seed=None):
+    grid = pd.MultiIndex.from_product([[0, 50, 100], np.linspace(0.05, 0.95, 7), [0.5, 1.0, 2.0]],
+                                      names=KEYS).to_frame(index=False)
+    grid['disparity_ratio'] = 1 + grid['prop_disadv'] * grid['gamma'] + grid['min_rate'] / 100
+    if shuffle_seed is not None:
+        grid = grid.sample(frac=1, random_state=shuffle_seed)
+    return grid
+
+
+def _expected(df, **criteria):
+    mask = np.ones(len(df), dtype=bool)
+    for key, value in criteria.items():
+        values = value if isinstance(value, list) else [value]
+        mask &= np.isclose(df[key].to_numpy()[:, None], values).any(axis=1)
+    return df[mask].sort_values(KEYS)
+
+
+@pytest.mark.parametrize('shuffle_seed', [None, 0])
+@pytest.mark.parametrize('criteria', [
+    {'min_rate': 50},
+    {'min_rate': 50, 'prop_disadv': 0.35},
+    {'gamma': 2.0},
+    {'prop_disadv': [0.05, 0.95], 'gamma': 1.0},
+    {'min_rate': [0, 100], 'gamma': [0.5, 2.0]},
+])
+def test_select_matches_boolean_mask(shuffle_seed, criteria):
+    df = _grid(shuffle_seed)
+    table = ResultTable(df, KEYS)
+    selected = table.select(**criteria)
+    pd.testing.assert_frame_equal(selected, _expected(df, **criteria))
+
+
+def test_numeric_keys_match_within_tolerance():
+    df = _grid()
+    table = ResultTable(df, KEYS)
+    assert len(table.select(prop_disadv=0.05 + 0.15 * 2 + 1e-13)) == 9
+    assert table.select(prop_disadv=0.36).empty
+    assert table.select(min_rate=75).empty
+    assert table.level_code('gamma', 1) == 1
+
+
+def test_leading_key_selection_is_a_view_of_sorted_data():
+    df = _grid()
+    table = ResultTable(df, KEYS)
+    selected = table.select(min_rate=100)
+    assert np.shares_memory(selected['disparity_ratio'].to_numpy(), df['disparity_ratio'].to_numpy())
+
+
+def test_unknown_key_raises():
+    df = _grid()
+    with pytest.raises(KeyError):
+        ResultTable(df, KEYS).select(c_adv=5)
+
+
+def test_shared_table_is_reused_until_invalidated():
+    df = _grid()
+    table = result_table(df, KEYS + ['not_a_column'])
+    assert result_table(df, KEYS) is table
+    assert result_table(df.copy(), KEYS) is not table
+
+    # New values of non-key columns are served without a rebuild
+    df['disparity_ratio'] = 0.0
+    assert result_table(df, KEYS) is table
+    assert (table.select(min_rate=0)['disparity_ratio'] == 0).all()
+
+    # Changed keys need an explicit invalidation
+    df.loc[df['min_rate'] == 100, 'min_rate'] = 200
+    invalidate(df)
+    rebuilt = result_table(df, KEYS)
+    assert rebuilt is not table
+    assert rebuilt.select(min_rate=100).empty
+    assert len(rebuilt.select(min_rate=200)) == 21
+
+
+def test_unsorted_tables_serve_current_values():
+    df = _grid(shuffle_seed=1)
+    table = result_table(df, KEYS)
+    df['disparity_ratio'] = -1.0
+    assert (table.select(gamma=0.5)['disparity_ratio'] == -1).all()
+
+
+
+def test_shared_table_is_rebuilt_when_rows_change():
+    df = _grid()
+    table = result_table(df, KEYS)
+    df.drop(df.index[-3:], inplace=True)
+    rebuilt = result_table(df, KEYS)
+    assert rebuilt is not table
+    assert len(rebuilt.select(min_rate=100)) == 18
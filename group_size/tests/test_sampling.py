@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from scipy.stats import beta
+
+from model.indirect_effect import estimate_mean_standard_error, indirect_model_group_rates
+
+MODEL_PARAMS = dict(p=0.3, gamma=2.5, mu_disadv=0.2, z_position_gap=0.4, c_disadv=20, c_adv=20,
+                    normalized=True, target_avg_rate=500, min_rate=0)
+
+
+def _position_rates(u):
+    return 500 * (1 - beta.ppf(u, 4, 16)) ** 2.5
+
+
+@pytest.mark.parametrize('n', [101, 1000])
+def test_stratified_standard_error_matches_spread_of_means(n):
+    means, standard_errors = [], []
+    for seed in range(300):
+        u = (np.arange(n) + np.random.default_rng(seed).random(n)) / n
+        rates = _position_rates(u)
+        means.append(rates.mean())
+        standard_errors.append(estimate_mean_standard_error(rates, 'stratified'))
+    assert 0.8 < np.mean(standard_errors) / np.std(means, ddof=1) < 1.4
+
+
+def test_stratified_standard_error_over_batches():
+    # Two stratified batches laid end to end: the mean's variance is that of each batch, weighted
+    rng = np.random.default_rng(0)
+    sizes = [200, 400]
+    rows = np.stack([np.concatenate([_position_rates((np.arange(size) + rng.random(size)) / size) for size in sizes])
+                     for _ in range(300)])
+    standard_errors = estimate_mean_standard_error(rows, 'stratified', blocks=sizes)
+    assert standard_errors.shape == (300,)
+    assert 0.8 < np.mean(standard_errors) / np.std(rows.mean(axis=1), ddof=1) < 1.4
+    assert np.isnan(estimate_mean_standard_error(rows[0], 'stratified', blocks=[598, 2]))
+
+
+@pytest.mark.parametrize('sampling', ['random', 'stratified', 'antithetic'])
+def test_disparity_ratio_standard_error_is_calibrated(sampling):
+    draws = [indirect_model_group_rates(**MODEL_PARAMS, sample_size=1001, sampling=sampling, seed=seed)
+             for seed in range(200)]
+    ratios = np.array([draw['rate_disadv'] / draw['rate_adv'] for draw in draws])
+    standard_errors = np.array([draw['disparity_ratio_se'] for draw in draws])
+    assert 0.8 < np.mean(standard_errors) / np.std(ratios, ddof=1) < 1.4
+
+
+def test_unknown_sampling_is_rejected():
+    with pytest.raises(ValueError):
+        indirect_model_group_rates(**MODEL_PARAMS, sample_size=100, sampling='sobol')
@@ -0,0 +1,70 @@
+import json
+import os
+import pickle
+
+import plotly.graph_objects as go
+import pytest
+from plotly.basedatatypes import BaseFigure
+
+from core.utils.io import FIGURE_HASHES_FILENAME, save_figures
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Replaces PNG rendering (which needs kaleido) by a stub recording the paths written."""
+    paths = []
+
+    def write_image(fig, path, *args, **kwargs):
+        if fig.layout.title.text == 'broken':
+            with open(path, 'w') as f:
+                f.write('partial')
+            raise RuntimeError('renderer failed')
+        with open(path, 'w') as f:
+            f.write(fig.to_json())
+        paths.append(os.path.basename(path))
+
+    monkeypatch.setattr(BaseFigure, 'write_image', write_image)
+    return paths
+
+
+def _figure(y, title=None):
+    return go.Figure(go.Scatter(x=[0, 1, 2], y=y), layout=dict(title=title))
+
+
+def test_unchanged_figures_are_skipped(tmp_path, rendered):
+    figures = {'a': _figure([1, 2, 3]), 'b': _figure([3, 2, 1])}
+    assert save_figures(figures, str(tmp_path), processes=1) == ['a', 'b']
+    assert save_figures(figures, str(tmp_path), processes=1) == []
+    assert rendered == ['a.png', 'b.png']
+    assert set(json.load(open(tmp_path / FIGURE_HASHES_FILENAME))) == {'a.png', 'b.png'}
+
+
+def test_changed_or_missing_outputs_are_rendered(tmp_path, rendered):
+    figures = {'a': _figure([1, 2, 3]), 'b': _figure([3, 2, 1])}
+    save_figures(figures, str(tmp_path), processes=1)
+
+    assert save_figures({**figures, 'b': _figure([3, 2, 0])}, str(tmp_path), processes=1) == ['b']
+    os.remove(tmp_path / 'a.png')
+    assert save_figures(figures, str(tmp_path), processes=1) == ['a', 'b']
+    # HTML output is tracked per file, so asking for it renders the figures again
+    assert save_figures(figures, str(tmp_path), html=True, processes=1) == ['a', 'b']
+    assert save_figures(figures, str(tmp_path), html=True, processes=1) == []
+    assert save_figures(figures, str(tmp_path), processes=1, skip_unchanged=False) == ['a', 'b']
+
+
+def test_unpickled_figures_match_their_originals(tmp_path, rendered):
+    figure = _figure([1, 2, 3], title='pickled')
+    save_figures({'a': figure}, str(tmp_path), processes=1)
+    assert save_figures({'a': pickle.loads(pickle.dumps(figure))}, str(tmp_path), processes=1) == []
+
+
+def test_failed_renders_are_retried(tmp_path, rendered):
+    figures = {'ok': _figure([1, 2, 3]), 'bad': _figure([1, 2, 3], title='broken')}
+    with pytest.raises(RuntimeError):
+        save_figures(figures, str(tmp_path), processes=1)
+    recorded = json.load(open(tmp_path / FIGURE_HASHES_FILENAME))
+    assert 'ok.png' in recorded and 'bad.png' not in recorded
+
+    with pytest.raises(RuntimeError):
+        save_figures(figures, str(tmp_path), processes=1)
+    assert rendered == ['ok.png']
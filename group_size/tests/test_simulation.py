@@ -0,0 +1,17 @@
+import numpy as np
+
+from core.simulation import param_combinations, run_factorial_simulation
+from direct_pathway.src.model.direct_effect import direct_pathway_model_incarceration_rate
+
+
+def test_param_combinations_order():
+    param_dict = {'a': [1, 2], 'b': [0.5, 1.5, 2.5]}
+    combinations = list(param_combinations(param_dict))
+    assert combinations == [(1, 0.5), (1, 1.5), (1, 2.5), (2, 0.5), (2, 1.5), (2, 2.5)]
+
+
+def test_factorial_rows_follow_param_combinations():
+    param_dict = {'avg_rate': [250, 500], 'd': np.linspace(1, 5, 3), 'p': np.linspace(0.05, 0.95, 4)}
+    results = run_factorial_simulation(direct_pathway_model_incarceration_rate, param_dict)
+    np.testing.assert_array_equal(results[['d']].to_numpy().ravel(),
+                                  [d for _, d, _ in param_combinations(param_dict)])